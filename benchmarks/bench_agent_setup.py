@@ -0,0 +1,71 @@
+"""
+Micro-benchmark: cost of constructing the seven lab agents.
+
+Times AgentFactory.create_all_agents with the process-wide caches (role
+configs, Jinja2 environment, rendered system prompts) warm, and with them
+cleared before every setup, which approximates the old per-agent YAML parse
+and template compile. Uses the offline mock provider.
+
+Usage:
+    python benchmarks/bench_agent_setup.py --iterations 200
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import logging
+import tempfile
+import time
+
+import src.agents.runtime.agent_factory as agent_factory
+from src.agents.runtime.agent_runtime import render_system_prompt
+from src.common.logging import SimulationLogger
+from src.llm import prompts
+
+
+DEFENSE_CONFIG = {"instruction_defense": {"mode": "active"}}
+
+
+def clear_caches():
+    agent_factory._ROLE_CONFIG_CACHE.clear()
+    prompts.get_template_environment.cache_clear()
+    prompts._compile_template.cache_clear()
+    render_system_prompt.cache_clear()
+
+
+def time_setups(logger: SimulationLogger, iterations: int, cold: bool) -> float:
+    """Return mean milliseconds per 7-agent setup."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        if cold:
+            clear_caches()
+        factory = agent_factory.AgentFactory({"provider": "mock"}, logger, {"current_step": 0})
+        factory.create_all_agents(DEFENSE_CONFIG)
+    return (time.perf_counter() - start) / iterations * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark agent construction")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    
+    # "Created agent" INFO lines would dominate the timings
+    logging.disable(logging.INFO)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        logger = SimulationLogger(Path(tmpdir))
+        cold = time_setups(logger, args.iterations, cold=True)
+        time_setups(logger, 1, cold=False)
+        warm = time_setups(logger, args.iterations, cold=False)
+        logger.close()
+    
+    print(f"7-agent setup, caches cleared: {cold:8.2f} ms")
+    print(f"7-agent setup, caches warm:    {warm:8.2f} ms")
+    print(f"Speedup: {cold / warm:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Orchestrator throughput benchmark.
+
+Drives Simulation.run end-to-end on the offline mock LLM provider and
+reports, per case:
+- messages/sec and wall time of the run
+- p50/p99 per-hop latency (time a message waits in a queue between being
+  enqueued and being picked up by the receiving agent)
+- peak RSS (every case runs in its own process)
+- bytes written to events.jsonl / messages.jsonl (or their .zst variants)
+
+Cases sweep agent count, max_messages and fan-out. Results are written as
+JSON so runs can be compared across releases.
+
+Usage:
+    python benchmarks/bench_orchestrator.py
+    python benchmarks/bench_orchestrator.py --agents 7 14 --max-messages 500 --fan-out 1 2 \\
+        --output benchmarks/results/orchestrator.json
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from src.common.log_store import find_log
+from src.common.utils import get_timestamp
+
+
+# Order in which lab agents are added as the agent count grows
+LAB_AGENTS = ["Atlas", "Deng", "Bohr", "Curie", "Edison", "Faraday", "Gauss"]
+RESEARCHERS = ["Bohr", "Curie", "Edison", "Faraday", "Gauss"]
+
+
+def build_agent_specs(count: int) -> List[Any]:
+    """Lab agents first, then extra researchers cloned from existing roles."""
+    if count < 2:
+        raise ValueError("At least 2 agents are needed (Atlas plus one receiver)")
+    specs: List[Any] = LAB_AGENTS[:count]
+    for i in range(count - len(specs)):
+        role = RESEARCHERS[i % len(RESEARCHERS)]
+        specs.append({"name": f"{role}{i // len(RESEARCHERS) + 2}", "role": role.lower()})
+    return specs
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_case(
+    agents: int, max_messages: int, fan_out: int, seed: int, log_format: str = "jsonl"
+) -> Dict[str, Any]:
+    """Run one simulation and measure it (in the current process)."""
+    from src.orchestrator.simulation import Simulation
+    
+    hop_latencies: List[float] = []
+    
+    class InstrumentedSimulation(Simulation):
+        """Simulation that timestamps every enqueue/dequeue."""
+        
+        def initialize_agents(self) -> None:
+            super().initialize_agents()
+            enqueued_at: Dict[int, float] = {}
+            
+            def on_enqueue(message):
+                enqueued_at[id(message)] = time.perf_counter()
+            
+            def on_dequeue(message):
+                start = enqueued_at.pop(id(message), None)
+                if start is not None:
+                    hop_latencies.append(time.perf_counter() - start)
+            
+            for agent in self.agents.values():
+                agent.queue.subscribe(on_enqueue=on_enqueue, on_dequeue=on_dequeue)
+    
+    agent_specs = build_agent_specs(agents)
+    agent_names = [spec["name"] if isinstance(spec, dict) else spec for spec in agent_specs]
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output_dir = Path(tmpdir) / "run"
+        simulation = InstrumentedSimulation(
+            llm_config={
+                "provider": "mock",
+                "mock": {"seed": seed, "fan_out": fan_out, "agents": agent_names},
+            },
+            sim_config={
+                "max_messages": max_messages,
+                "max_time_s": 600,
+                "deadlock_timeout_s": 10,
+                "agents": agent_specs,
+                "task_file": str(PROJECT_ROOT / "data/tasks/lab_task_mof.json"),
+                "log_writer": {"format": log_format},
+            },
+            seed=seed,
+            output_dir=output_dir,
+        )
+        
+        start = time.perf_counter()
+        try:
+            outcome = await simulation.run()
+        finally:
+            # A failed run must not leave its writer behind to flush into the
+            # deleted temp dir
+            simulation.logger.close()
+        wall = time.perf_counter() - start
+        
+        bytes_written = {}
+        for name in ("events", "messages"):
+            path = find_log(output_dir, name)
+            bytes_written[path.name if path else name] = path.stat().st_size if path else 0
+    
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+    
+    return {
+        "agents": agents,
+        "max_messages": max_messages,
+        "fan_out": fan_out,
+        "seed": seed,
+        "log_format": log_format,
+        "termination_reason": outcome.termination_reason.value,
+        "messages": outcome.total_messages,
+        "wall_seconds": wall,
+        "messages_per_sec": outcome.total_messages / wall if wall > 0 else 0.0,
+        "hop_latency_ms": {
+            "p50": percentile(hop_latencies, 50) * 1000,
+            "p99": percentile(hop_latencies, 99) * 1000,
+            "samples": len(hop_latencies),
+        },
+        "peak_rss_mb": peak_rss_mb,
+        "bytes_written": bytes_written,
+    }
+
+
+def run_case_in_subprocess(
+    agents: int, max_messages: int, fan_out: int, seed: int, log_format: str = "jsonl"
+) -> Dict[str, Any]:
+    """Run one case in a fresh interpreter so peak RSS is per case."""
+    with tempfile.NamedTemporaryFile(suffix=".json") as result_file:
+        command = [
+            sys.executable, str(Path(__file__).resolve()), "--case",
+            "--agents", str(agents),
+            "--max-messages", str(max_messages),
+            "--fan-out", str(fan_out),
+            "--seed", str(seed),
+            "--log-format", log_format,
+            "--output", result_file.name,
+        ]
+        # Simulation logs go to the console; keep them out of the report. The
+        # attack prompt bank is opened relative to the project root
+        completed = subprocess.run(
+            command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, cwd=PROJECT_ROOT
+        )
+        if completed.returncode != 0:
+            return {
+                "agents": agents, "max_messages": max_messages, "fan_out": fan_out, "seed": seed,
+                "error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed",
+            }
+        with open(result_file.name, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+def git_revision() -> str:
+    """Current git commit, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark orchestrator throughput")
+    parser.add_argument("--agents", type=int, nargs="+", default=[3, 7, 14], help="Agent counts to sweep")
+    parser.add_argument("--max-messages", type=int, nargs="+", default=[100, 500], help="Message limits to sweep")
+    parser.add_argument("--fan-out", type=int, nargs="+", default=[1, 2], help="send_message fan-outs to sweep")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--log-format", default="jsonl", help="Run log format (jsonl or jsonl.zst)")
+    parser.add_argument("--output", type=Path, default=None, help="JSON result file")
+    parser.add_argument("--case", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.case:
+        # Child process: run exactly one case
+        result = asyncio.run(run_case(
+            args.agents[0], args.max_messages[0], args.fan_out[0], args.seed, args.log_format
+        ))
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return
+    
+    output = args.output or Path("benchmarks/results") / f"orchestrator_{get_timestamp()}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    
+    results = []
+    for agents, max_messages, fan_out in itertools.product(args.agents, args.max_messages, args.fan_out):
+        result = run_case_in_subprocess(agents, max_messages, fan_out, args.seed, args.log_format)
+        results.append(result)
+        if "error" in result:
+            print(f"agents={agents:3d} max_messages={max_messages:5d} fan_out={fan_out} -> FAILED: {result['error']}")
+            continue
+        print(
+            f"agents={agents:3d} max_messages={max_messages:5d} fan_out={fan_out} -> "
+            f"{result['messages_per_sec']:8.1f} msg/s | wall {result['wall_seconds']:.2f}s | "
+            f"hop p50 {result['hop_latency_ms']['p50']:.2f}ms p99 {result['hop_latency_ms']['p99']:.2f}ms | "
+            f"rss {result['peak_rss_mb']:.0f}MB | "
+            f"written {sum(result['bytes_written'].values()) / 1024:.0f}KiB"
+        )
+    
+    report = {
+        "benchmark": "orchestrator",
+        "timestamp": datetime.now().isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
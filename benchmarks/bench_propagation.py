@@ -0,0 +1,74 @@
+"""
+Propagation analysis benchmark.
+
+Builds a synthetic messages.jsonl of N messages between the lab agents
+with a few adversary injections, then times PropagationAnalyzer loading,
+index construction and trace_attack_propagation, and the single-pass
+StreamingPropagationAnalyzer summary.
+
+Usage:
+    python benchmarks/bench_propagation.py --messages 1000000
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import random
+import tempfile
+import time
+
+from src.common.constants import AGENT_NAMES
+from src.common.utils import save_jsonl, save_json
+from src.evaluation.propagation import PropagationAnalyzer, StreamingPropagationAnalyzer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark propagation analysis")
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--attacks", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    messages = [
+        {"sender": rng.choice(AGENT_NAMES), "receiver": rng.choice(AGENT_NAMES), "content": f"step {i}"}
+        for i in range(args.messages)
+    ]
+    for position in sorted(rng.sample(range(args.messages), args.attacks)):
+        messages[position] = {"sender": "[ADVERSARY]", "receiver": rng.choice(AGENT_NAMES), "content": "attack"}
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        run_dir = Path(tmpdir)
+        save_jsonl(messages, run_dir / "messages.jsonl")
+        save_json({"termination_reason": "message_limit"}, run_dir / "outcomes.json")
+        
+        start = time.perf_counter()
+        streaming_summary = StreamingPropagationAnalyzer(run_dir).generate_summary()
+        streaming_s = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        analyzer = PropagationAnalyzer(run_dir)
+        load_s = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    analyzer.index
+    index_s = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    chains = analyzer.trace_attack_propagation()
+    trace_s = time.perf_counter() - start
+    
+    print(f"{args.messages} messages, {args.attacks} attacks")
+    print(f"load   {load_s:6.2f}s")
+    print(f"index  {index_s:6.2f}s")
+    print(f"trace  {trace_s:6.2f}s ({sum(c.depth for c in chains)} propagated messages)")
+    print(
+        f"stream {streaming_s:6.2f}s ({streaming_summary['total_propagated_messages']} propagated messages)"
+    )
+
+
+if __name__ == "__main__":
+    main()
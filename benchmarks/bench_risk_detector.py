@@ -0,0 +1,138 @@
+"""
+RiskDetector benchmark: per-check keyword scans vs the compiled matcher.
+
+Generates code payloads of increasing size (safe, dangerous near the end,
+many heuristic keywords) plus run_code argument dicts, checks that the
+implementations return identical verdicts, and times them:
+- legacy: keyword scans as before the compiled matcher
+- compiled: RiskDetector without its verdict cache
+- cached: RiskDetector re-checking payloads already in its verdict cache
+
+Usage:
+    python benchmarks/bench_risk_detector.py --sizes 1000 100000 1000000
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import random
+import time
+
+from src.common.constants import DANGEROUS_CHEMICALS, DANGEROUS_KEYWORDS
+from src.tools.risk_rules import RiskDetector
+
+
+def legacy_check_code(code):
+    """RiskDetector.check_code before the compiled matcher."""
+    code_lower = code.lower()
+    for risk_name, risk_info in DANGEROUS_CHEMICALS.items():
+        for keyword_pair in risk_info["keywords"]:
+            if all(kw.lower() in code_lower for kw in keyword_pair):
+                return True, {
+                    "risk_type": risk_name,
+                    "description": risk_info["description"],
+                    "detected_keywords": keyword_pair,
+                    "severity": "HIGH"
+                }
+    found_dangerous = [kw for kw in DANGEROUS_KEYWORDS if kw in code_lower]
+    if len(found_dangerous) >= 2:
+        return True, {
+            "risk_type": "multiple_dangerous_keywords",
+            "description": "Multiple危险关键词检测到",
+            "detected_keywords": found_dangerous,
+            "severity": "MEDIUM"
+        }
+    return False, None
+
+
+def legacy_check_arguments(arguments):
+    """RiskDetector.check_arguments before the compiled matcher."""
+    if "chemicals" in arguments:
+        chemicals = arguments["chemicals"]
+        if isinstance(chemicals, list) and len(chemicals) >= 2:
+            chem_lower = [c.lower() if isinstance(c, str) else str(c).lower() for c in chemicals]
+            for risk_name, risk_info in DANGEROUS_CHEMICALS.items():
+                for keyword_pair in risk_info["keywords"]:
+                    if any(kw1.lower() in " ".join(chem_lower) and kw2.lower() in " ".join(chem_lower)
+                           for kw1, kw2 in [keyword_pair]):
+                        return True, {
+                            "risk_type": risk_name,
+                            "description": risk_info["description"],
+                            "detected_in": "arguments.chemicals",
+                            "severity": "HIGH"
+                        }
+    for key, value in arguments.items():
+        if isinstance(value, str):
+            is_dangerous, details = legacy_check_code(value)
+            if is_dangerous:
+                details["detected_in"] = f"arguments.{key}"
+                return True, details
+    return False, None
+
+
+FILLER = ["import numpy as np", "x = np.zeros(10)", "mix(copper_nitrate, trimesic_acid)",
+          "heat(sample, 120)", "print(yield_ratio)", "for i in range(3):", "    stir(flask)"]
+
+
+def make_payloads(size, rng):
+    """Payloads of roughly `size` characters."""
+    lines = []
+    while sum(map(len, lines)) < size:
+        lines.append(rng.choice(FILLER))
+    safe = "\n".join(lines)
+    return {
+        "safe": safe,
+        "pair_at_end": safe + "\nmix(bleach, ammonia)",
+        "heuristics": safe + "\n# toxic and explosive byproducts",
+    }
+
+
+def timed(fn, payloads, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for payload in payloads:
+            fn(payload)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RiskDetector")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 10_000, 1_000_000])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    detector = RiskDetector(cache_size=0)
+    cached = RiskDetector()
+    
+    for size in args.sizes:
+        payloads = make_payloads(size, rng)
+        arguments = [
+            {"code": code, "description": "Mock experiment", "chemicals": ["Bleach", "water", "ammonia"]}
+            for code in payloads.values()
+        ]
+        for code in payloads.values():
+            for checker in (detector, cached, cached):
+                assert checker.check_code(code) == legacy_check_code(code), "Verdicts must be identical"
+        for args_dict in arguments:
+            for checker in (detector, cached, cached):
+                assert checker.check_arguments(args_dict) == legacy_check_arguments(args_dict), "Verdicts must be identical"
+        
+        repeat = max(1, 200_000 // size)
+        codes = list(payloads.values())
+        code_times = [timed(fn, codes, repeat) for fn in (legacy_check_code, detector.check_code, cached.check_code)]
+        args_times = [
+            timed(fn, arguments, repeat)
+            for fn in (legacy_check_arguments, detector.check_arguments, cached.check_arguments)
+        ]
+        
+        for label, (legacy, compiled, warm) in (("check_code", code_times), ("check_arguments", args_times)):
+            print(f"{size:>8} chars | {label:15} | legacy {legacy * 1e3:8.3f}ms | compiled {compiled * 1e3:8.3f}ms "
+                  f"({legacy / compiled:4.1f}x) | cached {warm * 1e3:8.3f}ms ({legacy / warm:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
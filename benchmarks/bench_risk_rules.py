@@ -0,0 +1,91 @@
+"""
+Risk rule engine benchmark over rule-set sizes.
+
+Generates synthetic rule sets (pair rules over made-up chemical names plus
+one keyword rule) of 10 to 10,000 rules and measures, for both keyword
+matching strategies (lazy substring scans and the single-pass trie regex):
+- compile time of the rule set
+- check time on code payloads of a few sizes
+Verdicts of both strategies are asserted equal.
+
+Usage:
+    python benchmarks/bench_risk_rules.py --rules 10 100 1000 10000 --sizes 1000 100000
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import random
+import string
+import time
+
+from src.tools.risk_rules import RiskRuleSet, SCAN_MAX_KEYWORDS
+
+
+def make_word(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10)))
+
+
+def make_rules(count: int, rng: random.Random):
+    """count rules: one keyword rule, the rest pair rules (every 10th with a window)."""
+    vocabulary = [make_word(rng) for _ in range(max(4, count))]
+    pair_rules = {
+        f"rule_{i}": {
+            "description": f"Synthetic rule {i}",
+            "severity": "HIGH",
+            "keywords": [rng.sample(vocabulary, 2)],
+            **({"window": 200} if i % 10 == 0 else {}),
+        }
+        for i in range(count - 1)
+    }
+    keyword_rules = {
+        "many_keywords": {"description": "Synthetic", "keywords": rng.sample(vocabulary, 4), "min_matches": 3}
+    }
+    return {"pair_rules": pair_rules, "keyword_rules": keyword_rules}, vocabulary
+
+
+def make_payload(size: int, vocabulary, rng: random.Random) -> str:
+    """Code-like text with a sprinkling of rule keywords."""
+    parts = []
+    while sum(map(len, parts)) < size:
+        parts.append(rng.choice(vocabulary) if rng.random() < 0.01 else make_word(rng))
+    return " ".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the risk rule engine")
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100_000])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    print(f"(auto strategy uses scan up to {SCAN_MAX_KEYWORDS} distinct keywords)")
+    for count in args.rules:
+        rng = random.Random(args.seed)
+        rules, vocabulary = make_rules(count, rng)
+        payloads = [make_payload(size, vocabulary, rng) for size in args.sizes]
+        
+        rule_sets = {}
+        for strategy in ("scan", "regex"):
+            start = time.perf_counter()
+            rule_sets[strategy] = RiskRuleSet(rules, strategy=strategy)
+            compile_ms = (time.perf_counter() - start) * 1000
+            
+            timings = []
+            for size, payload in zip(args.sizes, payloads):
+                repeat = max(1, 100_000 // size)
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    rule_sets[strategy].check(payload)
+                timings.append(f"{size}: {(time.perf_counter() - start) / repeat * 1000:8.3f}ms")
+            print(f"{count:>6} rules | {strategy:5} | compile {compile_ms:8.1f}ms | " + " | ".join(timings))
+        
+        for payload in payloads:
+            assert rule_sets["scan"].check(payload) == rule_sets["regex"].check(payload), "Strategies disagree"
+
+
+if __name__ == "__main__":
+    main()
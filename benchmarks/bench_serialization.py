@@ -0,0 +1,87 @@
+"""
+Serialization benchmark: stdlib json vs model_dump_json/orjson.
+
+Builds a messages.jsonl with N records (100k by default) and times
+writing and reading it both ways:
+- before: model_dump(mode='json') + json.dumps / json.loads
+- after:  to_json_line (model_dump_json) / load_jsonl (orjson)
+
+Usage:
+    python benchmarks/bench_serialization.py --lines 100000
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import json
+import tempfile
+import time
+
+from src.common.types import Message, MessageRole
+from src.common.utils import load_jsonl, orjson, to_json_line
+
+
+def make_messages(count: int):
+    """Messages shaped like a real run (mixed lengths, metadata, non-ASCII)."""
+    return [
+        Message(
+            role=MessageRole.ASSISTANT if i % 2 else MessageRole.USER,
+            content=f"[From Bohr]: step {i} - 请检查 Cu-BTC 合成参数 " + "x" * (i % 400),
+            sender="Bohr",
+            receiver="Curie",
+            step=i,
+            metadata={"is_attack": i % 50 == 0, "prompt_id": i % 7},
+        )
+        for i in range(count)
+    ]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSONL serialization")
+    parser.add_argument("--lines", type=int, default=100_000)
+    args = parser.parse_args()
+    
+    messages = make_messages(args.lines)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        old_file = Path(tmpdir) / "messages_stdlib.jsonl"
+        new_file = Path(tmpdir) / "messages_fast.jsonl"
+        
+        def write_stdlib():
+            with open(old_file, "w", encoding="utf-8") as f:
+                for m in messages:
+                    f.write(json.dumps(m.model_dump(mode="json"), ensure_ascii=False) + "\n")
+        
+        def write_fast():
+            with open(new_file, "wb") as f:
+                for m in messages:
+                    f.write(to_json_line(m))
+        
+        def read_stdlib():
+            with open(old_file, "r", encoding="utf-8") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        
+        write_old, _ = timed(write_stdlib)
+        write_new, _ = timed(write_fast)
+        read_old, old_records = timed(read_stdlib)
+        read_new, new_records = timed(lambda: load_jsonl(new_file))
+        
+        assert old_records == new_records, "Both paths must produce the same records"
+        size_mb = new_file.stat().st_size / (1024 * 1024)
+    
+    print(f"{args.lines} messages, {size_mb:.1f} MiB (orjson available: {orjson is not None})")
+    print(f"write  stdlib {write_old:6.2f}s | fast {write_new:6.2f}s | {write_old / write_new:4.1f}x")
+    print(f"read   stdlib {read_old:6.2f}s | fast {read_new:6.2f}s | {read_old / read_new:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Convert run logs between plain and zstd-compressed NDJSON.
+
+Rewrites events/messages/tool_calls of existing run directories with the
+fixed schema derived from the Event/Message/ToolCall models.
+
+Usage:
+    python scripts/convert_run_logs.py outputs/runs/<run> --format jsonl.zst
+    python scripts/convert_run_logs.py outputs/batch --recursive --format jsonl.zst --remove-source
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+
+from src.common.log_store import LOG_FORMATS, convert_run_logs
+
+
+def find_run_dirs(root: Path, recursive: bool):
+    """Run directories are the ones holding an outcomes.json."""
+    if not recursive:
+        return [root]
+    return sorted(path.parent for path in root.rglob("outcomes.json"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert run log storage format")
+    parser.add_argument("path", type=Path, help="Run directory (or a root with --recursive)")
+    parser.add_argument("--format", choices=LOG_FORMATS, default="jsonl.zst", help="Target format")
+    parser.add_argument("--recursive", action="store_true", help="Convert every run below path")
+    parser.add_argument("--remove-source", action="store_true", help="Delete the original log files")
+    args = parser.parse_args()
+    
+    run_dirs = find_run_dirs(args.path, args.recursive)
+    before = after = 0
+    
+    for run_dir in run_dirs:
+        sources = {p: p.stat().st_size for p in run_dir.glob("*.jsonl*")}
+        written = convert_run_logs(run_dir, args.format, remove_source=args.remove_source)
+        if not written:
+            continue
+        
+        before += sum(size for p, size in sources.items() if p not in written)
+        after += sum(p.stat().st_size for p in written)
+        print(f"✓ {run_dir}: {', '.join(p.name for p in written)}")
+    
+    print(f"\nConverted {len(run_dirs)} run(s) to {args.format}")
+    if after:
+        print(f"Size: {before / 1024:.0f} KiB -> {after / 1024:.0f} KiB ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Query the run catalogue (outputs/catalog.sqlite).
+
+Usage:
+    python scripts/query_catalog.py index outputs/          # backfill existing runs
+    python scripts/query_catalog.py summary --group-by defense_hash
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+
+from src.evaluation.catalog import DEFAULT_CATALOG_DB, RunCatalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index and summarize simulation runs")
+    parser.add_argument("--db", type=Path, default=DEFAULT_CATALOG_DB, help="Catalogue database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    index_parser = subparsers.add_parser("index", help="Index every run below a directory")
+    index_parser.add_argument("root", type=Path)
+    index_parser.add_argument("--with-logs", action="store_true", help="Also index messages and events")
+    
+    summary_parser = subparsers.add_parser("summary", help="Aggregate outcomes per group")
+    summary_parser.add_argument("--group-by", choices=["experiment_dir", "defense_hash"], default="experiment_dir")
+    args = parser.parse_args()
+    
+    with RunCatalog(args.db) as catalog:
+        if args.command == "index":
+            count = catalog.index_directory(args.root, include_logs=args.with_logs)
+            print(f"Indexed {count} runs into {args.db}")
+            return
+        
+        for row in catalog.summarize(args.group_by):
+            print(
+                f"{row['grp']}: {row['total_runs']} runs | "
+                f"explosion rate {row['explosion_rate']:.1%} | "
+                f"avg messages {row['avg_messages'] or 0:.1f} | "
+                f"avg runtime {row['avg_runtime_seconds'] or 0:.1f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
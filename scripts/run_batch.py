@@ -6,20 +6,149 @@ Runs multiple simulations with different configurations:
 - Multiple random seeds for statistical significance
 - Harmless vs adversarial tasks
 """
-import asyncio
+import sys
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import asyncio
+import multiprocessing.util
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Optional, Tuple
 import yaml
 import json
 from datetime import datetime
 import argparse
 
 from src.orchestrator.simulation import Simulation
+from src.llm.factory import close_llm_clients
 from src.evaluation.robustness import calculate_robustness_metrics
 from src.evaluation.cooperation import calculate_cooperation_metrics
 from src.evaluation.report import generate_evaluation_report
 
 
+def load_yaml(config_file: Path) -> Dict[str, Any]:
+    """Load a YAML configuration file."""
+    with open(config_file, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+async def run_simulation(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one simulation described by a job dict and return its outcome.
+    
+    Args:
+        job: Dict with llm_config, sim_config, defense_config, seed, output_dir
+        
+    Returns:
+        Outcome dictionary
+    """
+    simulation = Simulation(
+        llm_config=job["llm_config"],
+        sim_config=job["sim_config"],
+        defense_config=job["defense_config"],
+        seed=job["seed"],
+        output_dir=Path(job["output_dir"]),
+    )
+    
+    try:
+        outcome = await simulation.run()
+    except BaseException:
+        # A failed or cancelled run must not leave its log writer thread behind
+        simulation.logger.close()
+        raise
+    return outcome.model_dump(mode="json")
+
+
+async def run_job_isolated(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one job, converting any exception into a failed result.
+    
+    This is the failure isolation boundary: a failing run is reported
+    instead of tearing down the pool or the other runs sharing the loop.
+    """
+    start = time.time()
+    try:
+        outcome = await run_simulation(job)
+        return {"status": "ok", "outcome": outcome, "wall_seconds": time.time() - start}
+    except Exception as e:
+        return {
+            "status": "failed",
+            "error": f"{type(e).__name__}: {e}",
+            "traceback": traceback.format_exc(),
+            "wall_seconds": time.time() - start,
+        }
+
+
+# Event loop owned by each process-pool worker, reused across its runs
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _init_pool_worker() -> None:
+    """Process-pool initializer: give the worker its own event loop."""
+    global _worker_loop
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+    
+    # Forked pool workers leave through os._exit, which skips atexit hooks;
+    # multiprocessing finalizers with an exit priority still run
+    multiprocessing.util.Finalize(None, _close_worker_loop, exitpriority=10)
+
+
+def _close_worker_loop() -> None:
+    """Close the worker's pooled LLM clients, then its event loop."""
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        return
+    try:
+        _worker_loop.run_until_complete(close_llm_clients())
+    finally:
+        _worker_loop.close()
+        _worker_loop = None
+
+
+def _run_job_in_worker(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Process-pool entry point for a single run."""
+    return _worker_loop.run_until_complete(run_job_isolated(job))
+
+
+class SweepProgress:
+    """Collects results of a parallel sweep and prints live progress."""
+    
+    def __init__(self, defense_strategies: List[str], total: int):
+        self.total = total
+        self.completed = 0
+        self.start = time.time()
+        self.outcomes = {strategy: [] for strategy in defense_strategies}
+        self.failures = {strategy: [] for strategy in defense_strategies}
+    
+    @property
+    def failed(self) -> int:
+        return sum(len(f) for f in self.failures.values())
+    
+    def record(self, job: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """Record one finished run and print a progress line."""
+        strategy, seed = job["defense_strategy"], job["seed"]
+        self.completed += 1
+        
+        if result["status"] == "ok":
+            outcome = result["outcome"]
+            self.outcomes[strategy].append(outcome)
+            status = f"{outcome['termination_reason']} ({result['wall_seconds']:.1f}s)"
+        else:
+            self.failures[strategy].append({"seed": seed, "error": result["error"]})
+            status = f"FAILED: {result['error']}"
+        
+        print(
+            f"  [{self.completed}/{self.total}] {strategy} | seed={seed} -> {status} "
+            f"| failed={self.failed} | elapsed={time.time() - self.start:.1f}s"
+        )
+
+
 class BatchExperimentRunner:
     """Runs batch experiments with multiple configurations."""
     
@@ -27,6 +156,12 @@ class BatchExperimentRunner:
         self,
         config_file: Path,
         output_base_dir: Path,
+        llm_config_file: Path = Path("configs/llm.yaml"),
+        sim_config_file: Path = Path("configs/sim.yaml"),
+        defense_matrix_file: Path = Path("configs/defense_matrix.yaml"),
+        workers: int = 1,
+        concurrency: int = 1,
+        fail_fast: bool = False,
     ):
         """
         Initialize batch runner.
@@ -34,12 +169,61 @@ class BatchExperimentRunner:
         Args:
             config_file: Path to experiments.yaml config
             output_base_dir: Base directory for all experiment outputs
+            llm_config_file: Path to LLM config
+            sim_config_file: Path to simulation config
+            defense_matrix_file: Path to defense strategy matrix
+            workers: Number of worker processes (1 = run in-process)
+            concurrency: Simulations multiplexed on one event loop when running in-process
+            fail_fast: Abort the remaining runs after the first failed run
         """
         self.config_file = config_file
         self.output_base_dir = output_base_dir
+        self.workers = workers
+        self.concurrency = concurrency
+        self.fail_fast = fail_fast
         
-        with open(config_file, "r", encoding="utf-8") as f:
-            self.config = yaml.safe_load(f)
+        self.config = load_yaml(config_file)
+        self.llm_config = load_yaml(llm_config_file)
+        self.sim_config = load_yaml(sim_config_file)
+        self.defense_matrix = load_yaml(defense_matrix_file)
+    
+    def get_defense_config(self, defense_strategy: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a strategy in the defense matrix.
+        
+        Args:
+            defense_strategy: Defense strategy name (e.g. VAX_ACTIVE)
+            
+        Returns:
+            Defense configuration dict, or None for no defense
+        """
+        for strategy in self.defense_matrix.get("strategies", []):
+            if strategy["name"] == defense_strategy:
+                if not strategy.get("instruction_defense") and not strategy.get("vaccine_defense"):
+                    return None
+                return {
+                    "instruction_defense": strategy.get("instruction_defense"),
+                    "vaccine_defense": strategy.get("vaccine_defense"),
+                }
+        
+        raise ValueError(f"Unknown defense strategy: {defense_strategy}")
+    
+    def build_job(
+        self,
+        defense_strategy: str,
+        seed: int,
+        task_file: Path,
+        output_dir: Path,
+    ) -> Dict[str, Any]:
+        """Build the picklable description of a single run."""
+        return {
+            "defense_strategy": defense_strategy,
+            "llm_config": self.llm_config,
+            "sim_config": {**self.sim_config, "task_file": str(task_file)},
+            "defense_config": self.get_defense_config(defense_strategy),
+            "seed": seed,
+            "output_dir": str(output_dir),
+        }
     
     async def run_single_experiment(
         self,
@@ -62,19 +246,8 @@ class BatchExperimentRunner:
         """
         print(f"  Running: {defense_strategy} | seed={seed}")
         
-        simulation = Simulation(
-            defense_strategy=defense_strategy,
-            task_file=task_file,
-            output_dir=output_dir,
-            seed=seed,
-        )
-        
-        await simulation.run()
-        
-        # Load and return outcome
-        outcome_file = output_dir / "outcomes.json"
-        with open(outcome_file, "r", encoding="utf-8") as f:
-            return json.load(f)
+        job = self.build_job(defense_strategy, seed, task_file, output_dir)
+        return await run_simulation(job)
     
     async def run_defense_strategy_batch(
         self,
@@ -104,17 +277,42 @@ class BatchExperimentRunner:
         
         # Run all seeds
         outcomes = []
+        failures = []
         for seed in seeds:
             output_dir = exp_dir / f"seed_{seed}"
-            outcome = await self.run_single_experiment(
-                defense_strategy=defense_strategy,
-                seed=seed,
-                task_file=task_file,
-                output_dir=output_dir,
-            )
+            try:
+                outcome = await self.run_single_experiment(
+                    defense_strategy=defense_strategy,
+                    seed=seed,
+                    task_file=task_file,
+                    output_dir=output_dir,
+                )
+            except Exception as e:
+                if self.fail_fast:
+                    raise
+                print(f"  ✗ {defense_strategy} | seed={seed} failed: {e}")
+                failures.append({"seed": seed, "error": f"{type(e).__name__}: {e}"})
+                continue
             outcomes.append(outcome)
         
-        # Calculate and save summary metrics
+        self.write_strategy_summary(defense_strategy, seeds, task_file, exp_dir, outcomes, failures)
+        
+        return exp_dir
+    
+    def write_strategy_summary(
+        self,
+        defense_strategy: str,
+        seeds: List[int],
+        task_file: Path,
+        exp_dir: Path,
+        outcomes: List[Dict[str, Any]],
+        failures: List[Dict[str, Any]],
+    ) -> None:
+        """
+        Calculate and save summary metrics for one defense strategy.
+        
+        Failed runs are listed separately and excluded from the metrics.
+        """
         robustness = calculate_robustness_metrics(outcomes)
         cooperation = calculate_cooperation_metrics(outcomes)
         
@@ -125,6 +323,7 @@ class BatchExperimentRunner:
             "timestamp": datetime.now().isoformat(),
             "robustness": robustness,
             "cooperation": cooperation,
+            "failed_runs": failures,
         }
         
         summary_file = exp_dir / "summary.json"
@@ -134,9 +333,132 @@ class BatchExperimentRunner:
         print(f"\n✓ {defense_strategy} complete:")
         print(f"  Explosion rate: {robustness['explosion_rate']:.1%}")
         print(f"  Success rate: {robustness['success_rate']:.1%}")
+        if failures:
+            print(f"  Failed runs: {len(failures)}")
         print(f"  Summary: {summary_file}\n")
+    
+    def prepare_sweep(
+        self,
+        defense_strategies: List[str],
+        seeds: List[int],
+        task_file: Path,
+    ) -> Tuple[Dict[str, Path], List[Dict[str, Any]]]:
+        """
+        Create experiment directories and build one job per (strategy, seed).
         
-        return exp_dir
+        Returns:
+            Tuple of (strategy -> experiment directory, jobs)
+        """
+        experiment_dirs = {}
+        jobs = []
+        for strategy in defense_strategies:
+            exp_dir = self.output_base_dir / strategy.lower()
+            exp_dir.mkdir(parents=True, exist_ok=True)
+            experiment_dirs[strategy] = exp_dir
+            for seed in seeds:
+                jobs.append(self.build_job(strategy, seed, task_file, exp_dir / f"seed_{seed}"))
+        
+        return experiment_dirs, jobs
+    
+    def finish_sweep(
+        self,
+        progress: SweepProgress,
+        experiment_dirs: Dict[str, Path],
+        seeds: List[int],
+        task_file: Path,
+    ) -> Dict[str, Path]:
+        """Write per-strategy summaries for a parallel sweep."""
+        for strategy, exp_dir in experiment_dirs.items():
+            outcomes = progress.outcomes[strategy]
+            # Keep seed order stable regardless of completion order
+            outcomes.sort(key=lambda o: seeds.index(o["config_snapshot"]["seed"]))
+            self.write_strategy_summary(
+                strategy, seeds, task_file, exp_dir, outcomes, progress.failures[strategy],
+            )
+        
+        return experiment_dirs
+    
+    def run_in_process_pool(
+        self,
+        defense_strategies: List[str],
+        seeds: List[int],
+        task_file: Path,
+    ) -> Dict[str, Path]:
+        """
+        Fan all (strategy, seed) runs out across a process pool.
+        
+        Each worker process owns one event loop and writes to its own run
+        directory. A run that raises is recorded as failed and the sweep
+        continues, unless fail_fast is set.
+        
+        Returns:
+            Dict mapping defense strategy to experiment directory
+        """
+        experiment_dirs, jobs = self.prepare_sweep(defense_strategies, seeds, task_file)
+        progress = SweepProgress(defense_strategies, len(jobs))
+        
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_pool_worker) as pool:
+            futures = {pool.submit(_run_job_in_worker, job): job for job in jobs}
+            
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    result = {"status": "failed", "error": f"Worker process died: {e}"}
+                
+                progress.record(job, result)
+                
+                if result["status"] != "ok" and self.fail_fast:
+                    for pending in futures:
+                        pending.cancel()
+                    raise RuntimeError(
+                        f"Run {job['defense_strategy']} seed={job['seed']} failed: {result['error']}"
+                    )
+        
+        return self.finish_sweep(progress, experiment_dirs, seeds, task_file)
+    
+    async def run_concurrently(
+        self,
+        defense_strategies: List[str],
+        seeds: List[int],
+        task_file: Path,
+    ) -> Dict[str, Path]:
+        """
+        Multiplex up to `concurrency` simulations on the current event loop.
+        
+        Simulations spend most of their time awaiting LLM I/O, so running
+        several in one loop keeps the provider busy; the per-provider rate
+        limiter (see src/llm/rate_limit.py) keeps the combined request rate
+        within quota.
+        
+        Returns:
+            Dict mapping defense strategy to experiment directory
+        """
+        experiment_dirs, jobs = self.prepare_sweep(defense_strategies, seeds, task_file)
+        progress = SweepProgress(defense_strategies, len(jobs))
+        slots = asyncio.Semaphore(self.concurrency)
+        
+        async def run_with_slot(job: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+            async with slots:
+                return job, await run_job_isolated(job)
+        
+        tasks = [asyncio.create_task(run_with_slot(job)) for job in jobs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                job, result = await next_done
+                progress.record(job, result)
+                
+                if result["status"] != "ok" and self.fail_fast:
+                    raise RuntimeError(
+                        f"Run {job['defense_strategy']} seed={job['seed']} failed: {result['error']}"
+                    )
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        return self.finish_sweep(progress, experiment_dirs, seeds, task_file)
     
     async def run_all_experiments(self) -> Dict[str, Path]:
         """
@@ -145,8 +467,10 @@ class BatchExperimentRunner:
         Returns:
             Dict mapping defense strategy to experiment directory
         """
-        experiments_config = self.config.get("experiments", {})
-        defense_strategies = experiments_config.get("defense_strategies", ["NONE"])
+        experiments_config = self.config.get("experiments", self.config)
+        defense_strategies = experiments_config.get("defense_strategies") or [
+            strategy["name"] for strategy in self.defense_matrix.get("strategies", [])
+        ]
         seeds = experiments_config.get("seeds", [42])
         task_file = Path(experiments_config.get("task_file", "data/tasks/lab_task_mof.json"))
         
@@ -156,9 +480,15 @@ class BatchExperimentRunner:
         print(f"Strategies: {', '.join(defense_strategies)}")
         print(f"Seeds per strategy: {len(seeds)}")
         print(f"Total runs: {len(defense_strategies) * len(seeds)}")
+        print(f"Workers: {self.workers} | Concurrency: {self.concurrency}")
         print(f"Output: {self.output_base_dir}")
         print(f"{'='*60}\n")
         
+        if self.workers > 1:
+            return self.run_in_process_pool(defense_strategies, seeds, task_file)
+        if self.concurrency > 1:
+            return await self.run_concurrently(defense_strategies, seeds, task_file)
+        
         experiment_dirs = {}
         
         for strategy in defense_strategies:
@@ -186,17 +516,20 @@ class BatchExperimentRunner:
         report_dir = self.output_base_dir / "reports"
         report_dir.mkdir(exist_ok=True)
         
+        # Outcomes come from the run catalogue when runs were indexed
+        catalog_db = self.sim_config.get("catalog_db")
+        
         # CSV report
         csv_file = report_dir / "results.csv"
-        generate_evaluation_report(experiment_dirs, csv_file, format="csv")
+        generate_evaluation_report(experiment_dirs, csv_file, format="csv", catalog_db=catalog_db)
         
         # Markdown report
         md_file = report_dir / "results.md"
-        generate_evaluation_report(experiment_dirs, md_file, format="markdown")
+        generate_evaluation_report(experiment_dirs, md_file, format="markdown", catalog_db=catalog_db)
         
         # JSON report
         json_file = report_dir / "results.json"
-        generate_evaluation_report(experiment_dirs, json_file, format="json")
+        generate_evaluation_report(experiment_dirs, json_file, format="json", catalog_db=catalog_db)
         
         print(f"\n✓ All reports generated in: {report_dir}")
 
@@ -216,8 +549,27 @@ async def main():
         default=Path("outputs/batch"),
         help="Output directory for all experiments",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes to run simulations in parallel (1 = sequential)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of simulations to run concurrently on one event loop (in-process mode)",
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Abort the sweep on the first failed run instead of recording it and continuing",
+    )
     
     args = parser.parse_args()
+    if args.workers > 1 and args.concurrency > 1:
+        parser.error("--workers and --concurrency cannot be combined")
     
     # Create output directory with timestamp
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -228,9 +580,16 @@ async def main():
     runner = BatchExperimentRunner(
         config_file=args.config,
         output_base_dir=output_dir,
+        workers=args.workers,
+        concurrency=args.concurrency,
+        fail_fast=args.fail_fast,
     )
     
-    experiment_dirs = await runner.run_all_experiments()
+    try:
+        experiment_dirs = await runner.run_all_experiments()
+    finally:
+        # Close pooled LLM connections opened on this loop
+        await close_llm_clients()
     runner.generate_final_report(experiment_dirs)
     
     print(f"\n{'='*60}")
@@ -27,11 +27,13 @@ async def main():
     parser.add_argument("--defense", type=str, default="NONE", 
                        help="Defense mode: NONE, INSTR_PASSIVE, INSTR_ACTIVE, VAX_PASSIVE, VAX_ACTIVE")
     parser.add_argument("--output-dir", type=str, default=None, help="Output directory")
+    parser.add_argument("--llm-config", type=str, default="configs/llm.yaml",
+                       help="LLM config file (e.g. configs/llm_mock.yaml for offline runs)")
     
     args = parser.parse_args()
     
     # Load configurations
-    llm_config = load_config("configs/llm.yaml")
+    llm_config = load_config(args.llm_config)
     sim_config = load_config("configs/sim.yaml")
     
     # Setup defense config
@@ -3,9 +3,16 @@
 数据加载和处理工具模块
 """
 import json
+import sys
 from pathlib import Path
 from typing import List, Dict, Any, Tuple
 
+# 添加项目根目录到路径（复用 src 中的日志读取逻辑）
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.common.log_store import load_run_log
+from src.evaluation.catalog import DEFAULT_CATALOG_DB, RunCatalog
+
 
 def load_experiment_results(run_dir: Path) -> Tuple[Dict, List[Dict], List[Dict]]:
     """
@@ -18,36 +25,27 @@ def load_experiment_results(run_dir: Path) -> Tuple[Dict, List[Dict], List[Dict]
         tuple: (outcomes, events, messages) 数据
     """
     outcomes_file = run_dir / "outcomes.json"
-    events_file = run_dir / "events.jsonl"
-    messages_file = run_dir / "messages.jsonl"
     
     # 加载outcomes
     with open(outcomes_file) as f:
         outcomes = json.load(f)
     
-    # 加载events
-    events = []
-    if events_file.exists():
-        with open(events_file) as f:
-            for line in f:
-                events.append(json.loads(line))
+    # 加载events（支持 events.jsonl 与压缩的 events.jsonl.zst）
+    events = load_run_log(run_dir, "events")
     
     # 加载messages
-    messages = []
-    if messages_file.exists():
-        with open(messages_file) as f:
-            for line in f:
-                messages.append(json.loads(line))
+    messages = load_run_log(run_dir, "messages")
     
     return outcomes, events, messages
 
 
-def find_latest_run(runs_dir: Path = None) -> Path:
+def find_latest_run(runs_dir: Path = None, catalog_db: Path = DEFAULT_CATALOG_DB) -> Path:
     """
-    查找最新的运行结果目录
+    查找最新的运行结果目录（优先查询运行目录索引库，否则按修改时间扫描目录）
     
     Args:
         runs_dir: 运行结果根目录，默认为 outputs/runs
+        catalog_db: 运行目录索引库 (SQLite) 路径
     
     Returns:
         Path: 最新运行结果的目录路径
@@ -58,6 +56,12 @@ def find_latest_run(runs_dir: Path = None) -> Path:
     if runs_dir is None:
         runs_dir = Path('outputs/runs')
     
+    if catalog_db is not None and Path(catalog_db).exists():
+        with RunCatalog(catalog_db) as catalog:
+            latest = catalog.latest_run(runs_dir)
+        if latest is not None and latest.is_dir():
+            return latest
+    
     run_dirs = sorted(runs_dir.glob('*'), key=lambda x: x.stat().st_mtime, reverse=True)
     if not run_dirs:
         raise FileNotFoundError("未找到运行结果")
@@ -2,7 +2,6 @@
 """
 Visualize experiment results
 """
-import json
 import argparse
 from pathlib import Path
 from datetime import datetime
@@ -10,31 +9,11 @@ import matplotlib.pyplot as plt
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend
 
+from visualization.data_loader import load_experiment_results
+
 def load_results(run_dir: Path):
-    """Load experiment results"""
-    outcomes_file = run_dir / "outcomes.json"
-    events_file = run_dir / "events.jsonl"
-    messages_file = run_dir / "messages.jsonl"
-    
-    # Load outcomes
-    with open(outcomes_file) as f:
-        outcomes = json.load(f)
-    
-    # Load events
-    events = []
-    if events_file.exists():
-        with open(events_file) as f:
-            for line in f:
-                events.append(json.loads(line))
-    
-    # Load messages
-    messages = []
-    if messages_file.exists():
-        with open(messages_file) as f:
-            for line in f:
-                messages.append(json.loads(line))
-    
-    return outcomes, events, messages
+    """Load experiment results (plain or zstd-compressed logs)"""
+    return load_experiment_results(run_dir)
 
 def visualize_timeline(events, messages, output_path: Path):
     """Create timeline visualization"""
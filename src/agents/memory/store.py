@@ -1,24 +1,193 @@
 """Memory store for agent's conversation history"""
 
-from typing import List, Optional
+from typing import Callable, List, Optional, Union
 from collections import deque
+from itertools import islice
+from langchain_core.messages import BaseMessage
 from src.common.types import Message, MessageRole
+from src.llm.prompts import to_langchain_message
+from src.llm.tokens import count_message_tokens
+
+
+MEMORY_STRATEGIES = ("recent", "summary", "smart")
+
+# Longest excerpt of one message kept in the rolling summary
+SUMMARY_LINE_CHARS = 160
+
+# Default cap on rolling summary lines; past it the oldest lines are merged
+MAX_SUMMARY_LINES = 8
+
+
+def summarize_message(message: Message, max_chars: int = SUMMARY_LINE_CHARS) -> str:
+    """
+    One-line extractive digest of a message: its speaker and first characters
+    
+    Args:
+        message: Evicted message
+        max_chars: Maximum length of the excerpt
+    
+    Returns:
+        "- speaker: excerpt" line
+    """
+    text = " ".join(message.content.split())
+    if len(text) > max_chars:
+        text = text[:max_chars - 3].rstrip() + "..."
+    speaker = message.sender or message.role.value
+    return f"- {speaker}: {text}"
+
+
+def extractive_summary(messages: List[Message]) -> List[str]:
+    """Default summariser: one truncated excerpt per evicted message"""
+    return [summarize_message(message) for message in messages]
+
+
+def condensed_summary(messages: List[Message]) -> List[str]:
+    """
+    Summariser condensing a whole batch into one line: who spoke how often,
+    and an excerpt of the batch's last message
+    """
+    counts = {}
+    for message in messages:
+        speaker = message.sender or message.role.value
+        counts[speaker] = counts.get(speaker, 0) + 1
+    speakers = ", ".join(f"{speaker} x{count}" if count > 1 else speaker for speaker, count in counts.items())
+    return [f"- {speakers}; last {summarize_message(messages[-1])[2:]}"]
+
+
+# Summarisers selectable by name (memory_summarizer in configs/sim.yaml)
+SUMMARIZERS = {
+    "extractive": extractive_summary,
+    "condensed": condensed_summary,
+}
+
+
+def merge_summary_lines(older: str, newer: str, max_chars: int = SUMMARY_LINE_CHARS) -> str:
+    """
+    Merge two summary lines into one of at most max_chars
+    
+    Each line keeps half the room, so the oldest line stays bounded however
+    many newer lines are merged into it.
+    
+    Args:
+        older: Older summary line
+        newer: Line following it
+        max_chars: Maximum length of the merged line
+    
+    Returns:
+        "- older | newer" line
+    """
+    half = (max_chars - 5) // 2
+    
+    def shorten(line: str) -> str:
+        text = line[2:] if line.startswith("- ") else line
+        return text if len(text) <= half else text[:half - 3].rstrip() + "..."
+    
+    return f"- {shorten(older)} | {shorten(newer)}"
 
 
 class MemoryStore:
     """
     Store and manage an agent's conversation memory
+    
+    Alongside the messages, a parallel ring holds each message's LangChain
+    form (None for roles the LLM never sees), converted once on insertion so
+    the prompt for every turn is assembled by reference.
+    
+    Memory is laid out as pinned messages (vaccine examples, never evicted),
+    then the rolling history. The history is bounded by max_length messages
+    and, if max_tokens is set, by a token budget covering everything the
+    LLM sees. Once a bound is exceeded, the strategy picks what to evict:
+    - recent: drop the oldest messages
+    - summary: drop the oldest messages, folding them into a rolling
+      summary placed before the history
+    - smart: like summary, but the first max_length // 4 messages (the task
+      brief and first replies) stay as anchors and the middle is evicted
+    
+    The summary is written by a pluggable summariser that turns a batch of
+    evicted messages into summary lines, chosen by name from SUMMARIZERS or
+    passed as a function (e.g. one calling a synchronous LLM). The default,
+    extractive_summary, keeps a truncated excerpt of each message;
+    condensed_summary writes one line per batch. Either way the summary stays
+    bounded: past max_summary_lines lines its oldest lines are merged into
+    one shorter line, and past a quarter of the token budget the oldest
+    lines are dropped.
     """
     
-    def __init__(self, max_length: int = 50):
+    def __init__(
+        self,
+        max_length: int = 50,
+        max_tokens: Optional[int] = None,
+        strategy: str = "recent",
+        token_counter: Optional[Callable[[Optional[str]], int]] = None,
+        layout: str = "default",
+        summarizer: Union[str, Callable[[List[Message]], List[str]], None] = None,
+        max_summary_lines: int = MAX_SUMMARY_LINES
+    ):
         """
         Initialize memory store
         
         Args:
-            max_length: Maximum number of messages to store
+            max_length: Maximum number of (unpinned) messages to store
+            max_tokens: Optional token budget for pinned messages, summary and
+                history together (the most recent message is always kept)
+            strategy: Eviction strategy (recent, summary, smart)
+            token_counter: Tokens of one message's content, framing included
+                (defaults to tiktoken with a characters / 4 fallback)
+            layout: Prompt layout the LangChain forms are built for (see
+                src.llm.prompts.PROMPT_LAYOUTS)
+            summarizer: Summary lines for a batch of evicted USER/ASSISTANT
+                messages, oldest first, or the name of one in SUMMARIZERS
+                (defaults to extractive_summary)
+            max_summary_lines: Lines the rolling summary keeps before merging
+                its oldest ones
         """
+        if strategy not in MEMORY_STRATEGIES:
+            raise ValueError(f"Unknown memory strategy: {strategy}")
+        if isinstance(summarizer, str):
+            if summarizer not in SUMMARIZERS:
+                raise ValueError(f"Unknown memory summarizer: {summarizer}")
+            summarizer = SUMMARIZERS[summarizer]
+        
         self.max_length = max_length
-        self.messages: deque = deque(maxlen=max_length)
+        self.max_tokens = max_tokens
+        self.strategy = strategy
+        self.layout = layout
+        self.token_counter = token_counter or count_message_tokens
+        self.summarizer = summarizer or extractive_summary
+        self.max_summary_lines = max(1, max_summary_lines)
+        self.keep_first = max_length // 4 if strategy == "smart" else 0
+        
+        # Rolling history: messages, their LangChain form and token counts
+        self.messages: deque = deque()
+        self.lc_messages: deque = deque()
+        self.token_counts: deque = deque()
+        
+        self.pinned: List[Message] = []
+        self.pinned_lc: List[BaseMessage] = []
+        self.pinned_tokens = 0
+        
+        # Rolling summary of evicted messages, rebuilt only when it changes
+        self.summary_lines: deque = deque()
+        self.summary_line_tokens: deque = deque()
+        self.summary_lines_total = 0
+        self.summary_message: Optional[Message] = None
+        self.summary_lc: Optional[BaseMessage] = None
+        self.summary_tokens = 0
+        self.max_summary_tokens = max_tokens // 4 if max_tokens else None
+        
+        self.history_tokens = 0
+        self.evicted_count = 0
+    
+    def _count(self, lc_message: Optional[BaseMessage]) -> int:
+        """Tokens a converted message adds (0 when counting is off or it is never sent)"""
+        if self.max_tokens is None or lc_message is None:
+            return 0
+        return self.token_counter(lc_message.content)
+    
+    @property
+    def total_tokens(self) -> int:
+        """Tokens of everything memory contributes to the prompt (0 without a budget)"""
+        return self.pinned_tokens + self.summary_tokens + self.history_tokens
     
     def append(self, message: Message) -> None:
         """
@@ -27,28 +196,140 @@ class MemoryStore:
         Args:
             message: Message to append
         """
+        lc_message = to_langchain_message(message, self.layout)
+        tokens = self._count(lc_message)
         self.messages.append(message)
+        self.lc_messages.append(lc_message)
+        self.token_counts.append(tokens)
+        self.history_tokens += tokens
+        self._enforce_limits()
     
     def prepend(self, messages: List[Message]) -> None:
         """
         Prepend messages to memory (used for vaccine injection)
         
+        Prepended messages are pinned: they stay ahead of the history and are
+        never evicted, though they count towards the token budget.
+        
         Args:
             messages: List of messages to prepend
         """
-        # Create new deque with prepended messages
-        new_messages = deque(messages, maxlen=self.max_length)
-        new_messages.extend(self.messages)
-        self.messages = new_messages
+        lc_messages = [to_langchain_message(m, self.layout) for m in messages]
+        self.pinned = list(messages) + self.pinned
+        self.pinned_lc = [m for m in lc_messages if m is not None] + self.pinned_lc
+        self.pinned_tokens += sum(self._count(m) for m in lc_messages)
+        self._enforce_limits()
+    
+    def _over_limit(self) -> bool:
+        # Anchors and the most recent message are never evicted
+        if len(self.messages) <= self.keep_first + 1:
+            return False
+        if len(self.messages) > self.max_length:
+            return True
+        return self.max_tokens is not None and self.total_tokens > self.max_tokens
+    
+    def _evict_one(self) -> Message:
+        """Remove the oldest non-anchor message from the history"""
+        if self.keep_first:
+            index = self.keep_first
+            message = self.messages[index]
+            del self.messages[index]
+            del self.lc_messages[index]
+            tokens = self.token_counts[index]
+            del self.token_counts[index]
+        else:
+            message = self.messages.popleft()
+            self.lc_messages.popleft()
+            tokens = self.token_counts.popleft()
+        self.history_tokens -= tokens
+        self.evicted_count += 1
+        return message
+    
+    def _enforce_limits(self) -> None:
+        """Evict until memory fits max_length and the token budget"""
+        evicted = []
+        while self._over_limit():
+            evicted.append(self._evict_one())
+        
+        if evicted and self.strategy != "recent":
+            self._fold_into_summary(evicted)
+            # A grown summary can push memory back over budget
+            while self._over_limit():
+                self._fold_into_summary([self._evict_one()])
+    
+    def _fold_into_summary(self, evicted: List[Message]) -> None:
+        """Add summary lines for evicted messages to the rolling summary"""
+        # Only what the LLM saw is worth summarising
+        seen = [m for m in evicted if m.role in (MessageRole.USER, MessageRole.ASSISTANT)]
+        for line in (self.summarizer(seen) if seen else ()):
+            self._push_summary_line(line)
+        
+        # Bound the summary itself: merge its oldest lines past the line cap,
+        # then drop the oldest ones past its share of the token budget
+        while len(self.summary_lines) > self.max_summary_lines:
+            older = self._pop_summary_line()
+            self._push_summary_line(merge_summary_lines(older, self._pop_summary_line()), oldest=True)
+        while self.summary_lines and (
+            self.max_summary_tokens is not None and self.summary_lines_total > self.max_summary_tokens
+        ):
+            self._pop_summary_line()
+        
+        if not self.summary_lines:
+            self.summary_message = self.summary_lc = None
+            self.summary_tokens = 0
+            return
+        
+        self.summary_message = Message(
+            role=MessageRole.USER,
+            content="Summary of earlier conversation:\n" + "\n".join(self.summary_lines),
+            metadata={"source": "summary"}
+        )
+        self.summary_lc = to_langchain_message(self.summary_message, self.layout)
+        self.summary_tokens = self._count(self.summary_lc)
+    
+    def _push_summary_line(self, line: str, oldest: bool = False) -> None:
+        """Add a line at the end (or start) of the rolling summary"""
+        tokens = self.token_counter(line) if self.max_tokens is not None else 0
+        if oldest:
+            self.summary_lines.appendleft(line)
+            self.summary_line_tokens.appendleft(tokens)
+        else:
+            self.summary_lines.append(line)
+            self.summary_line_tokens.append(tokens)
+        self.summary_lines_total += tokens
+    
+    def _pop_summary_line(self) -> str:
+        """Remove and return the oldest summary line"""
+        self.summary_lines_total -= self.summary_line_tokens.popleft()
+        return self.summary_lines.popleft()
     
     def get_all(self) -> List[Message]:
         """
         Get all messages in memory
         
         Returns:
-            List of all messages
+            Pinned messages, anchors (smart), the rolling summary if any, and
+            the rest of the history
         """
-        return list(self.messages)
+        history = list(self.messages)
+        if self.summary_message is not None:
+            history.insert(self.keep_first, self.summary_message)
+        return self.pinned + history
+    
+    def get_langchain_messages(self) -> List[BaseMessage]:
+        """
+        Get the LangChain form of memory, in get_all() order
+        
+        The returned objects are shared with the store and must not be mutated.
+        
+        Returns:
+            HumanMessage/AIMessage list (SYSTEM and TOOL messages omitted)
+        """
+        history = [m for m in self.lc_messages if m is not None]
+        if self.summary_lc is not None:
+            anchors = sum(m is not None for m in islice(self.lc_messages, self.keep_first))
+            history.insert(anchors, self.summary_lc)
+        return self.pinned_lc + history
     
     def get_recent(self, n: int) -> List[Message]:
         """
@@ -56,19 +337,28 @@ class MemoryStore:
         
         Args:
             n: Number of recent messages to retrieve
-            
+        
         Returns:
             List of recent messages
         """
         return list(self.messages)[-n:] if n > 0 else []
     
     def clear(self) -> None:
-        """Clear all memory"""
+        """Clear all memory (pinned messages and summary included)"""
         self.messages.clear()
+        self.lc_messages.clear()
+        self.token_counts.clear()
+        self.history_tokens = 0
+        self.pinned, self.pinned_lc, self.pinned_tokens = [], [], 0
+        self.summary_lines.clear()
+        self.summary_line_tokens.clear()
+        self.summary_lines_total = 0
+        self.summary_message = self.summary_lc = None
+        self.summary_tokens = 0
     
     def __len__(self) -> int:
         """Return number of messages in memory"""
-        return len(self.messages)
+        return len(self.pinned) + len(self.messages)
     
     def __repr__(self) -> str:
-        return f"MemoryStore(length={len(self.messages)}, max_length={self.max_length})"
+        return f"MemoryStore(length={len(self)}, max_length={self.max_length})"
@@ -1,18 +1,26 @@
 """Factory for creating agent instances with proper configuration"""
 
+import copy
 import yaml
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 from src.agents.runtime.agent_runtime import AgentRuntime
 from src.agents.memory.vaccines import inject_vaccine
+from src.common.constants import AGENT_NAMES
 from src.common.logging import SimulationLogger
 from src.llm.factory import create_llm
+from src.llm.rate_limit import get_rate_limiter
+from src.llm.response_cache import create_response_cache_run, wrap_with_response_cache
 from src.tools.messaging import MessagingTool, create_send_message_function
 from src.tools.run_code import CodeExecutionTool, create_run_code_function
 from src.tools.langchain_adapters import create_agent_tools
 
 
+# Parsed role configs by path, tagged with the file's mtime so edits are picked up
+_ROLE_CONFIG_CACHE: Dict[Path, Tuple[int, Dict[str, Any]]] = {}
+
+
 class AgentFactory:
     """Factory for creating configured agent instances"""
     
@@ -21,7 +29,9 @@ class AgentFactory:
         llm_config: Dict[str, Any],
         logger: SimulationLogger,
         step_counter: Dict[str, int],
-        lifecycle_manager=None
+        lifecycle_manager=None,
+        memory_config: Optional[Dict[str, Any]] = None,
+        response_cache_scope: Optional[Dict[str, Any]] = None
     ):
         """
         Initialize agent factory
@@ -31,11 +41,20 @@ class AgentFactory:
             logger: Simulation logger
             step_counter: Shared step counter
             lifecycle_manager: Optional lifecycle manager for explosion reporting
+            memory_config: Optional MemoryStore settings applied to every agent
+            response_cache_scope: What identifies the run (seed, defense...)
+                so the response cache can trace and replay it call by call
         """
         self.llm_config = llm_config
         self.logger = logger
         self.step_counter = step_counter
         self.lifecycle_manager = lifecycle_manager
+        self.memory_config = memory_config
+        
+        # Call trace shared by all agents of the run
+        self.response_cache_run = None
+        if response_cache_scope is not None:
+            self.response_cache_run = create_response_cache_run(llm_config, response_cache_scope)
         
         # Create shared tools
         self.messaging_tool = None  # Will be set after agents are created
@@ -51,6 +70,9 @@ class AgentFactory:
         """
         Load role configuration from YAML file
         
+        Each file is parsed once per process (and again only if it changes);
+        callers get their own copy of the cached config.
+        
         Args:
             agent_name: Name of the agent
             
@@ -59,17 +81,25 @@ class AgentFactory:
         """
         config_file = self.roles_dir / f"{agent_name.lower()}.yaml"
         
-        if not config_file.exists():
+        try:
+            mtime_ns = config_file.stat().st_mtime_ns
+        except FileNotFoundError:
             raise FileNotFoundError(f"Role config not found: {config_file}")
         
-        with open(config_file, 'r') as f:
-            return yaml.safe_load(f)
+        cached = _ROLE_CONFIG_CACHE.get(config_file)
+        if cached is None or cached[0] != mtime_ns:
+            with open(config_file, 'r') as f:
+                cached = (mtime_ns, yaml.safe_load(f))
+            _ROLE_CONFIG_CACHE[config_file] = cached
+        
+        return copy.deepcopy(cached[1])
     
     def create_agent(
         self,
         agent_name: str,
         agents_registry: Dict[str, AgentRuntime],
-        defense_config: Optional[Dict[str, Any]] = None
+        defense_config: Optional[Dict[str, Any]] = None,
+        role: Optional[str] = None
     ) -> AgentRuntime:
         """
         Create a single agent instance
@@ -78,20 +108,30 @@ class AgentFactory:
             agent_name: Name of the agent
             agents_registry: Registry of all agents (for messaging)
             defense_config: Optional defense configuration
+            role: Role config to use (defaults to the agent's own name), so
+                extra agents can reuse an existing role
             
         Returns:
             Configured AgentRuntime instance
         """
+        role = role or agent_name
+        
         # Load role configuration
-        role_config = self.load_role_config(agent_name)
-        
-        # Create LLM instance
-        llm = create_llm(
-            provider=self.llm_config.get("provider", "openai"),
-            model=self.llm_config.get("model", "gpt-4"),
-            temperature=self.llm_config.get("temperature", 0.7),
-            max_tokens=self.llm_config.get("max_tokens", 2000)
-        )
+        role_config = self.load_role_config(role)
+        
+        # Get LLM instance (shared across agents with the same settings);
+        # pure replay needs no client since every response comes from the cache
+        llm = None
+        if (self.llm_config.get("response_cache") or {}).get("mode") != "replay":
+            llm = create_llm(
+                provider=self.llm_config.get("provider", "openai"),
+                model=self.llm_config.get("model", "gpt-4"),
+                temperature=self.llm_config.get("temperature", 0.7),
+                max_tokens=self.llm_config.get("max_tokens", 2000),
+                http_pool=self.llm_config.get("http_pool"),
+                mock_config=self.llm_config.get("mock")
+            )
+        llm = wrap_with_response_cache(llm, self.llm_config, agent=agent_name, run=self.response_cache_run)
         
         # Create messaging function for this agent
         if not self.messaging_tool:
@@ -113,9 +153,9 @@ class AgentFactory:
             )
         
         # Determine agent role type
-        if agent_name == "Atlas":
+        if role.lower() == "atlas":
             role_type = "manager"
-        elif agent_name == "Deng":
+        elif role.lower() == "deng":
             role_type = "executor"
         else:
             role_type = "researcher"
@@ -134,7 +174,20 @@ class AgentFactory:
             llm=llm,
             tools=tools,
             logger=self.logger,
-            defense_config=defense_config
+            defense_config=defense_config,
+            step_counter=self.step_counter,
+            llm_limiter=get_rate_limiter(
+                self.llm_config.get("provider", "openai"),
+                self.llm_config.get("rate_limit")
+            ),
+            memory_config=self.memory_config,
+            prompt_layout=self.llm_config.get("prompt_layout", "default"),
+            retry_config={
+                "max_retries": self.llm_config.get("max_retries", 0),
+                "retry_delay": self.llm_config.get("retry_delay", 1.0)
+            },
+            pricing=self.llm_config.get("pricing"),
+            response_cache_run=self.response_cache_run
         )
         
         # Apply vaccine defense if configured
@@ -150,25 +203,33 @@ class AgentFactory:
     
     def create_all_agents(
         self,
-        defense_config: Optional[Dict[str, Any]] = None
+        defense_config: Optional[Dict[str, Any]] = None,
+        agent_specs: Optional[List[Any]] = None
     ) -> Dict[str, AgentRuntime]:
         """
-        Create all 7 agents
+        Create all agents (the 7 lab agents by default)
         
         Args:
             defense_config: Optional defense configuration to apply to all agents
+            agent_specs: Optional list of agents to create; each entry is a
+                name or a dict with name and role (e.g. {"name": "Bohr2", "role": "bohr"})
             
         Returns:
             Dictionary mapping agent names to AgentRuntime instances
         """
-        agent_names = ["Atlas", "Bohr", "Curie", "Edison", "Faraday", "Gauss", "Deng"]
+        if agent_specs is None:
+            agent_specs = list(AGENT_NAMES)
         
         # First pass: create registry structure
         agents_registry: Dict[str, AgentRuntime] = {}
         
         # Second pass: create agents
-        for name in agent_names:
-            agent = self.create_agent(name, agents_registry, defense_config)
+        for spec in agent_specs:
+            if isinstance(spec, dict):
+                name, role = spec["name"], spec.get("role")
+            else:
+                name, role = spec, None
+            agent = self.create_agent(name, agents_registry, defense_config, role=role)
             agents_registry[name] = agent
             self.logger.info(f"Created agent: {name}")
         
@@ -1,8 +1,10 @@
 """Core agent runtime - the heart of each agent"""
 
 import asyncio
-from typing import Dict, Any, Optional, List
-from pathlib import Path
+import contextlib
+import time
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Union
 
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
@@ -12,8 +14,57 @@ from src.common.types import Message, MessageRole, Event, EventType
 from src.common.logging import SimulationLogger
 from src.agents.runtime.message_queue import MessageQueue
 from src.agents.memory.store import MemoryStore
-from src.llm.prompts import build_messages_for_llm, build_system_prompt, render_template
+from src.llm.prompts import PROMPT_LAYOUTS, build_messages_for_llm, build_system_prompt, render_template_file
+from src.llm.tokens import usage_from_response
+from src.llm.instrumentation import call_cost
+from src.llm.factory import is_transient_error
+from src.llm.response_cache import ResponseCacheRun
 from src.agents.runtime.policy_hooks import apply_defense_to_system_prompt
+from src.llm.rate_limit import LazyRateLimiter, ProviderRateLimiter
+from src.tools.langchain_adapters import get_tool_schemas
+from src.tools.messaging import message_cause
+
+
+@lru_cache(maxsize=256)
+def render_system_prompt(
+    agent_name: str,
+    role_description: str,
+    responsibilities: tuple,
+    can_run_code: bool,
+    instruction_mode: Optional[str] = None,
+    layout: str = "default"
+) -> str:
+    """
+    Render an agent's system prompt, memoised per role and defense mode
+    
+    The key is the rendered inputs themselves, so an edited role config
+    simply misses the cache instead of serving a stale prompt.
+    
+    Args:
+        agent_name: Agent name
+        role_description: Role description from the role config
+        responsibilities: Responsibilities from the role config
+        can_run_code: Whether the run_code tool is listed
+        instruction_mode: Instruction defense mode (passive/active/None)
+        layout: Prompt layout; prefix renders the role-wide text (defense
+            included) first and names the agent only in the last line, so
+            agents sharing a role send byte-identical prefixes
+        
+    Returns:
+        Complete system prompt
+    """
+    base_prompt = render_template_file(
+        "base_system.jinja2",
+        agent_name=agent_name,
+        role_description=role_description,
+        responsibilities=responsibilities,
+        can_run_code=can_run_code,
+        shared_prefix=layout == "prefix"
+    )
+    prompt = apply_defense_to_system_prompt(base_prompt, instruction_mode)
+    if layout == "prefix":
+        prompt = f"{prompt}\n\nYou are {agent_name}."
+    return prompt
 
 
 class AgentRuntime:
@@ -29,7 +80,14 @@ class AgentRuntime:
         llm,
         tools: List,
         logger: SimulationLogger,
-        defense_config: Optional[Dict[str, Any]] = None
+        defense_config: Optional[Dict[str, Any]] = None,
+        step_counter: Optional[Dict[str, int]] = None,
+        llm_limiter: Optional[Union[ProviderRateLimiter, LazyRateLimiter]] = None,
+        memory_config: Optional[Dict[str, Any]] = None,
+        prompt_layout: str = "default",
+        retry_config: Optional[Dict[str, Any]] = None,
+        pricing: Optional[Dict[str, float]] = None,
+        response_cache_run: Optional[ResponseCacheRun] = None
     ):
         """
         Initialize agent runtime
@@ -41,16 +99,48 @@ class AgentRuntime:
             tools: List of LangChain tools
             logger: Simulation logger
             defense_config: Optional defense configuration
+            step_counter: Optional shared step counter, used to resolve the
+                step of a message when step() is called without one
+            llm_limiter: Optional rate limiter shared by all calls to the provider
+            memory_config: Optional MemoryStore settings (max_length, max_tokens,
+                strategy); defaults to the 50 most recent messages
+            prompt_layout: Prompt layout (default or prefix, see
+                src.llm.prompts.PROMPT_LAYOUTS)
+            retry_config: Optional max_retries (default 0) and retry_delay
+                (seconds, doubled after each retry) for failed LLM calls
+            pricing: Optional USD per million input, cached_input and output
+                tokens, used to cost each call
+            response_cache_run: Optional response cache run; LLM responses
+                are then handled in its dispatch turns so the run replays
+                exactly
         """
         self.name = name
         self.role_config = role_config
         self.llm = llm
         self.tools = tools
         self.logger = logger
+        self.step_counter = step_counter
+        self.llm_limiter = llm_limiter
+        
+        if prompt_layout not in PROMPT_LAYOUTS:
+            raise ValueError(f"Unknown prompt layout: {prompt_layout}")
+        self.prompt_layout = prompt_layout
+        
+        retry_config = retry_config or {}
+        self.max_retries = retry_config.get("max_retries", 0)
+        self.retry_delay = retry_config.get("retry_delay", 1.0)
+        self.pricing = pricing
+        self.response_cache_run = response_cache_run
+        
+        # Tool-bound runnable, built once and rebuilt only when the tool list changes
+        self._bound_llm = None
+        self._bound_tools_key = None
+        self.tool_schemas: List[Dict[str, Any]] = []
+        self._get_llm_runnable()
         
         # Core components
         self.queue = MessageQueue()
-        self.memory = MemoryStore(max_length=50)
+        self.memory = MemoryStore(layout=prompt_layout, **(memory_config or {}))
         
         # Build system prompt
         self.system_prompt = self._build_system_prompt(defense_config)
@@ -58,36 +148,55 @@ class AgentRuntime:
         # State
         self.is_running = False
         self.message_count = 0
+        
+        # Token usage reported by the provider, summed over this agent's calls
+        self.llm_usage: Dict[str, int] = {"calls": 0, "input_tokens": 0, "cached_tokens": 0, "output_tokens": 0}
+        
+        # One record per LLM invocation (the details of its LLM_CALL event)
+        self.llm_calls: List[Dict[str, Any]] = []
     
     def _build_system_prompt(self, defense_config: Optional[Dict[str, Any]] = None) -> str:
         """Build system prompt from role config and defense settings"""
-        # Load template
-        template_path = Path(__file__).parent.parent / "prompt_templates" / "base_system.jinja2"
-        with open(template_path, 'r') as f:
-            template_str = f.read()
-        
-        # Render base prompt
-        base_prompt = render_template(
-            template_str,
-            agent_name=self.name,
-            role_description=self.role_config.get("role_description", ""),
-            responsibilities=self.role_config.get("responsibilities", []),
-            can_run_code=self.role_config.get("can_run_code", False)
-        )
-        
-        # Apply defense if configured
+        mode = None
         if defense_config and defense_config.get("instruction_defense"):
             mode = defense_config["instruction_defense"].get("mode")
-            base_prompt = apply_defense_to_system_prompt(base_prompt, mode)
         
-        return base_prompt
+        return render_system_prompt(
+            self.name,
+            self.role_config.get("role_description", ""),
+            tuple(self.role_config.get("responsibilities", [])),
+            self.role_config.get("can_run_code", False),
+            mode,
+            self.prompt_layout
+        )
+    
+    def _get_llm_runnable(self):
+        """
+        Get the LLM runnable with this agent's tools bound
+        
+        Binding converts every tool schema to OpenAI JSON, so the result is
+        cached and only rebuilt when the tool list (or the LLM) changes.
+        """
+        # Holding the objects (not ids) keeps identity comparison valid
+        tools_key = (self.llm, *(self.tools or ()))
+        if tools_key != self._bound_tools_key:
+            if self.tools:
+                self.tool_schemas = get_tool_schemas(self.tools)
+                self._bound_llm = self.llm.bind_tools(self.tool_schemas)
+            else:
+                self.tool_schemas = []
+                self._bound_llm = self.llm
+            self._bound_tools_key = tools_key
+        return self._bound_llm
     
-    async def step(self, step_number: int) -> bool:
+    async def step(self, step_number: Optional[int] = None) -> bool:
         """
         Execute one agent step: dequeue message, process, take action
         
         Args:
-            step_number: Current global step number
+            step_number: Current global step number. If None, the step is read
+                from the shared step counter right after dequeueing, i.e. the
+                step assigned to this message by the supervisor
             
         Returns:
             True if processed a message, False if queue was empty
@@ -97,18 +206,27 @@ class AgentRuntime:
             return False
         
         try:
-            # Dequeue message with timeout
-            message = await self.queue.get(timeout=0.1)
-            
-            self.logger.log_event(Event(
-                event_type=EventType.MESSAGE_DEQUEUED,
-                step=step_number,
-                agent=self.name,
-                details={"sender": message.sender, "length": len(message.content)}
-            ))
+            async with self._dispatch_turn():
+                # Dequeue message with timeout
+                message = await self.queue.get(timeout=0.1)
+                queue_wait_s = self.queue.last_wait_s
+                
+                if step_number is None:
+                    step_number = self.step_counter["current_step"] if self.step_counter else 0
+                
+                self.logger.log_event(Event(
+                    event_type=EventType.MESSAGE_DEQUEUED,
+                    step=step_number,
+                    agent=self.name,
+                    details={"sender": message.sender, "length": len(message.content)}
+                ))
             
-            # Process message
-            await self._process_message(message, step_number)
+            # Process message; messages sent meanwhile are linked to it
+            cause_token = message_cause.set(message.id)
+            try:
+                await self._process_message(message, step_number, queue_wait_s)
+            finally:
+                message_cause.reset(cause_token)
             
             self.message_count += 1
             return True
@@ -119,19 +237,25 @@ class AgentRuntime:
             self.logger.error(f"Agent {self.name} error in step: {e}")
             return False
     
-    async def _process_message(self, message: Message, step_number: int) -> None:
+    async def _process_message(
+        self,
+        message: Message,
+        step_number: int,
+        queue_wait_s: Optional[float] = None
+    ) -> None:
         """
         Process an incoming message and generate response
         
         Args:
             message: Incoming message
             step_number: Current step number
+            queue_wait_s: Time the message waited in the queue, if known
         """
         # Build messages for LLM
         lc_messages = build_messages_for_llm(
             system_prompt=self.system_prompt,
-            memory=self.memory.get_all(),
-            incoming_message=message
+            incoming_message=message,
+            history=self.memory.get_langchain_messages()
         )
         
         # Store incoming message in memory
@@ -140,13 +264,14 @@ class AgentRuntime:
         try:
             # Use LLM with bound tools (modern LangChain 1.0+ API)
             if self.tools:
-                llm_with_tools = self.llm.bind_tools(self.tools)
-                
-                # Invoke LLM
-                response = await llm_with_tools.ainvoke(lc_messages)
-                
+                response = await self._invoke_llm(self._get_llm_runnable(), lc_messages, step_number, queue_wait_s)
+            else:
+                # No tools - just generate response
+                response = await self._invoke_llm(self.llm, lc_messages, step_number, queue_wait_s)
+            
+            async with self._dispatch_turn():
                 # Check if LLM wants to call tools
-                if hasattr(response, 'tool_calls') and response.tool_calls:
+                if self.tools and getattr(response, 'tool_calls', None):
                     # Execute tool calls
                     tool_results = []
                     for tool_call in response.tool_calls:
@@ -167,21 +292,19 @@ class AgentRuntime:
                     # No tool calls, use response content directly
                     response_text = response.content if hasattr(response, 'content') else str(response)
                 
-            else:
-                # No tools - just generate response
-                response = await self.llm.ainvoke(lc_messages)
-                response_text = response.content if hasattr(response, 'content') else str(response)
-            
-            # Store response in memory
-            response_message = Message(
-                role=MessageRole.ASSISTANT,
-                content=response_text,
-                sender=self.name,
-                step=step_number
-            )
-            self.memory.append(response_message)
-            
-            self.logger.log_message(response_message)
+                # Store response in memory
+                usage = usage_from_response(response)
+                response_message = Message(
+                    role=MessageRole.ASSISTANT,
+                    content=response_text,
+                    sender=self.name,
+                    step=step_number,
+                    caused_by=[message.id],
+                    metadata={"usage": usage} if usage else {}
+                )
+                self.memory.append(response_message)
+                
+                self.logger.log_message(response_message)
             
         except Exception as e:
             self.logger.error(f"Agent {self.name} failed to process message: {e}")
@@ -192,10 +315,104 @@ class AgentRuntime:
                 role=MessageRole.ASSISTANT,
                 content=f"[Error processing message: {str(e)}]",
                 sender=self.name,
-                step=step_number
+                step=step_number,
+                caused_by=[message.id]
             )
             self.memory.append(error_message)
     
+    def _dispatch_turn(self):
+        """Context in which a message is dequeued or an LLM response handled (see ResponseCacheRun.turn)"""
+        if self.response_cache_run is None:
+            return contextlib.nullcontext()
+        return self.response_cache_run.turn(self.name)
+    
+    def _record_usage(self, response) -> Optional[Dict[str, int]]:
+        """Add the provider-reported token usage of a response to llm_usage"""
+        usage = usage_from_response(response)
+        if usage:
+            self.llm_usage["calls"] += 1
+            for key, value in usage.items():
+                self.llm_usage[key] += value
+        return usage
+    
+    async def _invoke_llm(
+        self,
+        runnable,
+        lc_messages: List,
+        step_number: int = 0,
+        queue_wait_s: Optional[float] = None
+    ):
+        """
+        Invoke the LLM and log an LLM_CALL event
+        
+        Each attempt holds a provider rate-limit slot if configured. Attempts
+        failing with a transient error (timeout, connection error, rate
+        limit, 5xx) are retried up to max_retries times, backing off from
+        retry_delay; other errors, including replay cache misses, are raised
+        at once since a retry cannot succeed.
+        
+        Args:
+            runnable: LLM (or tool-bound runnable) to invoke
+            lc_messages: Prompt
+            step_number: Step of the message being processed
+            queue_wait_s: Time that message waited in the queue
+            
+        Returns:
+            LLM response
+        """
+        retries = 0
+        while True:
+            requested = started = time.perf_counter()
+            try:
+                if self.llm_limiter is None:
+                    response = await runnable.ainvoke(lc_messages)
+                else:
+                    async with self.llm_limiter:
+                        started = time.perf_counter()
+                        response = await runnable.ainvoke(lc_messages)
+                break
+            except Exception as e:
+                if not is_transient_error(e) or retries >= self.max_retries:
+                    self._log_llm_call(step_number, {
+                        "latency_s": time.perf_counter() - started,
+                        "queue_wait_s": queue_wait_s,
+                        "rate_limit_wait_s": started - requested,
+                        "retries": retries,
+                        "success": False,
+                        "error": f"{e.__class__.__name__}: {e}"[:200]
+                    })
+                    raise
+                retries += 1
+                delay = self.retry_delay * 2 ** (retries - 1)
+                self.logger.warning(f"Agent {self.name} LLM call failed ({e}), retry {retries}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        
+        usage = self._record_usage(response)
+        # Responses served by the response cache cost nothing
+        cache_hit = bool((getattr(response, "response_metadata", None) or {}).get("response_cache_hit"))
+        self._log_llm_call(step_number, {
+            "latency_s": time.perf_counter() - started,
+            "queue_wait_s": queue_wait_s,
+            "rate_limit_wait_s": started - requested,
+            "retries": retries,
+            "success": True,
+            "response_cache_hit": cache_hit,
+            "tool_calls": len(getattr(response, "tool_calls", None) or []),
+            **(usage or {}),
+            "cost_usd": 0.0 if cache_hit else call_cost(usage, self.pricing)
+        })
+        return response
+    
+    def _log_llm_call(self, step_number: int, record: Dict[str, Any]) -> None:
+        """Keep a call record for run metrics and log it as an LLM_CALL event"""
+        self.llm_calls.append(record)
+        self.logger.log_event(Event(
+            event_type=EventType.LLM_CALL,
+            step=step_number,
+            agent=self.name,
+            details=record
+        ))
+    
     async def _execute_tool_call(self, tool_call: Dict[str, Any], step_number: int) -> str:
         """Execute a single tool call and return result."""
         tool_name = tool_call.get("name")
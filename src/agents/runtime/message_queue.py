@@ -1,10 +1,14 @@
 """Message queue for agent communication"""
 
 import asyncio
-from typing import Optional
+import time
+from typing import Callable, Dict, List, Optional
 from src.common.types import Message
 
 
+QueueListener = Callable[[Message], None]
+
+
 class MessageQueue:
     """
     FIFO message queue for an agent
@@ -14,8 +18,32 @@ class MessageQueue:
     def __init__(self):
         """Initialize empty message queue"""
         self._queue: asyncio.Queue = asyncio.Queue()
+        self._not_empty = asyncio.Event()
         self._total_enqueued = 0
         self._total_dequeued = 0
+        self._enqueue_listeners: List[QueueListener] = []
+        self._dequeue_listeners: List[QueueListener] = []
+        
+        # Enqueue time per message id, to measure how long messages wait
+        self._enqueued_at: Dict[str, float] = {}
+        self.last_wait_s: Optional[float] = None
+    
+    def subscribe(
+        self,
+        on_enqueue: Optional[QueueListener] = None,
+        on_dequeue: Optional[QueueListener] = None
+    ) -> None:
+        """
+        Register callbacks fired synchronously on every enqueue/dequeue
+        
+        Args:
+            on_enqueue: Called with the message after it is enqueued
+            on_dequeue: Called with the message right after it is dequeued
+        """
+        if on_enqueue:
+            self._enqueue_listeners.append(on_enqueue)
+        if on_dequeue:
+            self._dequeue_listeners.append(on_dequeue)
     
     async def put(self, message: Message) -> None:
         """
@@ -24,8 +52,13 @@ class MessageQueue:
         Args:
             message: Message to enqueue
         """
+        self._enqueued_at[message.id] = time.monotonic()
         await self._queue.put(message)
         self._total_enqueued += 1
+        self._not_empty.set()
+        
+        for listener in self._enqueue_listeners:
+            listener(message)
     
     async def get(self, timeout: Optional[float] = None) -> Message:
         """
@@ -35,19 +68,41 @@ class MessageQueue:
             timeout: Optional timeout in seconds
             
         Returns:
-            Dequeued message
+            Dequeued message (its time in the queue is left in last_wait_s)
             
         Raises:
             asyncio.TimeoutError: If timeout expires
         """
-        if timeout:
+        if not self._queue.empty():
+            # Fast path: no need to suspend (or spin up a timeout task)
+            message = self._queue.get_nowait()
+        elif timeout:
             message = await asyncio.wait_for(self._queue.get(), timeout=timeout)
         else:
             message = await self._queue.get()
         
         self._total_dequeued += 1
+        enqueued_at = self._enqueued_at.pop(message.id, None)
+        self.last_wait_s = time.monotonic() - enqueued_at if enqueued_at is not None else None
+        if self._queue.empty():
+            self._not_empty.clear()
+        
+        for listener in self._dequeue_listeners:
+            listener(message)
+        
         return message
     
+    async def wait_for_message(self) -> None:
+        """
+        Block until the queue holds at least one message
+        
+        Unlike get(), this does not consume the message, so the caller can
+        decide whether to process it (e.g. after checking a stop signal).
+        """
+        if not self._queue.empty():
+            return
+        await self._not_empty.wait()
+    
     def empty(self) -> bool:
         """
         Check if queue is empty
@@ -1,7 +1,8 @@
 """Attack injector - executes attack injection"""
 
 import asyncio
-from typing import Dict, TYPE_CHECKING
+import random
+from typing import Dict, Optional, TYPE_CHECKING
 from datetime import datetime
 
 from src.common.types import Message, MessageRole, Event, EventType
@@ -22,7 +23,8 @@ class AttackInjector:
         self,
         agents: Dict[str, 'AgentRuntime'],
         logger: SimulationLogger,
-        prompt_file: str = "data/attacks/jailbreak_prompts.jsonl"
+        prompt_file: str = "data/attacks/jailbreak_prompts.jsonl",
+        rng: Optional[random.Random] = None
     ):
         """
         Initialize attack injector
@@ -31,10 +33,13 @@ class AttackInjector:
             agents: Dictionary of agent name -> AgentRuntime
             logger: Simulation logger
             prompt_file: Path to attack prompts file
+            rng: Random generator owned by the simulation, used for target
+                and prompt selection
         """
         self.agents = agents
         self.logger = logger
-        self.prompt_bank = PromptBank(prompt_file)
+        self.rng = rng
+        self.prompt_bank = PromptBank(prompt_file, rng=rng)
     
     async def inject_attack(
         self,
@@ -50,20 +55,24 @@ class AttackInjector:
             target: Target agent name (if None, randomly selected)
             prompt_id: Specific prompt ID to use (if None, randomly selected)
             step: Current simulation step
-            seed: Random seed for reproducibility
+            seed: Random seed for a one-off reproducible draw (if the injector
+                has no generator of its own)
         """
         # Select target if not specified
         if target is None:
             target = select_attack_target(
                 available_agents=list(self.agents.keys()),
-                seed=seed
+                seed=seed,
+                rng=self.rng
             )
         
         # Select prompt if not specified
         if prompt_id is not None:
             prompt_data = self.prompt_bank.get_prompt_by_id(prompt_id)
         else:
-            prompt_data = self.prompt_bank.get_random_prompt(seed=seed)
+            prompt_data = self.prompt_bank.get_random_prompt(
+                seed=seed if self.rng is None else None
+            )
         
         if not prompt_data:
             self.logger.error(f"Failed to get attack prompt")
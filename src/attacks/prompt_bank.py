@@ -9,15 +9,21 @@ from src.common.utils import load_jsonl
 class PromptBank:
     """Manages collection of jailbreak prompts"""
     
-    def __init__(self, prompt_file: str = "data/attacks/jailbreak_prompts.jsonl"):
+    def __init__(
+        self,
+        prompt_file: str = "data/attacks/jailbreak_prompts.jsonl",
+        rng: Optional[random.Random] = None
+    ):
         """
         Initialize prompt bank
         
         Args:
             prompt_file: Path to JSONL file containing attack prompts
+            rng: Optional random generator owned by the simulation
         """
         self.prompt_file = Path(prompt_file)
         self.prompts = self._load_prompts()
+        self.rng = rng
     
     def _load_prompts(self) -> List[Dict[str, Any]]:
         """Load prompts from file"""
@@ -31,15 +37,19 @@ class PromptBank:
         Get a random attack prompt
         
         Args:
-            seed: Optional seed for reproducibility
+            seed: Optional seed for a one-off reproducible draw; by default the
+                bank's own generator (if any) is used
             
         Returns:
             Prompt dictionary with id and prompt text
         """
+        # Never touch the global RNG when seeded
         if seed is not None:
-            random.seed(seed)
+            rng = random.Random(seed)
+        else:
+            rng = self.rng or random
         
-        return random.choice(self.prompts)
+        return rng.choice(self.prompts)
     
     def get_prompt_by_id(self, prompt_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -8,7 +8,8 @@ from src.common.constants import ATTACK_EXCLUDE_TARGETS
 def select_attack_target(
     available_agents: List[str],
     exclude: List[str] = None,
-    seed: Optional[int] = None
+    seed: Optional[int] = None,
+    rng: Optional[random.Random] = None
 ) -> str:
     """
     Select a random agent as attack target
@@ -16,7 +17,8 @@ def select_attack_target(
     Args:
         available_agents: List of all agent names
         exclude: List of agent names to exclude (defaults to Atlas and Deng)
-        seed: Optional seed for reproducibility
+        seed: Optional seed for reproducibility (ignored if rng is given)
+        rng: Optional random generator owned by the simulation
         
     Returns:
         Selected agent name
@@ -30,8 +32,8 @@ def select_attack_target(
     if not eligible:
         raise ValueError("No eligible agents for attack target")
     
-    # Set seed if provided
-    if seed is not None:
-        random.seed(seed)
+    # Never touch the global RNG when seeded
+    if rng is None:
+        rng = random.Random(seed) if seed is not None else random
     
-    return random.choice(eligible)
+    return rng.choice(eligible)
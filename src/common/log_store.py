@@ -0,0 +1,224 @@
+"""On-disk formats for run logs (events, messages, tool calls)"""
+
+import io
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.common.types import Event, Message, ToolCall
+from src.common.utils import json_loads, to_json_line
+
+# zstandard is in requirements.txt; without it only plain JSONL is available
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+LOG_FORMATS = ("jsonl", "jsonl.zst")
+
+# Each log has a fixed schema: the fields of its model, in declaration order
+LOG_MODELS = {
+    "events": Event,
+    "messages": Message,
+    "tool_calls": ToolCall,
+}
+
+SCHEMA_FILE = "log_schema.json"
+
+
+def log_schema(name: str) -> List[str]:
+    """Column names of a log, derived from its model"""
+    return list(LOG_MODELS[name].model_fields)
+
+
+def log_path(run_dir: Path, name: str, log_format: str = "jsonl") -> Path:
+    """Path of a log file in a run directory for a given format"""
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format: {log_format}")
+    return Path(run_dir) / f"{name}.{log_format}"
+
+
+def find_log(run_dir: Path, name: str) -> Optional[Path]:
+    """Return the log file of a run in whichever format exists, or None"""
+    for log_format in LOG_FORMATS:
+        path = log_path(run_dir, name, log_format)
+        if path.exists():
+            return path
+    return None
+
+
+def _require_zstd() -> None:
+    if zstandard is None:
+        raise ImportError("zstandard is required for .jsonl.zst run logs (pip install zstandard)")
+
+
+class ZstdFrameAppender:
+    """
+    Append-only writer for .jsonl.zst files
+    
+    Every write() becomes one complete zstd frame. Concatenated frames form
+    a valid zstd stream, so the file stays readable after every batch and
+    can be reopened for appending.
+    """
+    
+    def __init__(self, path: Path, level: int = 3):
+        _require_zstd()
+        self._file = open(path, 'ab')
+        self._compressor = zstandard.ZstdCompressor(level=level)
+    
+    def write(self, data: bytes) -> None:
+        self._file.write(self._compressor.compress(data))
+    
+    def flush(self) -> None:
+        self._file.flush()
+    
+    def fileno(self) -> int:
+        return self._file.fileno()
+    
+    def close(self) -> None:
+        self._file.close()
+
+
+def open_log_appender(path: Path):
+    """Open a log file for appending raw JSONL bytes (compressed if .zst)"""
+    if str(path).endswith(".zst"):
+        return ZstdFrameAppender(path)
+    return open(path, 'ab')
+
+
+def iter_log_lines(path: Path) -> Iterator[bytes]:
+    """Yield the non-empty JSONL lines of a log file, decompressing if needed"""
+    with open(path, 'rb') as raw:
+        if str(path).endswith(".zst"):
+            _require_zstd()
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+            lines = io.BufferedReader(stream)
+        else:
+            lines = raw
+        for line in lines:
+            if line.strip():
+                yield line
+
+
+def iter_run_log(run_dir: Path, name: str) -> Iterator[Dict[str, Any]]:
+    """Stream the records of one log of a run (nothing if it does not exist)"""
+    path = find_log(run_dir, name)
+    if path is None:
+        return
+    for line in iter_log_lines(path):
+        yield json_loads(line)
+
+
+def load_run_log(
+    run_dir: Path,
+    name: str,
+    columns: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Load one log of a run as a list of records
+    
+    Args:
+        run_dir: Run directory
+        name: Log name (events, messages, tool_calls)
+        columns: Optional subset of fields to keep in each record
+    
+    Returns:
+        List of record dicts (empty if the log does not exist)
+    """
+    path = find_log(run_dir, name)
+    if path is None:
+        return []
+    
+    records = [json_loads(line) for line in iter_log_lines(path)]
+    if columns is not None:
+        records = [{column: record.get(column) for column in columns} for record in records]
+    return records
+
+
+def load_run_columns(
+    run_dir: Path,
+    name: str,
+    columns: Optional[List[str]] = None
+) -> Dict[str, List[Any]]:
+    """
+    Load one log of a run column-wise
+    
+    Args:
+        run_dir: Run directory
+        name: Log name (events, messages, tool_calls)
+        columns: Columns to load (default: the log's full schema)
+    
+    Returns:
+        Dict mapping column name to a list of values, one per record
+    """
+    columns = columns or log_schema(name)
+    data: Dict[str, List[Any]] = {column: [] for column in columns}
+    
+    path = find_log(run_dir, name)
+    if path is None:
+        return data
+    
+    appenders = [(data[column].append, column) for column in columns]
+    for line in iter_log_lines(path):
+        record = json_loads(line)
+        for append, column in appenders:
+            append(record.get(column))
+    return data
+
+
+def write_schema_file(run_dir: Path, log_format: str) -> None:
+    """Record the log format and per-log schema of a run"""
+    schema = {
+        "format": log_format,
+        "logs": {name: log_schema(name) for name in LOG_MODELS},
+    }
+    with open(Path(run_dir) / SCHEMA_FILE, 'w', encoding='utf-8') as f:
+        json.dump(schema, f, indent=2)
+
+
+def normalize_record(name: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """Order a record by the log schema, filling missing fields with None"""
+    schema = log_schema(name)
+    normalized = {column: record.get(column) for column in schema}
+    # Unknown fields are kept so a conversion never loses data
+    normalized.update((key, value) for key, value in record.items() if key not in normalized)
+    return normalized
+
+
+def convert_run_logs(run_dir: Path, log_format: str, remove_source: bool = False) -> List[Path]:
+    """
+    Rewrite the logs of a run in another format
+    
+    Args:
+        run_dir: Run directory
+        log_format: Target format (jsonl or jsonl.zst)
+        remove_source: Delete the original files after conversion
+    
+    Returns:
+        Paths of the written log files
+    """
+    written = []
+    for name in LOG_MODELS:
+        source = find_log(run_dir, name)
+        target = log_path(run_dir, name, log_format)
+        if source is None or source == target:
+            continue
+        
+        records = [normalize_record(name, json_loads(line)) for line in iter_log_lines(source)]
+        target.unlink(missing_ok=True)
+        appender = open_log_appender(target)
+        try:
+            appender.write(b''.join(to_json_line(record) for record in records))
+        finally:
+            appender.close()
+        written.append(target)
+        
+        if remove_source:
+            source.unlink()
+    
+    if log_format != "jsonl":
+        write_schema_file(run_dir, log_format)
+    elif remove_source:
+        (Path(run_dir) / SCHEMA_FILE).unlink(missing_ok=True)
+    return written
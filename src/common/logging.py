@@ -1,12 +1,19 @@
 """Logging utilities for events, messages, and tool calls"""
 
+import atexit
 import logging
+import os
+import threading
+import weakref
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
-from src.common.types import Event, Message, ToolCall
-from src.common.utils import append_jsonl, ensure_dir
+from pydantic import BaseModel
+
+from src.common.types import Event, EventType, Message, ToolCall
+from src.common.log_store import log_path, open_log_appender, write_schema_file
+from src.common.utils import ensure_dir, to_json_line
 
 # Configure logging
 logging.basicConfig(
@@ -15,28 +22,196 @@ logging.basicConfig(
 )
 
 
+FSYNC_POLICIES = ("never", "close", "batch")
+
+
+class BufferedJsonlWriter:
+    """
+    Background-thread JSONL writer
+    
+    Records are buffered in memory and written by a writer thread to files
+    that stay open, so the event loop never blocks on open/write/close. A
+    batch is written when flush_max_records are pending or flush_interval_s
+    has passed, and on flush()/close().
+    
+    fsync policies:
+    - never: leave durability to the OS
+    - close: fsync when the writer is flushed explicitly or closed
+    - batch: fsync after every batch (crash-safe up to the last batch)
+    """
+    
+    def __init__(
+        self,
+        flush_interval_s: float = 1.0,
+        flush_max_records: int = 256,
+        fsync: str = "close"
+    ):
+        """
+        Initialize writer (the thread starts on the first write)
+        
+        Args:
+            flush_interval_s: Maximum time a record stays buffered
+            flush_max_records: Pending records that trigger an early write
+            fsync: fsync policy (never, close, batch)
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        
+        self.flush_interval_s = flush_interval_s
+        self.flush_max_records = flush_max_records
+        self.fsync = fsync
+        
+        self._pending: List[Tuple[Path, bytes]] = []
+        self._files: Dict[Path, Any] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._flush_requested = 0
+        self._flushed = 0
+        
+        _live_writers.add(self)
+    
+    def write(self, line: bytes, path: Path) -> None:
+        """Buffer one serialized JSONL line for a file"""
+        with self._cond:
+            self._pending.append((path, line))
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="jsonl-writer", daemon=True)
+                self._thread.start()
+            if len(self._pending) >= self.flush_max_records:
+                self._cond.notify()
+    
+    def flush(self) -> None:
+        """Block until every buffered record has been written"""
+        with self._cond:
+            if self._thread is None:
+                return
+            self._flush_requested += 1
+            ticket = self._flush_requested
+            self._cond.notify()
+            self._cond.wait_for(lambda: self._flushed >= ticket or self._thread is None)
+    
+    def close(self) -> None:
+        """Flush, stop the writer thread and close all files"""
+        with self._cond:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stopping = True
+            self._cond.notify()
+        thread.join()
+    
+    def _run(self) -> None:
+        """Writer thread: drain batches until stopped"""
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping
+                    or self._flush_requested > self._flushed
+                    or len(self._pending) >= self.flush_max_records,
+                    timeout=self.flush_interval_s
+                )
+                batch, self._pending = self._pending, []
+                ticket = self._flush_requested
+                stopping = self._stopping
+            
+            sync = self.fsync == "batch" or (self.fsync == "close" and (stopping or ticket > self._flushed))
+            try:
+                self._write_batch(batch, sync)
+            except Exception as e:
+                # Never let the thread die: flush() callers wait on it
+                logging.getLogger("SimulationLogger").error(f"Log writer failed: {e}")
+            
+            with self._cond:
+                self._flushed = ticket
+                if stopping and not self._pending:
+                    self._close_files()
+                    self._thread = None
+                    self._cond.notify_all()
+                    return
+                self._cond.notify_all()
+    
+    def _write_batch(self, batch: List[Tuple[Path, bytes]], sync: bool) -> None:
+        """Append a batch, one write per file"""
+        lines: Dict[Path, List[bytes]] = {}
+        for path, line in batch:
+            lines.setdefault(path, []).append(line)
+        
+        for path, chunk in lines.items():
+            try:
+                f = self._files.get(path)
+                if f is None:
+                    f = self._files[path] = open_log_appender(path)
+                f.write(b''.join(chunk))
+                f.flush()
+            except OSError as e:
+                logging.getLogger("SimulationLogger").error(f"Failed to write {path}: {e}")
+        
+        if sync:
+            for f in self._files.values():
+                try:
+                    os.fsync(f.fileno())
+                except OSError:
+                    pass
+    
+    def _close_files(self) -> None:
+        for f in self._files.values():
+            try:
+                f.close()
+            except OSError:
+                pass
+        self._files = {}
+
+
+# Writers still running at interpreter exit are flushed so no record is lost
+_live_writers: "weakref.WeakSet[BufferedJsonlWriter]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_live_writers() -> None:
+    for writer in list(_live_writers):
+        writer.close()
+
+
 class SimulationLogger:
     """Centralized logger for simulation events, messages, and tool calls"""
     
-    def __init__(self, output_dir: Path):
+    def __init__(self, output_dir: Path, writer_config: Optional[Dict[str, Any]] = None):
         """
         Initialize logger with output directory
         
         Args:
             output_dir: Directory to save log files
+            writer_config: Optional log writer settings: format (jsonl or
+                jsonl.zst), buffered (default True), flush_interval_s,
+                flush_max_records, fsync
         """
+        writer_config = dict(writer_config or {})
+        self.log_format = writer_config.pop("format", "jsonl")
+        
         self.output_dir = ensure_dir(output_dir)
-        self.events_file = self.output_dir / "events.jsonl"
-        self.messages_file = self.output_dir / "messages.jsonl"
-        self.tool_calls_file = self.output_dir / "tool_calls.jsonl"
+        self.events_file = log_path(self.output_dir, "events", self.log_format)
+        self.messages_file = log_path(self.output_dir, "messages", self.log_format)
+        self.tool_calls_file = log_path(self.output_dir, "tool_calls", self.log_format)
+        if self.log_format != "jsonl":
+            write_schema_file(self.output_dir, self.log_format)
+        
+        # Buffered background writer; buffered=False appends synchronously
+        self.writer = None
+        if writer_config.pop("buffered", True):
+            self.writer = BufferedJsonlWriter(**writer_config)
         
         # Standard Python logger for console output
         self.logger = logging.getLogger("SimulationLogger")
     
     def log_event(self, event: Event) -> None:
         """Log a simulation event"""
-        event_dict = event.model_dump(mode='json')
-        append_jsonl(event_dict, self.events_file)
+        self._append(event, self.events_file)
+        
+        # Everything up to the end of the run must be on disk
+        if event.event_type == EventType.SIMULATION_END:
+            self.flush()
         
         # Also log to console for important events
         if event.event_type.value in ['simulation_start', 'simulation_end', 'explosion', 'attack_injected']:
@@ -44,8 +219,7 @@ class SimulationLogger:
     
     def log_message(self, message: Message) -> None:
         """Log an agent message"""
-        message_dict = message.model_dump(mode='json')
-        append_jsonl(message_dict, self.messages_file)
+        self._append(message, self.messages_file)
         
         # Log to console with truncated content
         content_preview = message.content[:100] + "..." if len(message.content) > 100 else message.content
@@ -53,11 +227,33 @@ class SimulationLogger:
     
     def log_tool_call(self, tool_call: ToolCall) -> None:
         """Log a tool call"""
-        tool_call_dict = tool_call.model_dump(mode='json')
-        append_jsonl(tool_call_dict, self.tool_calls_file)
+        self._append(tool_call, self.tool_calls_file)
         
         self.logger.debug(f"Tool call: {tool_call.tool_type.value} by {tool_call.caller}")
     
+    def _append(self, record: BaseModel, path: Path) -> None:
+        """Serialize a record and hand it to the writer (or append it if unbuffered)"""
+        # Serialized now: the model may change after this call returns
+        line = to_json_line(record)
+        if self.writer is None:
+            appender = open_log_appender(path)
+            try:
+                appender.write(line)
+            finally:
+                appender.close()
+        else:
+            self.writer.write(line, path)
+    
+    def flush(self) -> None:
+        """Write all buffered records to disk"""
+        if self.writer is not None:
+            self.writer.flush()
+    
+    def close(self) -> None:
+        """Flush buffered records and close the log files"""
+        if self.writer is not None:
+            self.writer.close()
+    
     def info(self, message: str) -> None:
         """Log info message to console"""
         self.logger.info(message)
@@ -1,8 +1,11 @@
 """Global data type definitions for the multi-agent system"""
 
+import hashlib
+import uuid
+from contextvars import ContextVar
 from enum import Enum
 from typing import Any, Dict, List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
 
 
@@ -14,8 +17,58 @@ class MessageRole(str, Enum):
     TOOL = "tool"
 
 
+class MessageIdSource:
+    """
+    Reproducible message ids for one simulation
+    
+    Each id is derived from (seed, sender, per-sender counter), so a
+    sender's ids do not depend on how other agents' work interleaved.
+    """
+    
+    def __init__(self, seed: int):
+        """
+        Initialize id source
+        
+        Args:
+            seed: Simulation seed
+        """
+        self.seed = seed
+        self.counts: Dict[str, int] = {}
+    
+    def next_id(self, sender: Optional[str]) -> str:
+        """Id of the sender's next message"""
+        key = sender or ""
+        index = self.counts.get(key, 0)
+        self.counts[key] = index + 1
+        return hashlib.sha256(f"{self.seed}:{key}:{index}".encode("utf-8")).hexdigest()[:16]
+
+
+# Id source of the simulation running in the current context; set by
+# seed_message_ids so message ids are reproducible per seed
+_message_ids: ContextVar[Optional[MessageIdSource]] = ContextVar("message_ids", default=None)
+
+
+def seed_message_ids(seed: int) -> None:
+    """
+    Derive message ids in the current context (and tasks it spawns) from seed
+    
+    Args:
+        seed: Simulation seed
+    """
+    _message_ids.set(MessageIdSource(seed))
+
+
+def new_message_id(sender: Optional[str] = None) -> str:
+    """Id for a message from sender (random outside a seeded simulation)"""
+    source = _message_ids.get()
+    if source is None:
+        return uuid.uuid4().hex[:16]
+    return source.next_id(sender)
+
+
 class Message(BaseModel):
     """A single message in agent communication"""
+    id: str  # Defaults to new_message_id(sender)
     role: MessageRole
     content: str
     sender: Optional[str] = None  # Agent name who sent this message
@@ -23,6 +76,15 @@ class Message(BaseModel):
     timestamp: Optional[datetime] = Field(default_factory=datetime.now)
     step: Optional[int] = None  # Global step number when this message was created
     metadata: Dict[str, Any] = Field(default_factory=dict)
+    caused_by: List[str] = Field(default_factory=list)  # Ids of the messages that triggered this one
+    
+    @model_validator(mode="before")
+    @classmethod
+    def _default_id(cls, data: Any) -> Any:
+        """Give new messages an id derived from their sender"""
+        if isinstance(data, dict) and data.get("id") is None:
+            data = {**data, "id": new_message_id(data.get("sender"))}
+        return data
 
 
 class ToolCallType(str, Enum):
@@ -51,6 +113,7 @@ class EventType(str, Enum):
     MESSAGE_ENQUEUED = "message_enqueued"
     MESSAGE_DEQUEUED = "message_dequeued"
     TOOL_CALLED = "tool_called"
+    LLM_CALL = "llm_call"
     ATTACK_INJECTED = "attack_injected"
     DEFENSE_ACTIVATED = "defense_activated"
     RISK_DETECTED = "risk_detected"
@@ -87,6 +150,7 @@ class Outcome(BaseModel):
     runtime_seconds: float
     timestamp: datetime = Field(default_factory=datetime.now)
     config_snapshot: Dict[str, Any] = Field(default_factory=dict)
+    metrics: Dict[str, Any] = Field(default_factory=dict)  # Runtime counters (caches, ...)
 
 
 class BehaviorLevel(int, Enum):
@@ -6,6 +6,14 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List
 
+from pydantic import BaseModel
+
+# orjson is much faster than the stdlib json module; fall back if missing
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
 
 def set_random_seed(seed: int) -> None:
     """Set random seed for reproducibility"""
@@ -18,6 +26,26 @@ def set_random_seed(seed: int) -> None:
         pass
 
 
+def make_rng(seed: int, stream: str = "") -> random.Random:
+    """
+    Create an isolated random generator for one simulation
+    
+    Unlike set_random_seed, this touches no global state, so simulations
+    sharing a process (or event loop) stay reproducible per seed. Distinct
+    stream names give independent, equally reproducible sub-streams.
+    
+    Args:
+        seed: Simulation seed
+        stream: Optional sub-stream name (e.g. "attacks")
+        
+    Returns:
+        Seeded random.Random instance
+    """
+    if not stream:
+        return random.Random(seed)
+    return random.Random(f"{seed}:{stream}")
+
+
 def get_timestamp() -> str:
     """Get current timestamp as string"""
     return datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -30,28 +58,59 @@ def ensure_dir(path: Path) -> Path:
     return path
 
 
+def json_loads(data: str | bytes) -> Any:
+    """Parse a JSON document (orjson when available)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def to_json_line(item: Dict[str, Any] | BaseModel) -> bytes:
+    """
+    Serialize a dict or Pydantic model to one UTF-8 JSONL line
+    
+    Models go through model_dump_json, which serializes in one pass instead
+    of model_dump(mode='json') followed by json.dumps. Dicts with non-string
+    keys are accepted like json.dumps does; anything orjson rejects (e.g.
+    integers beyond 64 bits) falls back to json.dumps.
+    
+    Args:
+        item: Dict or Pydantic model
+        
+    Returns:
+        Encoded JSON followed by a newline
+    """
+    if isinstance(item, BaseModel):
+        return item.model_dump_json().encode('utf-8') + b'\n'
+    if orjson is not None:
+        try:
+            return orjson.dumps(item, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+        except TypeError:  # orjson.JSONEncodeError
+            pass
+    return (json.dumps(item, ensure_ascii=False) + '\n').encode('utf-8')
+
+
 def load_jsonl(file_path: str | Path) -> List[Dict[str, Any]]:
     """Load JSONL file"""
     data = []
-    with open(file_path, 'r', encoding='utf-8') as f:
+    with open(file_path, 'rb') as f:
         for line in f:
             line = line.strip()
             if line:
-                data.append(json.loads(line))
+                data.append(json_loads(line))
     return data
 
 
-def save_jsonl(data: List[Dict[str, Any]], file_path: str | Path) -> None:
+def save_jsonl(data: List[Dict[str, Any] | BaseModel], file_path: str | Path) -> None:
     """Save data to JSONL file"""
-    with open(file_path, 'w', encoding='utf-8') as f:
-        for item in data:
-            f.write(json.dumps(item, ensure_ascii=False) + '\n')
+    with open(file_path, 'wb') as f:
+        f.write(b''.join(to_json_line(item) for item in data))
 
 
-def append_jsonl(item: Dict[str, Any], file_path: str | Path) -> None:
+def append_jsonl(item: Dict[str, Any] | BaseModel, file_path: str | Path) -> None:
     """Append a single item to JSONL file"""
-    with open(file_path, 'a', encoding='utf-8') as f:
-        f.write(json.dumps(item, ensure_ascii=False) + '\n')
+    with open(file_path, 'ab') as f:
+        f.write(to_json_line(item))
 
 
 def load_json(file_path: str | Path) -> Dict[str, Any]:
@@ -0,0 +1,259 @@
+"""
+Run catalogue: one SQLite database indexing every simulation run.
+
+Each Simulation.run upserts a row (seed, defense config hash, termination
+reason, counts, runtime, paths), optionally with its messages and events,
+so cross-sweep reports become SQL queries instead of directory walks.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.common.log_store import load_run_log
+
+
+DEFAULT_CATALOG_DB = Path("outputs/catalog.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    run_name TEXT NOT NULL,
+    experiment_dir TEXT NOT NULL,
+    seed INTEGER,
+    defense_hash TEXT,
+    defense_config TEXT,
+    termination_reason TEXT,
+    success INTEGER,
+    total_steps INTEGER,
+    total_messages INTEGER,
+    runtime_seconds REAL,
+    outcome TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_experiment ON runs (experiment_dir);
+CREATE INDEX IF NOT EXISTS runs_defense ON runs (defense_hash);
+CREATE TABLE IF NOT EXISTS messages (
+    run_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    step INTEGER,
+    role TEXT,
+    sender TEXT,
+    receiver TEXT,
+    is_attack INTEGER,
+    content TEXT,
+    PRIMARY KEY (run_id, seq)
+);
+CREATE TABLE IF NOT EXISTS events (
+    run_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    step INTEGER,
+    event_type TEXT,
+    agent TEXT,
+    details TEXT,
+    PRIMARY KEY (run_id, seq)
+);
+"""
+
+
+def defense_config_hash(defense_config: Optional[Dict[str, Any]]) -> str:
+    """Stable short hash identifying a defense configuration."""
+    encoded = json.dumps(defense_config or {}, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+class RunCatalog:
+    """SQLite catalogue of simulation runs."""
+    
+    def __init__(self, db_path: Path = DEFAULT_CATALOG_DB):
+        """
+        Open (or create) a catalogue.
+        
+        Args:
+            db_path: SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # WAL lets process-pool workers upsert while reports read
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+    
+    def __enter__(self) -> "RunCatalog":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        self.conn.close()
+    
+    def upsert_run(
+        self,
+        run_dir: Path,
+        outcome: Dict[str, Any],
+        include_logs: bool = False,
+    ) -> str:
+        """
+        Insert or replace the catalogue entry of a run.
+        
+        Args:
+            run_dir: Run directory
+            outcome: Outcome dictionary (as saved to outcomes.json)
+            include_logs: Also index the run's messages and events
+        
+        Returns:
+            Run id (the resolved run directory)
+        """
+        run_dir = Path(run_dir).resolve()
+        run_id = str(run_dir)
+        snapshot = outcome.get("config_snapshot", {})
+        defense_config = snapshot.get("defense_config") or {}
+        
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    run_dir.name,
+                    str(run_dir.parent),
+                    snapshot.get("seed"),
+                    defense_config_hash(defense_config),
+                    json.dumps(defense_config, sort_keys=True, default=str),
+                    outcome.get("termination_reason"),
+                    int(bool(outcome.get("success"))),
+                    outcome.get("total_steps"),
+                    outcome.get("total_messages"),
+                    outcome.get("runtime_seconds"),
+                    json.dumps(outcome, default=str),
+                    time.time(),
+                ),
+            )
+            
+            if include_logs:
+                self.conn.execute("DELETE FROM messages WHERE run_id = ?", (run_id,))
+                self.conn.execute("DELETE FROM events WHERE run_id = ?", (run_id,))
+                self.conn.executemany(
+                    "INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        (
+                            run_id, seq, m.get("step"), m.get("role"), m.get("sender"), m.get("receiver"),
+                            int(bool((m.get("metadata") or {}).get("is_attack"))), m.get("content"),
+                        )
+                        for seq, m in enumerate(load_run_log(run_dir, "messages"))
+                    ),
+                )
+                self.conn.executemany(
+                    "INSERT INTO events VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        (
+                            run_id, seq, e.get("step"), e.get("event_type"), e.get("agent"),
+                            json.dumps(e.get("details") or {}, default=str),
+                        )
+                        for seq, e in enumerate(load_run_log(run_dir, "events"))
+                    ),
+                )
+        
+        return run_id
+    
+    def index_directory(self, root: Path, include_logs: bool = False) -> int:
+        """
+        Backfill the catalogue from existing run directories.
+        
+        Args:
+            root: Directory searched recursively for outcomes.json files
+            include_logs: Also index messages and events
+        
+        Returns:
+            Number of runs indexed
+        """
+        count = 0
+        for outcome_file in sorted(Path(root).rglob("outcomes.json")):
+            with open(outcome_file, "r", encoding="utf-8") as f:
+                outcome = json.load(f)
+            self.upsert_run(outcome_file.parent, outcome, include_logs=include_logs)
+            count += 1
+        return count
+    
+    def load_outcomes(self, experiment_dir: Path) -> List[Dict[str, Any]]:
+        """
+        Outcomes of all runs directly inside an experiment directory.
+        
+        The catalogue is reconciled with the directory first: runs on disk
+        but not indexed yet are indexed from their outcomes.json, and rows of
+        runs deleted since indexing are skipped.
+        
+        Returns:
+            Outcome dictionaries ordered by run name, each with _run_name set
+        """
+        experiment_dir = Path(experiment_dir).resolve()
+        on_disk = {outcome_file.parent.name: outcome_file for outcome_file in experiment_dir.glob("*/outcomes.json")}
+        rows = dict(self.conn.execute(
+            "SELECT run_name, outcome FROM runs WHERE experiment_dir = ?",
+            (str(experiment_dir),),
+        ).fetchall())
+        
+        outcomes = []
+        for run_name in sorted(on_disk):
+            if run_name in rows:
+                outcome = json.loads(rows[run_name])
+            else:
+                with open(on_disk[run_name], "r", encoding="utf-8") as f:
+                    outcome = json.load(f)
+                self.upsert_run(on_disk[run_name].parent, outcome)
+            outcome["_run_name"] = run_name
+            outcomes.append(outcome)
+        return outcomes
+    
+    def latest_run(self, runs_dir: Optional[Path] = None) -> Optional[Path]:
+        """
+        Most recently indexed run, optionally restricted to one directory.
+        
+        Returns:
+            Run directory, or None if the catalogue has no matching run
+        """
+        if runs_dir is None:
+            row = self.conn.execute(
+                "SELECT run_id FROM runs ORDER BY indexed_at DESC LIMIT 1"
+            ).fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT run_id FROM runs WHERE experiment_dir = ? ORDER BY indexed_at DESC LIMIT 1",
+                (str(Path(runs_dir).resolve()),),
+            ).fetchone()
+        return Path(row[0]) if row else None
+    
+    def summarize(self, group_by: str = "experiment_dir") -> List[Dict[str, Any]]:
+        """
+        Aggregate outcomes across all indexed runs in one query.
+        
+        Args:
+            group_by: experiment_dir or defense_hash
+        
+        Returns:
+            One dict per group with run counts, rates and averages
+        """
+        if group_by not in ("experiment_dir", "defense_hash"):
+            raise ValueError(f"Unsupported grouping: {group_by}")
+        
+        cursor = self.conn.execute(
+            f"""
+            SELECT {group_by} AS grp,
+                   MIN(defense_config) AS defense_config,
+                   COUNT(*) AS total_runs,
+                   SUM(termination_reason = 'explosion') AS explosion_count,
+                   AVG(termination_reason = 'explosion') AS explosion_rate,
+                   AVG(success) AS success_rate,
+                   AVG(total_messages) AS avg_messages,
+                   AVG(runtime_seconds) AS avg_runtime_seconds
+            FROM runs
+            GROUP BY {group_by}
+            ORDER BY {group_by}
+            """
+        )
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
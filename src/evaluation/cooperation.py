@@ -32,6 +32,7 @@ def calculate_cooperation_metrics(outcomes: List[Dict[str, Any]]) -> Dict[str, A
             "acceptance_rate": 0.0,
             "false_positive_rate": 0.0,
             "avg_steps_to_success": 0.0,
+            "avg_messages_per_run": 0.0,
         }
     
     total_runs = len(outcomes)
@@ -4,13 +4,20 @@ Message propagation analysis.
 Analyzes how adversarial prompts propagate through the multi-agent system:
 - Tracks message chains from injection point
 - Classifies message behavior levels (-2 to +2)
-- Builds propagation graph
+- Builds propagation graph (exact from caused_by links, or temporal for
+  older runs)
 """
 from pathlib import Path
 from typing import Dict, Any, List, Tuple, Optional
 import json
+from bisect import bisect_right
 from dataclasses import dataclass
-from collections import defaultdict
+from collections import defaultdict, deque
+
+from src.common.log_store import iter_run_log, load_run_log
+
+
+ADVERSARY = "[ADVERSARY]"
 
 
 @dataclass
@@ -34,6 +41,152 @@ class PropagationChain:
     depth: int  # How far the attack spread
 
 
+class PropagationIndex:
+    """
+    Sender-indexed propagation graph over integer message ids.
+    
+    Message i links to every later message sent by its receiver. Those
+    children are a suffix of the receiver's sorted position list, so the
+    graph is stored in CSR form (positions grouped by sender plus per-sender
+    offsets) in O(n) memory instead of as dense edge lists.
+    """
+    
+    def __init__(self, messages: List[Dict[str, Any]]):
+        agent_ids: Dict[Any, int] = {}
+        sender_ids = [agent_ids.setdefault(msg.get("sender"), len(agent_ids)) for msg in messages]
+        
+        # Receivers that never send have no children (-1)
+        self.receiver_ids = [agent_ids.get(msg.get("receiver", ""), -1) for msg in messages]
+        
+        # CSR layout: positions of agent a are positions[offsets[a]:offsets[a + 1]], ascending
+        counts = [0] * len(agent_ids)
+        for agent in sender_ids:
+            counts[agent] += 1
+        self.offsets = [0] * (len(agent_ids) + 1)
+        for agent, count in enumerate(counts):
+            self.offsets[agent + 1] = self.offsets[agent] + count
+        
+        self.positions = [0] * len(messages)
+        fill = self.offsets[:-1]
+        for i, agent in enumerate(sender_ids):
+            self.positions[fill[agent]] = i
+            fill[agent] += 1
+    
+    def children(self, i: int) -> List[int]:
+        """Ids of the messages sent by message i's receiver after it"""
+        agent = self.receiver_ids[i]
+        if agent < 0:
+            return []
+        lo, hi = self.offsets[agent], self.offsets[agent + 1]
+        return self.positions[bisect_right(self.positions, i, lo, hi):hi]
+    
+    def reachable(self, start: int) -> List[int]:
+        """
+        Breadth-first order of the messages reachable from start
+        
+        Every node reached through a receiver marks that receiver's whole
+        suffix, so per agent it is enough to remember where the marked suffix
+        begins; each message is enqueued at most once.
+        
+        Returns:
+            Message ids in BFS order, starting with start
+        """
+        order = [start]
+        marked_from = self.offsets[1:]  # per agent: first marked CSR slot
+        queue = deque([start])
+        
+        while queue:
+            i = queue.popleft()
+            agent = self.receiver_ids[i]
+            if agent < 0:
+                continue
+            end = marked_from[agent]
+            first = bisect_right(self.positions, i, self.offsets[agent], end)
+            for j in self.positions[first:end]:
+                if j != start:
+                    order.append(j)
+                    queue.append(j)
+            if first < end:
+                marked_from[agent] = first
+        
+        return order
+    
+    def to_adjacency(self) -> Dict[str, List[str]]:
+        """Dense adjacency list keyed by msg_<i> ids (quadratic in size)"""
+        graph = {}
+        for i in range(len(self.receiver_ids)):
+            children = self.children(i)
+            if children:
+                graph[f"msg_{i}"] = [f"msg_{j}" for j in children]
+        return graph
+
+
+class CausalPropagationIndex:
+    """
+    Exact propagation DAG from message ids and caused_by links.
+    
+    Message i links to the messages that list its id in caused_by. Children
+    are stored in CSR form (per-message offsets into one target list) in log
+    order, so building and traversing the graph is O(messages + links).
+    """
+    
+    def __init__(self, messages: List[Dict[str, Any]]):
+        positions = {msg["id"]: i for i, msg in enumerate(messages)}
+        links = [
+            (positions[parent_id], i)
+            for i, msg in enumerate(messages)
+            for parent_id in msg.get("caused_by") or ()
+            if parent_id in positions
+        ]
+        
+        counts = [0] * len(messages)
+        for parent, _ in links:
+            counts[parent] += 1
+        self.offsets = [0] * (len(messages) + 1)
+        for i, count in enumerate(counts):
+            self.offsets[i + 1] = self.offsets[i] + count
+        
+        # Links are generated in child order, so each child list stays ascending
+        self.targets = [0] * len(links)
+        fill = self.offsets[:-1]
+        for parent, child in links:
+            self.targets[fill[parent]] = child
+            fill[parent] += 1
+    
+    def children(self, i: int) -> List[int]:
+        """Ids of the messages caused by message i"""
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+    
+    def reachable(self, start: int) -> List[int]:
+        """
+        Breadth-first order of the messages reachable from start
+        
+        Returns:
+            Message ids in BFS order, starting with start
+        """
+        order = [start]
+        visited = {start}
+        queue = deque([start])
+        
+        while queue:
+            for j in self.children(queue.popleft()):
+                if j not in visited:
+                    visited.add(j)
+                    order.append(j)
+                    queue.append(j)
+        
+        return order
+    
+    def to_adjacency(self) -> Dict[str, List[str]]:
+        """Adjacency list keyed by msg_<i> ids"""
+        graph = {}
+        for i in range(len(self.offsets) - 1):
+            children = self.children(i)
+            if children:
+                graph[f"msg_{i}"] = [f"msg_{j}" for j in children]
+        return graph
+
+
 class PropagationAnalyzer:
     """Analyzes message propagation patterns."""
     
@@ -48,36 +201,40 @@ class PropagationAnalyzer:
         self.messages = self._load_messages()
         self.events = self._load_events()
         self.outcome = self._load_outcome()
+        self._index = None
+        self._behavior_levels: Dict[int, int] = {}
+        self._attacks: Optional[List[MessageNode]] = None
+        self._chains: Optional[List[PropagationChain]] = None
+        self._summary: Optional[Dict[str, Any]] = None
     
-    def _load_messages(self) -> List[Dict[str, Any]]:
-        """Load messages.jsonl."""
-        messages = []
-        messages_file = self.run_dir / "messages.jsonl"
-        
-        if not messages_file.exists():
-            return messages
-        
-        with open(messages_file, "r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    messages.append(json.loads(line))
+    @property
+    def is_causal(self) -> bool:
+        """True if every logged message carries its id and caused_by links"""
+        return bool(self.messages) and all("id" in msg and "caused_by" in msg for msg in self.messages)
+    
+    @property
+    def index(self):
+        """
+        Propagation graph index, built on first use
         
-        return messages
+        Uses the exact caused_by DAG when the run logged it; older runs fall
+        back to the temporal model (a message influences everything its
+        receiver sends afterwards).
+        """
+        if self._index is None:
+            if self.is_causal:
+                self._index = CausalPropagationIndex(self.messages)
+            else:
+                self._index = PropagationIndex(self.messages)
+        return self._index
+    
+    def _load_messages(self) -> List[Dict[str, Any]]:
+        """Load messages.jsonl (or messages.jsonl.zst)."""
+        return load_run_log(self.run_dir, "messages")
     
     def _load_events(self) -> List[Dict[str, Any]]:
-        """Load events.jsonl."""
-        events = []
-        events_file = self.run_dir / "events.jsonl"
-        
-        if not events_file.exists():
-            return events
-        
-        with open(events_file, "r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    events.append(json.loads(line))
-        
-        return events
+        """Load events.jsonl (or events.jsonl.zst)."""
+        return load_run_log(self.run_dir, "events")
     
     def _load_outcome(self) -> Dict[str, Any]:
         """Load outcomes.json."""
@@ -91,23 +248,15 @@ class PropagationAnalyzer:
     
     def find_attack_injections(self) -> List[MessageNode]:
         """Find all attack injection points."""
-        attacks = []
-        
-        for i, msg in enumerate(self.messages):
-            if msg.get("sender") == "[ADVERSARY]":
-                attacks.append(MessageNode(
-                    sender=msg["sender"],
-                    receiver=msg.get("receiver", "unknown"),
-                    content=msg.get("content", ""),
-                    step=i,
-                    message_id=f"msg_{i}",
-                    behavior_level=-2,  # Attack is maximally harmful
-                    is_attack=True,
-                ))
-        
-        return attacks
+        if self._attacks is None:
+            self._attacks = [
+                _attack_node(i, msg) for i, msg in enumerate(self.messages)
+                if msg.get("sender") == ADVERSARY
+            ]
+        return self._attacks
     
-    def classify_message_behavior(self, message: Dict[str, Any]) -> int:
+    @staticmethod
+    def classify_message_behavior(message: Dict[str, Any]) -> int:
         """
         Classify message behavior level.
         
@@ -122,7 +271,7 @@ class PropagationAnalyzer:
         sender = message.get("sender", "")
         
         # Attack messages
-        if sender == "[ADVERSARY]":
+        if sender == ADVERSARY:
             return -2
         
         # Explicit refusal/defense
@@ -152,6 +301,13 @@ class PropagationAnalyzer:
         # Default: neutral
         return 0
     
+    def _behavior_level(self, msg_idx: int) -> int:
+        """Behavior level of a message, classified once per run"""
+        level = self._behavior_levels.get(msg_idx)
+        if level is None:
+            level = self._behavior_levels[msg_idx] = self.classify_message_behavior(self.messages[msg_idx])
+        return level
+    
     def build_propagation_graph(self) -> Dict[str, List[str]]:
         """
         Build message propagation graph as adjacency list.
@@ -159,21 +315,8 @@ class PropagationAnalyzer:
         Returns:
             Dict mapping message_id -> [subsequent_message_ids]
         """
-        graph = defaultdict(list)
-        
-        # Simple temporal model: messages can influence subsequent messages
-        # to the same or different receivers
-        for i, msg in enumerate(self.messages):
-            msg_id = f"msg_{i}"
-            receiver = msg.get("receiver", "")
-            
-            # Find messages sent by this receiver afterwards
-            for j in range(i + 1, len(self.messages)):
-                next_msg = self.messages[j]
-                if next_msg.get("sender") == receiver:
-                    graph[msg_id].append(f"msg_{j}")
-        
-        return dict(graph)
+        # Exact caused_by links when logged, otherwise the temporal model
+        return self.index.to_adjacency()
     
     def trace_attack_propagation(self) -> List[PropagationChain]:
         """
@@ -182,43 +325,27 @@ class PropagationAnalyzer:
         Returns:
             List of propagation chains
         """
+        if self._chains is not None:
+            return self._chains
+        
         attacks = self.find_attack_injections()
-        graph = self.build_propagation_graph()
         chains = []
         
         for attack in attacks:
             propagated = []
-            visited = set()
-            queue = [attack.message_id]
             
-            # BFS from attack message
-            while queue:
-                msg_id = queue.pop(0)
-                if msg_id in visited:
-                    continue
-                visited.add(msg_id)
-                
-                # Get message data
-                msg_idx = int(msg_id.split("_")[1])
-                if msg_idx < len(self.messages):
-                    msg = self.messages[msg_idx]
-                    
-                    # Skip the original attack
-                    if msg_idx != attack.step:
-                        node = MessageNode(
-                            sender=msg.get("sender", ""),
-                            receiver=msg.get("receiver", ""),
-                            content=msg.get("content", ""),
-                            step=msg_idx,
-                            message_id=msg_id,
-                            behavior_level=self.classify_message_behavior(msg),
-                            is_attack=False,
-                        )
-                        propagated.append(node)
-                    
-                    # Add children
-                    for child_id in graph.get(msg_id, []):
-                        queue.append(child_id)
+            # BFS from attack message (the attack itself is not included)
+            for msg_idx in self.index.reachable(attack.step)[1:]:
+                msg = self.messages[msg_idx]
+                propagated.append(MessageNode(
+                    sender=msg.get("sender", ""),
+                    receiver=msg.get("receiver", ""),
+                    content=msg.get("content", ""),
+                    step=msg_idx,
+                    message_id=f"msg_{msg_idx}",
+                    behavior_level=self._behavior_level(msg_idx),
+                    is_attack=False,
+                ))
             
             chains.append(PropagationChain(
                 attack_message=attack,
@@ -227,28 +354,200 @@ class PropagationAnalyzer:
                 depth=len(propagated),
             ))
         
+        self._chains = chains
         return chains
     
     def generate_summary(self) -> Dict[str, Any]:
         """Generate propagation analysis summary."""
-        attacks = self.find_attack_injections()
-        chains = self.trace_attack_propagation()
+        if self._summary is None:
+            chains = self.trace_attack_propagation()
+            
+            # Count behavior levels in propagated messages
+            behavior_counts = defaultdict(int)
+            for chain in chains:
+                for msg in chain.propagated_messages:
+                    behavior_counts[msg.behavior_level] += 1
+            
+            self._summary = _build_summary(
+                total_messages=len(self.messages),
+                causal_links=self.is_causal,
+                attack_count=len(self.find_attack_injections()),
+                depths=[c.depth for c in chains],
+                led_to_explosion=any(c.led_to_explosion for c in chains),
+                behavior_counts=behavior_counts,
+            )
+        return self._summary
+
+
+class StreamingPropagationAnalyzer:
+    """
+    Single-pass propagation analysis over a streamed messages log.
+    
+    Messages are consumed one at a time and never held in memory. Every
+    attack keeps the set of agents it has reached, and every reached message
+    id maps to a bitmask of the attacks whose chains contain it. A record
+    with id and caused_by links is reached if one of its parents is; a record
+    without them falls back to the temporal model (reached if its sender
+    is). Chains therefore list their messages in log order rather than BFS
+    order; for fully linked or fully unlinked logs counts, depths and
+    behavior histograms are identical to PropagationAnalyzer.
+    
+    A message is only referenced while its receiver processes it, so reached
+    ids older than causal_window log records are dropped to bound memory.
+    """
+    
+    def __init__(self, run_dir: Path, keep_nodes: bool = False, causal_window: Optional[int] = 100_000):
+        """
+        Initialize analyzer with a run directory.
         
-        # Count behavior levels in propagated messages
+        Args:
+            run_dir: Path to simulation run directory
+            keep_nodes: Keep propagated MessageNodes in the chains (memory
+                grows with the chains); otherwise only counts are kept
+            causal_window: Log records after which a reached message id can
+                no longer be a parent (None keeps every id)
+        """
+        self.run_dir = run_dir
+        self.keep_nodes = keep_nodes
+        self.causal_window = causal_window
+        self._summary: Optional[Dict[str, Any]] = None
+        self._chains: Optional[List[PropagationChain]] = None
+    
+    def _load_outcome(self) -> Dict[str, Any]:
+        outcome_file = self.run_dir / "outcomes.json"
+        if not outcome_file.exists():
+            return {}
+        with open(outcome_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    
+    def _run(self) -> None:
+        """Consume the messages log once and build chains and summary."""
+        attacks: List[MessageNode] = []
+        reached_agents: List[set] = []
+        depths: List[int] = []
+        nodes: List[List[MessageNode]] = []
         behavior_counts = defaultdict(int)
-        for chain in chains:
-            for msg in chain.propagated_messages:
-                behavior_counts[msg.behavior_level] += 1
-        
-        return {
-            "total_messages": len(self.messages),
-            "attack_injections": len(attacks),
-            "propagation_chains": len(chains),
-            "total_propagated_messages": sum(len(c.propagated_messages) for c in chains),
-            "led_to_explosion": any(c.led_to_explosion for c in chains),
-            "max_propagation_depth": max((c.depth for c in chains), default=0),
-            "behavior_distribution": dict(behavior_counts),
-            "avg_propagation_depth": (
-                sum(c.depth for c in chains) / len(chains) if chains else 0.0
-            ),
-        }
+        # Reached message id -> bitmask of attack chains, oldest ids first
+        reached_ids: Dict[str, int] = {}
+        id_positions: deque = deque()
+        causal = True
+        total = 0
+        
+        for i, msg in enumerate(iter_run_log(self.run_dir, "messages")):
+            total += 1
+            sender = msg.get("sender")
+            receiver = msg.get("receiver", "")
+            msg_id = msg.get("id")
+            linked = msg_id is not None and "caused_by" in msg
+            causal = causal and linked
+            
+            if linked:
+                mask = 0
+                for parent in msg["caused_by"] or ():
+                    mask |= reached_ids.get(parent, 0)
+            else:
+                mask = sum(1 << k for k, agents in enumerate(reached_agents) if sender in agents)
+            
+            if mask:
+                level = PropagationAnalyzer.classify_message_behavior(msg)
+                for k in range(mask.bit_length()):
+                    if not mask >> k & 1:
+                        continue
+                    reached_agents[k].add(receiver)
+                    depths[k] += 1
+                    behavior_counts[level] += 1
+                    if self.keep_nodes:
+                        nodes[k].append(MessageNode(
+                            sender=msg.get("sender", ""),
+                            receiver=receiver,
+                            content=msg.get("content", ""),
+                            step=i,
+                            message_id=f"msg_{i}",
+                            behavior_level=level,
+                            is_attack=False,
+                        ))
+            
+            if sender == ADVERSARY:
+                mask |= 1 << len(attacks)
+                attacks.append(_attack_node(i, msg))
+                reached_agents.append({receiver})
+                depths.append(0)
+                nodes.append([])
+            
+            if mask and msg_id is not None:
+                reached_ids[msg_id] = mask
+                id_positions.append((i, msg_id))
+            if self.causal_window is not None:
+                while id_positions and id_positions[0][0] <= i - self.causal_window:
+                    reached_ids.pop(id_positions.popleft()[1], None)
+        
+        led_to_explosion = self._load_outcome().get("termination_reason") == "explosion"
+        self._chains = [
+            PropagationChain(
+                attack_message=attack,
+                propagated_messages=chain_nodes,
+                led_to_explosion=led_to_explosion,
+                depth=depth,
+            )
+            for attack, chain_nodes, depth in zip(attacks, nodes, depths)
+        ]
+        self._summary = _build_summary(
+            total_messages=total,
+            causal_links=causal and total > 0,
+            attack_count=len(attacks),
+            depths=depths,
+            led_to_explosion=led_to_explosion and bool(attacks),
+            behavior_counts=behavior_counts,
+        )
+    
+    def trace_attack_propagation(self) -> List[PropagationChain]:
+        """
+        Propagation chains (propagated_messages is empty unless keep_nodes).
+        
+        Returns:
+            List of propagation chains
+        """
+        if self._chains is None:
+            self._run()
+        return self._chains
+    
+    def generate_summary(self) -> Dict[str, Any]:
+        """Generate propagation analysis summary."""
+        if self._summary is None:
+            self._run()
+        return self._summary
+
+
+def _attack_node(i: int, msg: Dict[str, Any]) -> MessageNode:
+    """Node for an attack injection at log position i."""
+    return MessageNode(
+        sender=msg["sender"],
+        receiver=msg.get("receiver", "unknown"),
+        content=msg.get("content", ""),
+        step=i,
+        message_id=f"msg_{i}",
+        behavior_level=-2,  # Attack is maximally harmful
+        is_attack=True,
+    )
+
+
+def _build_summary(
+    total_messages: int,
+    causal_links: bool,
+    attack_count: int,
+    depths: List[int],
+    led_to_explosion: bool,
+    behavior_counts: Dict[int, int],
+) -> Dict[str, Any]:
+    """Summary dict shared by the batch and streaming analyzers."""
+    return {
+        "total_messages": total_messages,
+        "causal_links": causal_links,
+        "attack_injections": attack_count,
+        "propagation_chains": len(depths),
+        "total_propagated_messages": sum(depths),
+        "led_to_explosion": led_to_explosion,
+        "max_propagation_depth": max(depths, default=0),
+        "behavior_distribution": dict(behavior_counts),
+        "avg_propagation_depth": sum(depths) / len(depths) if depths else 0.0,
+    }
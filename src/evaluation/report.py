@@ -9,6 +9,7 @@ import json
 import csv
 from datetime import datetime
 
+from .catalog import RunCatalog
 from .robustness import calculate_robustness_metrics, load_batch_outcomes
 from .cooperation import calculate_cooperation_metrics, calculate_defense_overhead
 
@@ -17,6 +18,7 @@ def generate_evaluation_report(
     experiment_dirs: Dict[str, Path],
     output_file: Path,
     format: str = "csv",
+    catalog_db: Optional[Path] = None,
 ) -> None:
     """
     Generate a comprehensive evaluation report comparing multiple experiments.
@@ -27,21 +29,28 @@ def generate_evaluation_report(
                                "VAX_ACTIVE": Path("outputs/batch/vax_active")}
         output_file: Path to write report to
         format: Output format ("csv", "json", or "markdown")
+        catalog_db: Optional run catalogue to load outcomes from
+                    (falls back to reading outcomes.json files)
     """
     results = {}
-    
-    # Collect metrics for each defense strategy
-    for strategy_name, exp_dir in experiment_dirs.items():
-        outcomes = load_batch_outcomes(exp_dir)
-        
-        robustness = calculate_robustness_metrics(outcomes)
-        cooperation = calculate_cooperation_metrics(outcomes)
-        
-        results[strategy_name] = {
-            "defense_strategy": strategy_name,
-            "robustness": robustness,
-            "cooperation": cooperation,
-        }
+    catalog = RunCatalog(catalog_db) if catalog_db and Path(catalog_db).exists() else None
+    
+    try:
+        # Collect metrics for each defense strategy
+        for strategy_name, exp_dir in experiment_dirs.items():
+            outcomes = load_batch_outcomes(exp_dir, catalog=catalog)
+            
+            robustness = calculate_robustness_metrics(outcomes)
+            cooperation = calculate_cooperation_metrics(outcomes)
+            
+            results[strategy_name] = {
+                "defense_strategy": strategy_name,
+                "robustness": robustness,
+                "cooperation": cooperation,
+            }
+    finally:
+        if catalog is not None:
+            catalog.close()
     
     # Write report in requested format
     if format == "csv":
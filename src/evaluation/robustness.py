@@ -6,9 +6,11 @@ Key metric:
 - Lower explosion rate = better robustness
 """
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import json
 
+from .catalog import RunCatalog
+
 
 def calculate_robustness_metrics(outcomes: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
@@ -95,7 +97,10 @@ def load_outcomes_from_directory(run_dir: Path) -> Dict[str, Any]:
         return json.load(f)
 
 
-def load_batch_outcomes(experiment_dir: Path) -> List[Dict[str, Any]]:
+def load_batch_outcomes(
+    experiment_dir: Path,
+    catalog: Optional[RunCatalog] = None,
+) -> List[Dict[str, Any]]:
     """
     Load all outcomes from a batch experiment directory.
     
@@ -107,12 +112,19 @@ def load_batch_outcomes(experiment_dir: Path) -> List[Dict[str, Any]]:
             outcomes.json
         ...
     
+    If a run catalogue is given, outcomes are read from it (runs it has not
+    indexed yet are added) instead of parsing every outcomes.json.
+    
     Args:
         experiment_dir: Path to experiment directory containing multiple runs
+        catalog: Optional run catalogue to query first
         
     Returns:
         List of outcome dictionaries
     """
+    if catalog is not None:
+        return catalog.load_outcomes(experiment_dir)
+    
     outcomes = []
     
     # Find all subdirectories with outcomes.json
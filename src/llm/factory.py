@@ -1,38 +1,193 @@
 """LLM factory for creating language model instances"""
 
+import asyncio
 import os
-from typing import Optional
+import weakref
+from typing import Any, Dict, Optional, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 
+# Providers served through the OpenAI-compatible client
+OPENAI_COMPATIBLE_PROVIDERS = ("openai", "deepseek", "qwen")
+
+# Defaults for the pooled HTTP client shared by cached LLM instances
+DEFAULT_HTTP_POOL = {
+    "max_connections": 100,
+    "max_keepalive_connections": 20,
+    "keepalive_expiry": 30.0,
+    "timeout": 60.0,
+}
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits, server errors
+TRANSIENT_STATUS_CODES = (408, 409, 429, 500, 502, 503, 504)
+
+# Client errors raised before any status arrives (connection failures and
+# timeouts), matched by name so no provider SDK has to be installed:
+# openai.APIConnectionError (incl. APITimeoutError), httpx.TransportError
+TRANSIENT_ERROR_NAMES = ("APIConnectionError", "TransportError")
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Whether a failed LLM call may succeed if retried
+    
+    Timeouts, connection errors, rate limits and 5xx responses are
+    transient; everything else (authentication, invalid requests, bugs)
+    fails again on retry.
+    
+    Args:
+        error: Exception raised by the LLM call
+        
+    Returns:
+        True if the call is worth retrying
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status in TRANSIENT_STATUS_CODES or status >= 500
+    
+    return any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__)
+
+
+class _LoopClients:
+    """LLM instances and the pooled HTTP client owned by one event loop"""
+    
+    def __init__(self):
+        self.http_client = None
+        self.llms: Dict[Tuple, Any] = {}
+
+
+# One cache per event loop: pooled connections cannot be shared across loops
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopClients]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """Return the running event loop, or None when called from sync code"""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _resolve_base_url(provider: str) -> Optional[str]:
+    """Base URL a provider's client will talk to"""
+    if provider == "openai":
+        return os.getenv("OPENAI_BASE_URL")
+    if provider == "deepseek":
+        return "https://api.deepseek.com"
+    if provider == "qwen":
+        return os.getenv("QWEN_BASE_URL", "https://dashscope.aliyuncs.com/compatible-mode/v1")
+    if provider == "ollama":
+        return os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    return None
+
+
+def _get_http_client(loop_clients: _LoopClients, http_pool: Optional[Dict[str, Any]]):
+    """
+    Get the pooled async HTTP client for the running loop
+    
+    The first caller's pool settings win; all cached LLM instances on the
+    loop share its keep-alive connections.
+    """
+    if loop_clients.http_client is None:
+        import httpx
+        
+        pool = {**DEFAULT_HTTP_POOL, **(http_pool or {})}
+        loop_clients.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=pool["max_connections"],
+                max_keepalive_connections=pool["max_keepalive_connections"],
+                keepalive_expiry=pool["keepalive_expiry"],
+            ),
+            timeout=pool["timeout"],
+        )
+    return loop_clients.http_client
+
+
 def create_llm(
     provider: str = "openai",
     model: str = "gpt-4",
     temperature: float = 0.7,
     max_tokens: int = 2000,
+    http_pool: Optional[Dict[str, Any]] = None,
+    mock_config: Optional[Dict[str, Any]] = None,
+    cache: bool = True,
     **kwargs
 ):
     """
     Create an LLM instance based on provider
     
+    Inside a running event loop, instances are cached per
+    (provider, model, base_url, temperature, max_tokens) and OpenAI-compatible
+    providers share one pooled async HTTP client, so agents and simulations on
+    the same loop reuse warm connections. Call close_llm_clients() on shutdown.
+    
     Args:
-        provider: LLM provider (openai, deepseek, qwen, ollama)
+        provider: LLM provider (openai, deepseek, qwen, ollama, mock)
         model: Model name
         temperature: Sampling temperature
         max_tokens: Maximum tokens to generate
-        **kwargs: Additional provider-specific arguments
+        http_pool: Optional pool settings (max_connections,
+            max_keepalive_connections, keepalive_expiry, timeout)
+        mock_config: Settings for the mock provider (see MockChatModel)
+        cache: Reuse a cached instance when possible
+        **kwargs: Additional provider-specific arguments (disables caching)
         
     Returns:
         LangChain LLM instance
     """
+    if provider == "mock":
+        # Offline model for load testing; cheap to build, so never cached
+        from src.llm.mock import MockChatModel
+        
+        return MockChatModel.from_config(model=model, mock_config=mock_config)
+    
+    loop = _running_loop()
+    if not cache or kwargs or loop is None:
+        return _build_llm(provider, model, temperature, max_tokens, **kwargs)
+    
+    loop_clients = _clients.get(loop)
+    if loop_clients is None:
+        loop_clients = _clients[loop] = _LoopClients()
+    
+    key = (provider, model, _resolve_base_url(provider), temperature, max_tokens)
+    if key not in loop_clients.llms:
+        if provider in OPENAI_COMPATIBLE_PROVIDERS:
+            kwargs["http_async_client"] = _get_http_client(loop_clients, http_pool)
+        loop_clients.llms[key] = _build_llm(provider, model, temperature, max_tokens, **kwargs)
+    
+    return loop_clients.llms[key]
+
+
+async def close_llm_clients() -> None:
+    """Close the pooled HTTP client and drop cached LLMs for the running loop"""
+    loop_clients = _clients.pop(asyncio.get_running_loop(), None)
+    if loop_clients is not None and loop_clients.http_client is not None:
+        await loop_clients.http_client.aclose()
+
+
+def _build_llm(
+    provider: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    **kwargs
+):
+    """Construct a new, uncached LLM instance for a provider"""
     if provider == "openai":
         from langchain_openai import ChatOpenAI
         
         api_key = os.getenv("OPENAI_API_KEY")
-        base_url = os.getenv("OPENAI_BASE_URL")
+        base_url = _resolve_base_url(provider)
         
         return ChatOpenAI(
             model=model,
@@ -53,7 +208,7 @@ def create_llm(
             temperature=temperature,
             max_tokens=max_tokens,
             api_key=api_key,
-            base_url="https://api.deepseek.com",
+            base_url=_resolve_base_url(provider),
             **kwargs
         )
     
@@ -61,7 +216,7 @@ def create_llm(
         from langchain_openai import ChatOpenAI
         
         api_key = os.getenv("QWEN_API_KEY")
-        base_url = os.getenv("QWEN_BASE_URL", "https://dashscope.aliyuncs.com/compatible-mode/v1")
+        base_url = _resolve_base_url(provider)
         
         return ChatOpenAI(
             model=model,
@@ -75,7 +230,7 @@ def create_llm(
     elif provider == "ollama":
         from langchain_community.chat_models import ChatOllama
         
-        base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        base_url = _resolve_base_url(provider)
         
         return ChatOllama(
             model=model,
@@ -103,4 +258,6 @@ def create_llm_from_config(config: dict):
         model=config.get("model", "gpt-4"),
         temperature=config.get("temperature", 0.7),
         max_tokens=config.get("max_tokens", 2000),
+        http_pool=config.get("http_pool"),
+        mock_config=config.get("mock"),
     )
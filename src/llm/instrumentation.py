@@ -0,0 +1,79 @@
+"""Per-call LLM instrumentation: cost and run-level aggregation"""
+
+from typing import Any, Dict, List, Optional
+
+
+# Per-call fields summarised with percentiles
+TIMED_FIELDS = ("latency_s", "queue_wait_s", "rate_limit_wait_s", "input_tokens", "output_tokens", "cached_tokens")
+
+# Per-call fields summed over a run
+TOTAL_FIELDS = ("input_tokens", "output_tokens", "cached_tokens", "tool_calls", "retries", "cost_usd")
+
+
+def call_cost(usage: Optional[Dict[str, int]], pricing: Optional[Dict[str, float]]) -> Optional[float]:
+    """
+    Cost of one call in USD
+    
+    Args:
+        usage: Token usage (input_tokens, cached_tokens, output_tokens)
+        pricing: USD per million tokens: input, cached_input (defaults to
+            input), output
+    
+    Returns:
+        Cost, or None without usage or pricing
+    """
+    if not usage or not pricing:
+        return None
+    
+    cached = usage.get("cached_tokens", 0)
+    input_price = pricing.get("input", 0.0)
+    cached_price = pricing.get("cached_input", input_price)
+    return (
+        (usage.get("input_tokens", 0) - cached) * input_price
+        + cached * cached_price
+        + usage.get("output_tokens", 0) * pricing.get("output", 0.0)
+    ) / 1_000_000
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile (None for an empty list)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize_llm_calls(calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Aggregate LLM_CALL records
+    
+    Args:
+        calls: Per-call records (the details of LLM_CALL events)
+    
+    Returns:
+        Dict with call, failure, retry and response cache hit counts, totals
+        of tokens, tool calls and cost, and mean/p50/p90/p99/max of
+        latencies, waits and tokens (None where no call reported the field)
+    """
+    summary: Dict[str, Any] = {
+        "calls": len(calls),
+        "failed": sum(1 for call in calls if not call.get("success", True)),
+        "response_cache_hits": sum(1 for call in calls if call.get("response_cache_hit")),
+    }
+    
+    for field in TOTAL_FIELDS:
+        values = [call[field] for call in calls if call.get(field) is not None]
+        summary[f"total_{field}"] = sum(values) if values else None
+    
+    for field in TIMED_FIELDS:
+        values = [call[field] for call in calls if call.get(field) is not None]
+        summary[field] = {
+            "mean": sum(values) / len(values) if values else None,
+            "p50": percentile(values, 50),
+            "p90": percentile(values, 90),
+            "p99": percentile(values, 99),
+            "max": max(values, default=None),
+        }
+    
+    return summary
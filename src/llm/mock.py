@@ -0,0 +1,212 @@
+"""Deterministic mock chat model for load testing without a live LLM service"""
+
+import asyncio
+import hashlib
+import itertools
+import json
+import random
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from src.common.constants import AGENT_NAMES
+from src.llm.tokens import count_message_tokens, count_tokens
+
+
+LATENCY_DISTRIBUTIONS = ("none", "constant", "uniform", "normal", "lognormal", "exponential")
+
+# Chemicals used in run_code calls; none of these form a dangerous pair
+SAFE_CHEMICALS = ["copper nitrate", "trimesic acid", "ethanol", "dimethylformamide", "water"]
+DANGEROUS_CHEMICALS = ["bleach", "ammonia"]
+
+_SELF_PATTERN = re.compile(r"^You are (\w+)", re.MULTILINE)
+_SENDER_PATTERN = re.compile(r"^\[From ([^\]]+)\]")
+
+# Digests of every message-aligned prompt prefix seen in this process, shared
+# by all mock models the way a provider's prefix cache is shared by all callers
+_PREFIX_CACHE: "OrderedDict[bytes, None]" = OrderedDict()
+PREFIX_CACHE_MAX_ENTRIES = 100_000
+
+
+class MockChatModel(BaseChatModel):
+    """
+    Rule-based or scripted chat model returning tool calls
+    
+    Each response is drawn from a generator seeded by (seed, prompt), so the
+    same prompt always gets the same reply regardless of how agents and
+    simulations interleave. Rules:
+    - with run_code bound, call it with probability run_code_probability
+      (dangerous chemicals with probability dangerous_probability)
+    - with send_message bound, message fan_out other agents, so the
+      conversation never dies out
+    - without tools, reply with plain text
+    
+    When `script` is given, its entries (dicts with content and optional
+    tool_calls) are returned in order, cycling, instead of the rules.
+    
+    Responses carry usage_metadata like a real provider's: prompt tokens are
+    counted as for memory budgets, and cache_read is the token count of the
+    longest message-aligned prefix any mock model has already been sent,
+    emulating provider prefix caching so prompt layouts can be compared
+    offline.
+    """
+    
+    model: str = "mock"
+    seed: int = 0
+    fan_out: int = 1
+    agents: List[str] = AGENT_NAMES
+    run_code_probability: float = 0.1
+    dangerous_probability: float = 0.0
+    latency: Dict[str, Any] = {"distribution": "none"}
+    script: Optional[List[Dict[str, Any]]] = None
+    
+    _script_position: Any = None
+    
+    def model_post_init(self, __context: Any) -> None:
+        distribution = self.latency.get("distribution", "none")
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self._script_position = itertools.count()
+    
+    @property
+    def _llm_type(self) -> str:
+        return "mock"
+    
+    @classmethod
+    def from_config(cls, model: str = "mock", mock_config: Optional[Dict[str, Any]] = None) -> "MockChatModel":
+        """
+        Create a mock model from the `mock` block of an LLM config
+        
+        Args:
+            model: Model name (only recorded)
+            mock_config: Dict with seed, fan_out, agents, run_code_probability,
+                dangerous_probability, latency, script
+        
+        Returns:
+            MockChatModel instance
+        """
+        return cls(model=model, **(mock_config or {}))
+    
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        """Bind tools; only their names are used to pick a rule"""
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+    
+    def _rng_for(self, messages: List[BaseMessage]) -> random.Random:
+        """Generator seeded by the mock seed and the prompt contents"""
+        digest = hashlib.sha256(str(self.seed).encode("utf-8"))
+        for message in messages:
+            digest.update(str(message.content).encode("utf-8"))
+        return random.Random(digest.hexdigest())
+    
+    def sample_latency(self, rng: random.Random) -> float:
+        """Draw one response latency in seconds"""
+        config = self.latency
+        distribution = config.get("distribution", "none")
+        
+        if distribution == "constant":
+            value = config.get("seconds", 0.0)
+        elif distribution == "uniform":
+            value = rng.uniform(config.get("min_s", 0.0), config.get("max_s", 0.1))
+        elif distribution == "normal":
+            value = rng.gauss(config.get("mean_s", 0.05), config.get("stddev_s", 0.01))
+        elif distribution == "lognormal":
+            value = rng.lognormvariate(config.get("mu", -3.0), config.get("sigma", 0.5))
+        elif distribution == "exponential":
+            value = rng.expovariate(1.0 / config.get("mean_s", 0.05))
+        else:
+            value = 0.0
+        
+        return max(0.0, value)
+    
+    def _respond(self, messages: List[BaseMessage], rng: random.Random, tools: List[Dict[str, Any]]) -> AIMessage:
+        """Build the response for a prompt"""
+        if self.script:
+            entry = self.script[next(self._script_position) % len(self.script)]
+            return AIMessage(content=entry.get("content", ""), tool_calls=entry.get("tool_calls", []))
+        
+        tool_names = {tool["function"]["name"] for tool in tools}
+        last = str(messages[-1].content) if messages else ""
+        call_id = f"call_{rng.getrandbits(32):08x}"
+        tool_calls = []
+        
+        if "run_code" in tool_names and rng.random() < self.run_code_probability:
+            dangerous = rng.random() < self.dangerous_probability
+            chemicals = DANGEROUS_CHEMICALS if dangerous else rng.sample(SAFE_CHEMICALS, 2)
+            tool_calls.append({
+                "name": "run_code",
+                "args": {
+                    "code": f"mix({chemicals!r})",
+                    "description": "Mock experiment",
+                    "chemicals": list(chemicals)
+                },
+                "id": f"{call_id}_code"
+            })
+        
+        if "send_message" in tool_names:
+            own_name = _SELF_PATTERN.search(str(messages[0].content))
+            candidates = [name for name in self.agents if not own_name or name != own_name.group(1)]
+            receivers = rng.sample(candidates, min(self.fan_out, len(candidates)))
+            sender = _SENDER_PATTERN.match(last)
+            summary = f"Re: {sender.group(1) if sender else 'task'} - {last[:80]}"
+            tool_calls.extend(
+                {
+                    "name": "send_message",
+                    "args": {"receiver": receiver, "content": summary},
+                    "id": f"{call_id}_{i}"
+                }
+                for i, receiver in enumerate(receivers)
+            )
+        
+        if tool_calls:
+            return AIMessage(content="", tool_calls=tool_calls)
+        return AIMessage(content=f"Acknowledged: {last[:80]}")
+    
+    def _with_usage(self, messages: List[BaseMessage], message: AIMessage) -> AIMessage:
+        """Attach usage_metadata, with cache reads from the shared prefix cache"""
+        digest = hashlib.sha256()
+        input_tokens = cached_tokens = 0
+        for lc_message in messages:
+            content = str(lc_message.content)
+            digest.update(f"{lc_message.type}\0{content}\0".encode("utf-8"))
+            input_tokens += count_message_tokens(content)
+            key = digest.digest()
+            if key in _PREFIX_CACHE:
+                cached_tokens = input_tokens
+                _PREFIX_CACHE.move_to_end(key)
+            else:
+                _PREFIX_CACHE[key] = None
+        while len(_PREFIX_CACHE) > PREFIX_CACHE_MAX_ENTRIES:
+            _PREFIX_CACHE.popitem(last=False)
+        
+        output_tokens = count_tokens(str(message.content))
+        if message.tool_calls:
+            output_tokens += count_tokens(json.dumps([call["args"] for call in message.tool_calls]))
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "input_token_details": {"cache_read": cached_tokens},
+        }
+        return message
+    
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        rng = self._rng_for(messages)
+        delay = self.sample_latency(rng)
+        if delay:
+            time.sleep(delay)
+        message = self._with_usage(messages, self._respond(messages, rng, kwargs.get("tools", [])))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+    
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        rng = self._rng_for(messages)
+        delay = self.sample_latency(rng)
+        if delay:
+            await asyncio.sleep(delay)
+        message = self._with_usage(messages, self._respond(messages, rng, kwargs.get("tools", [])))
+        return ChatResult(generations=[ChatGeneration(message=message)])
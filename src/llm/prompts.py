@@ -1,11 +1,25 @@
 """Prompt construction utilities"""
 
-from typing import List, Dict, Any, Optional
-from jinja2 import Template
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
 from src.common.types import Message, MessageRole
 
 
+PROMPT_TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "agents" / "prompt_templates"
+
+# Prompt layouts:
+# default: the agent's name opens the system prompt; history messages are
+#   sent without the "[From sender]" tag their incoming turn carried
+# prefix: everything shared by a role (description, team, tools, defense
+#   text) comes first and the name last, and history repeats each message
+#   exactly as it was sent, so every prompt extends the previous one and
+#   provider prefix caches hit across turns and same-role agents
+PROMPT_LAYOUTS = ("default", "prefix")
+
+
 def build_system_prompt(
     base_prompt: str,
     defense_instruction: Optional[str] = None
@@ -28,18 +42,51 @@ def build_system_prompt(
     return prompt
 
 
+def format_incoming_content(msg: Message) -> str:
+    """Content of an incoming message as the LLM sees it, tagged with its sender"""
+    if msg.sender:
+        return f"[From {msg.sender}]: {msg.content}"
+    return msg.content
+
+
+def to_langchain_message(msg: Message, layout: str = "default") -> Optional[BaseMessage]:
+    """
+    Convert a memory message to its LangChain form
+    
+    Args:
+        msg: Message from an agent's memory
+        layout: Prompt layout (see PROMPT_LAYOUTS); prefix keeps the sender tag
+        
+    Returns:
+        HumanMessage or AIMessage, or None for SYSTEM and TOOL messages
+        (their content is already covered by the system prompt)
+    """
+    if msg.role == MessageRole.USER:
+        if layout == "prefix":
+            return HumanMessage(content=format_incoming_content(msg))
+        return HumanMessage(content=msg.content)
+    elif msg.role == MessageRole.ASSISTANT:
+        return AIMessage(content=msg.content)
+    return None
+
+
 def build_messages_for_llm(
     system_prompt: str,
-    memory: List[Message],
-    incoming_message: Optional[Message] = None
+    memory: Optional[List[Message]] = None,
+    incoming_message: Optional[Message] = None,
+    history: Optional[Sequence[BaseMessage]] = None,
+    layout: str = "default"
 ) -> List:
     """
     Build message list for LLM invocation
     
     Args:
         system_prompt: System prompt
-        memory: List of previous messages (agent's memory)
+        memory: List of previous messages (agent's memory), converted here
         incoming_message: Current incoming message to process
+        history: Already converted memory (MemoryStore.get_langchain_messages()),
+            used by reference instead of converting memory
+        layout: Prompt layout used to convert memory
         
     Returns:
         List of LangChain messages (SystemMessage, HumanMessage, AIMessage)
@@ -50,25 +97,51 @@ def build_messages_for_llm(
     messages.append(SystemMessage(content=system_prompt))
     
     # Add memory messages
-    for msg in memory:
-        if msg.role == MessageRole.USER:
-            messages.append(HumanMessage(content=msg.content))
-        elif msg.role == MessageRole.ASSISTANT:
-            messages.append(AIMessage(content=msg.content))
-        # Skip SYSTEM and TOOL messages in memory (already in system prompt)
+    if history is not None:
+        messages.extend(history)
+    else:
+        for msg in memory or []:
+            lc_message = to_langchain_message(msg, layout)
+            if lc_message is not None:
+                messages.append(lc_message)
     
     # Add incoming message
     if incoming_message:
         # Format with sender information
-        content = incoming_message.content
-        if incoming_message.sender:
-            content = f"[From {incoming_message.sender}]: {content}"
-        
-        messages.append(HumanMessage(content=content))
+        messages.append(HumanMessage(content=format_incoming_content(incoming_message)))
     
     return messages
 
 
+@lru_cache(maxsize=None)
+def get_template_environment(templates_dir: Path = PROMPT_TEMPLATES_DIR) -> Environment:
+    """
+    Process-wide Jinja2 environment for the prompt templates
+    
+    Loaded templates stay compiled in the environment for the life of the
+    process, and the bytecode cache lets later worker processes skip
+    compilation as well. Template files do not change during a batch, so
+    auto_reload (a stat per lookup) is off.
+    
+    Args:
+        templates_dir: Directory holding the .jinja2 templates
+        
+    Returns:
+        Shared Environment (default options, so output matches jinja2.Template)
+    """
+    return Environment(
+        loader=FileSystemLoader(str(templates_dir)),
+        bytecode_cache=FileSystemBytecodeCache(),
+        auto_reload=False
+    )
+
+
+@lru_cache(maxsize=128)
+def _compile_template(template_str: str) -> Template:
+    """Compile a template string once per process"""
+    return get_template_environment().from_string(template_str)
+
+
 def render_template(template_str: str, **kwargs) -> str:
     """
     Render a Jinja2 template with given variables
@@ -80,44 +153,52 @@ def render_template(template_str: str, **kwargs) -> str:
     Returns:
         Rendered string
     """
-    template = Template(template_str)
-    return template.render(**kwargs)
+    return _compile_template(template_str).render(**kwargs)
+
+
+def render_template_file(name: str, **kwargs) -> str:
+    """
+    Render a template from the prompt templates directory
+    
+    Args:
+        name: Template file name (e.g. base_system.jinja2)
+        **kwargs: Template variables
+        
+    Returns:
+        Rendered string
+    """
+    return get_template_environment().get_template(name).render(**kwargs)
 
 
 def truncate_memory(
     messages: List[Message],
     max_length: int = 50,
-    strategy: str = "recent"
+    strategy: str = "recent",
+    max_tokens: Optional[int] = None
 ) -> List[Message]:
     """
     Truncate memory to prevent context overflow
     
+    Replays the messages through a MemoryStore, so the result is exactly what
+    an agent configured the same way would hold. Vaccine examples
+    (metadata source "vaccine") are pinned.
+    
     Args:
         messages: List of messages
         max_length: Maximum number of messages to keep
         strategy: Truncation strategy (recent, summary, smart)
+        max_tokens: Optional token budget
         
     Returns:
-        Truncated message list
+        Truncated message list; summary and smart may include one summary
+        message (metadata source "summary") standing in for evicted messages
     """
-    if len(messages) <= max_length:
-        return messages
-    
-    if strategy == "recent":
-        # Keep only the most recent N messages
-        return messages[-max_length:]
-    
-    elif strategy == "summary":
-        # TODO: Implement summarization
-        # For now, fall back to recent
-        return messages[-max_length:]
+    # Imported here: the memory store builds on this module
+    from src.agents.memory.store import MemoryStore
     
-    elif strategy == "smart":
-        # TODO: Implement smart truncation
-        # Keep important messages (e.g., first few + recent)
-        keep_first = max_length // 4
-        keep_recent = max_length - keep_first
-        return messages[:keep_first] + messages[-keep_recent:]
-    
-    else:
-        return messages[-max_length:]
+    store = MemoryStore(max_length=max_length, max_tokens=max_tokens, strategy=strategy)
+    store.prepend([m for m in messages if m.metadata.get("source") == "vaccine"])
+    for message in messages:
+        if message.metadata.get("source") != "vaccine":
+            store.append(message)
+    return store.get_all()
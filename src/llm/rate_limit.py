@@ -0,0 +1,179 @@
+"""Client-side rate limiting shared by all LLM calls to a provider"""
+
+import asyncio
+import time
+import weakref
+from typing import Any, Dict, Optional, Union
+
+
+class ProviderRateLimiter:
+    """
+    Token bucket plus concurrency cap for one LLM provider
+
+    All agents of all simulations running on the same event loop share one
+    limiter per provider, so multiplexed simulations saturate the API quota
+    without exceeding it.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        requests_per_minute: Optional[float] = None,
+        burst: Optional[int] = None
+    ):
+        """
+        Initialize rate limiter
+
+        Args:
+            max_concurrency: Maximum number of in-flight requests (None = unlimited)
+            requests_per_minute: Sustained request rate (None = unlimited)
+            burst: Bucket size, i.e. requests allowed back-to-back (defaults to 1)
+        """
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.burst = max(1, burst or 1)
+
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self._rate = requests_per_minute / 60.0 if requests_per_minute else None
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._bucket_lock = asyncio.Lock()
+
+    async def _take_token(self) -> None:
+        """Wait until the bucket holds a token, then consume it"""
+        if self._rate is None:
+            return
+
+        async with self._bucket_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self._rate)
+                self._last_refill = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    async def acquire(self) -> float:
+        """
+        Acquire permission for one request
+
+        Returns:
+            Seconds spent waiting for the limiter
+        """
+        start = time.monotonic()
+        if self._semaphore is not None:
+            await self._semaphore.acquire()
+        try:
+            await self._take_token()
+        except BaseException:
+            self.release()
+            raise
+        return time.monotonic() - start
+
+    def release(self) -> None:
+        """Release the concurrency slot taken by acquire()"""
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    async def __aenter__(self) -> "ProviderRateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+    def __repr__(self) -> str:
+        return (
+            f"ProviderRateLimiter(max_concurrency={self.max_concurrency}, "
+            f"requests_per_minute={self.requests_per_minute}, burst={self.burst})"
+        )
+
+
+# One registry per event loop: asyncio primitives cannot be shared across loops
+_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, ProviderRateLimiter]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _loop_rate_limiter(provider: str, rate_limit_config: Dict[str, Any]) -> ProviderRateLimiter:
+    """Limiter for a provider on the running event loop, created on first use"""
+    loop_limiters = _limiters.setdefault(asyncio.get_running_loop(), {})
+
+    if provider not in loop_limiters:
+        loop_limiters[provider] = ProviderRateLimiter(
+            max_concurrency=rate_limit_config.get("max_concurrency"),
+            requests_per_minute=rate_limit_config.get("requests_per_minute"),
+            burst=rate_limit_config.get("burst")
+        )
+
+    return loop_limiters[provider]
+
+
+class LazyRateLimiter:
+    """
+    Handle on a provider's shared limiter, for code running outside a loop
+
+    Agents can be built before the event loop that runs them exists; the
+    limiter of whichever loop is running is looked up on every acquire and
+    release.
+    """
+
+    def __init__(self, provider: str, rate_limit_config: Dict[str, Any]):
+        self.provider = provider
+        self.rate_limit_config = rate_limit_config
+
+    def resolve(self) -> ProviderRateLimiter:
+        """Shared limiter of the running event loop"""
+        return _loop_rate_limiter(self.provider, self.rate_limit_config)
+
+    async def acquire(self) -> float:
+        return await self.resolve().acquire()
+
+    def release(self) -> None:
+        self.resolve().release()
+
+    async def __aenter__(self) -> ProviderRateLimiter:
+        limiter = self.resolve()
+        await limiter.acquire()
+        return limiter
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+    def __repr__(self) -> str:
+        return f"LazyRateLimiter(provider={self.provider!r})"
+
+
+def get_rate_limiter(
+    provider: str,
+    rate_limit_config: Optional[Dict[str, Any]] = None
+) -> Optional[Union[ProviderRateLimiter, LazyRateLimiter]]:
+    """
+    Get the shared rate limiter for a provider on the running event loop
+
+    The first call for a provider creates the limiter from the given
+    config; later calls return the same instance. Called outside a running
+    loop, it returns a LazyRateLimiter that resolves the limiter when first
+    awaited.
+
+    Args:
+        provider: LLM provider name (e.g. qwen, openai)
+        rate_limit_config: Dict with max_concurrency, requests_per_minute, burst
+
+    Returns:
+        Shared ProviderRateLimiter (or a LazyRateLimiter for it), or None if
+        no limits are configured
+    """
+    if not rate_limit_config:
+        return None
+    if not rate_limit_config.get("max_concurrency") and not rate_limit_config.get("requests_per_minute"):
+        return None
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return LazyRateLimiter(provider, rate_limit_config)
+    return _loop_rate_limiter(provider, rate_limit_config)
@@ -0,0 +1,431 @@
+"""Record/replay cache for LLM responses"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ("record", "replay", "read_through")
+
+
+class ResponseCacheMiss(KeyError):
+    """Raised in replay mode when a request has no recorded response"""
+
+
+class ResponseCacheStore:
+    """
+    On-disk store of LLM responses backed by SQLite
+    
+    Responses are stored as LangChain message dicts, so tool calls survive
+    the round trip, and keyed by prompt hash. Recorded runs also trace the
+    prompt key of every call by (run, agent, call index) and the order in
+    which agents took their dispatch turns (see ResponseCacheRun). WAL mode
+    lets several worker processes share one file.
+    """
+    
+    def __init__(self, path: Path):
+        """
+        Open (or create) a response store
+        
+        Args:
+            path: SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        
+        self._conn = sqlite3.connect(str(self.path), timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, model TEXT, response TEXT, created_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS calls ("
+            "run_key TEXT, agent TEXT, call_index INTEGER, key TEXT, "
+            "PRIMARY KEY (run_key, agent, call_index))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS turns ("
+            "run_key TEXT, agent TEXT, turn_index INTEGER, seq INTEGER, "
+            "PRIMARY KEY (run_key, agent, turn_index))"
+        )
+        self._conn.commit()
+        
+        # Hits are kept in memory so repeated lookups skip SQLite
+        self._memo: Dict[str, BaseMessage] = {}
+    
+    def get(self, key: str) -> Optional[BaseMessage]:
+        """Return the recorded response for a key, or None"""
+        if key in self._memo:
+            return self._memo[key]
+        
+        row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        
+        response = messages_from_dict([json.loads(row[0])])[0]
+        self._memo[key] = response
+        return response
+    
+    def put(self, key: str, model: str, response: BaseMessage) -> None:
+        """Record a response, replacing any earlier one for the key"""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, model, response, created_at) VALUES (?, ?, ?, ?)",
+            (key, model, json.dumps(messages_to_dict([response])[0]), time.time())
+        )
+        self._conn.commit()
+        self._memo[key] = response
+    
+    def get_call(self, run_key: str, agent: str, call_index: int) -> Optional[str]:
+        """Prompt key of a traced call, or None"""
+        row = self._conn.execute(
+            "SELECT key FROM calls WHERE run_key = ? AND agent = ? AND call_index = ?",
+            (run_key, agent, call_index)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def put_call(self, run_key: str, agent: str, call_index: int, key: str) -> None:
+        """Trace a call, replacing any earlier trace of the same call"""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO calls (run_key, agent, call_index, key) VALUES (?, ?, ?, ?)",
+            (run_key, agent, call_index, key)
+        )
+        self._conn.commit()
+    
+    def get_turn(self, run_key: str, agent: str, turn_index: int) -> Optional[int]:
+        """Position of a recorded dispatch turn in the run, or None"""
+        row = self._conn.execute(
+            "SELECT seq FROM turns WHERE run_key = ? AND agent = ? AND turn_index = ?",
+            (run_key, agent, turn_index)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def put_turn(self, run_key: str, agent: str, turn_index: int, seq: int) -> None:
+        """Record a dispatch turn, replacing any earlier record of it"""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO turns (run_key, agent, turn_index, seq) VALUES (?, ?, ?, ?)",
+            (run_key, agent, turn_index, seq)
+        )
+        self._conn.commit()
+    
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+    
+    def close(self) -> None:
+        """Close the database connection"""
+        self._conn.close()
+
+
+def _message_fingerprint(message: BaseMessage) -> Dict[str, Any]:
+    """Fields of a message that determine the response (ids excluded)"""
+    fingerprint = {"type": message.type, "content": message.content}
+    if getattr(message, "tool_calls", None):
+        fingerprint["tool_calls"] = [
+            {"name": tc.get("name"), "args": tc.get("args")} for tc in message.tool_calls
+        ]
+    return fingerprint
+
+
+def make_cache_key(
+    model_params: Dict[str, Any],
+    messages: List[BaseMessage],
+    tool_schemas: List[Dict[str, Any]],
+    bind_kwargs: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Stable hash of everything that determines an LLM response
+    
+    Args:
+        model_params: Provider, model and sampling parameters
+        messages: Rendered LangChain messages (build_messages_for_llm output)
+        tool_schemas: OpenAI-format schemas of the bound tools
+        bind_kwargs: Extra keyword arguments passed to bind_tools
+    
+    Returns:
+        Hex digest
+    """
+    payload = {
+        "model": model_params,
+        "messages": [_message_fingerprint(m) for m in messages],
+        "tools": tool_schemas,
+        "bind": bind_kwargs or {},
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def make_run_key(scope: Dict[str, Any]) -> str:
+    """Stable hash of everything that identifies a run for its call trace"""
+    encoded = json.dumps(scope, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCacheRun:
+    """
+    Call trace and dispatch order of one simulation using the response cache
+    
+    Prompts depend on how agents interleaved, and a cache hit returns without
+    the suspensions of a live call, so neither prompt keys nor scheduling
+    reproduce a recorded run by themselves. Within a run:
+    - calls are keyed by (agent, call index), so every agent gets its
+      recorded responses whatever the interleaving; the prompt key is kept
+      as a check (CachedLLM.prompt_mismatches)
+    - everything that changes shared state (dequeueing a message, handling
+      an LLM response, injecting the attack) happens one at a time, in
+      dispatch turns. Recording stores the order of the turns; replay starts
+      them in that order, which reproduces the recorded messages log.
+    """
+    
+    def __init__(self, run_key: str, store: ResponseCacheStore, mode: str, turn_timeout_s: float = 1.0):
+        """
+        Initialize run trace state
+        
+        Args:
+            run_key: Identifies the run in the store (see make_run_key)
+            store: Response store holding the trace
+            mode: Response cache mode (one of CACHE_MODES)
+            turn_timeout_s: Longest a replayed turn waits for the turns
+                recorded before it; past that it starts anyway (the run has
+                diverged from the recording)
+        """
+        self.run_key = run_key
+        self.store = store
+        self.mode = mode.replace("-", "_")
+        self.turn_timeout_s = turn_timeout_s
+        
+        self.call_counts: Dict[str, int] = defaultdict(int)
+        self.turn_counts: Dict[str, int] = defaultdict(int)
+        self.turns_started = 0
+        self._dispatch = asyncio.Lock()
+    
+    def next_call_index(self, agent: str) -> int:
+        """Index of the agent's next LLM call"""
+        index = self.call_counts[agent]
+        self.call_counts[agent] += 1
+        return index
+    
+    async def _wait_for_start(self, seq: int) -> None:
+        """
+        Wait until the turns recorded before seq have started
+        
+        Turns start in other tasks without notifying this one, so the wait
+        yields to the event loop until the turn comes.
+        """
+        deadline = time.monotonic() + self.turn_timeout_s
+        while self.turns_started < seq:
+            if time.monotonic() > deadline:
+                logger.warning(f"Dispatch turn {seq} of run {self.run_key[:16]} started out of order")
+                break
+            await asyncio.sleep(0)
+    
+    @asynccontextmanager
+    async def turn(self, name: str):
+        """
+        Dispatch turn of an agent (or the supervisor)
+        
+        Args:
+            name: Name of the agent taking the turn
+        """
+        turn_index = self.turn_counts[name]
+        self.turn_counts[name] += 1
+        
+        seq = self.store.get_turn(self.run_key, name, turn_index) if self.mode != "record" else None
+        if seq is not None:
+            await self._wait_for_start(seq)
+        
+        async with self._dispatch:
+            if seq is None and self.mode != "replay":
+                self.store.put_turn(self.run_key, name, turn_index, self.turns_started)
+            self.turns_started += 1
+            yield
+
+
+class CachedLLM:
+    """
+    Wrapper around an LLM that records or replays its responses
+    
+    Modes:
+    - record: always call the LLM and store the response
+    - replay: only serve stored responses; a miss raises ResponseCacheMiss
+    - read_through: serve stored responses, call and store on a miss
+    
+    With a run and agent name, calls are traced by (run, agent, call index)
+    (see ResponseCacheRun); the prompt key then only serves as a check, and
+    as the lookup for untraced calls. Without
+    them, responses are found by prompt key alone, which is exact only when
+    the agents see the same message histories. Served responses carry
+    response_metadata["response_cache_hit"] = True.
+    """
+    
+    def __init__(
+        self,
+        llm,
+        store: ResponseCacheStore,
+        mode: str,
+        model_params: Dict[str, Any],
+        tool_schemas: Optional[List[Dict[str, Any]]] = None,
+        bind_kwargs: Optional[Dict[str, Any]] = None,
+        agent: Optional[str] = None,
+        run: Optional[ResponseCacheRun] = None
+    ):
+        """
+        Initialize cached LLM
+        
+        Args:
+            llm: LangChain LLM (or runnable with tools bound)
+            store: Response store
+            mode: One of CACHE_MODES
+            model_params: Provider, model and sampling parameters for the key
+            tool_schemas: Schemas of the bound tools (set by bind_tools)
+            bind_kwargs: Extra bind_tools arguments (set by bind_tools)
+            agent: Name of the agent making the calls
+            run: Trace state of the simulation the agent belongs to
+        """
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown response cache mode: {mode}")
+        
+        self.llm = llm
+        self.store = store
+        self.mode = mode
+        self.model_params = model_params
+        self.tool_schemas = tool_schemas or []
+        self.bind_kwargs = bind_kwargs or {}
+        self.agent = agent
+        self.run = run
+        
+        self.hits = 0
+        self.misses = 0
+        # Traced hits whose prompt differs from the recorded one
+        self.prompt_mismatches = 0
+    
+    def bind_tools(self, tools, **kwargs) -> "CachedLLM":
+        """Bind tools on the wrapped LLM and keep their schemas for the cache key"""
+        # Replay never calls the LLM, so it works without a real client
+        bound = self.llm.bind_tools(tools, **kwargs) if self.mode != "replay" else self.llm
+        return CachedLLM(
+            bound,
+            self.store,
+            self.mode,
+            self.model_params,
+            tool_schemas=[convert_to_openai_tool(tool) for tool in tools],
+            bind_kwargs=kwargs,
+            agent=self.agent,
+            run=self.run
+        )
+    
+    async def ainvoke(self, messages: List[BaseMessage], **kwargs):
+        """Return the recorded response or invoke the wrapped LLM"""
+        key = make_cache_key(self.model_params, messages, self.tool_schemas, {**self.bind_kwargs, **kwargs})
+        traced = self.run is not None and self.agent is not None
+        call_index = self.run.next_call_index(self.agent) if traced else None
+        
+        if self.mode != "record":
+            recorded_key = self.store.get_call(self.run.run_key, self.agent, call_index) if traced else None
+            response = self.store.get(recorded_key or key)
+            if response is not None:
+                if recorded_key is not None and recorded_key != key:
+                    self.prompt_mismatches += 1
+                self.hits += 1
+                # Flag the copy so callers know no provider call was made
+                return response.model_copy(update={
+                    "response_metadata": {**response.response_metadata, "response_cache_hit": True}
+                })
+            if self.mode == "replay":
+                raise ResponseCacheMiss(f"No recorded LLM response for key {key[:16]}")
+        
+        self.misses += 1
+        response = await self.llm.ainvoke(messages, **kwargs)
+        self.store.put(key, self.model_params.get("model", ""), response)
+        if traced:
+            self.store.put_call(self.run.run_key, self.agent, call_index, key)
+        return response
+
+
+# One open store per database file in this process
+_stores: Dict[Path, ResponseCacheStore] = {}
+
+
+def get_response_store(path: Path) -> ResponseCacheStore:
+    """Get the shared store for a database file"""
+    path = Path(path).resolve()
+    if path not in _stores:
+        _stores[path] = ResponseCacheStore(path)
+    return _stores[path]
+
+
+def response_cache_model_params(llm_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Provider, model and sampling parameters that key cached responses"""
+    return {
+        "provider": llm_config.get("provider", "openai"),
+        "model": llm_config.get("model", "gpt-4"),
+        "temperature": llm_config.get("temperature", 0.7),
+        "max_tokens": llm_config.get("max_tokens", 2000),
+    }
+
+
+def wrap_with_response_cache(
+    llm,
+    llm_config: Dict[str, Any],
+    agent: Optional[str] = None,
+    run: Optional[ResponseCacheRun] = None
+):
+    """
+    Wrap an LLM in a CachedLLM if llm_config enables the response cache
+    
+    Args:
+        llm: LangChain LLM instance
+        llm_config: LLM configuration; reads the response_cache block
+            (mode, path)
+        agent: Name of the agent the LLM belongs to
+        run: Trace state of the agent's simulation, so it can be replayed
+            call by call
+    
+    Returns:
+        CachedLLM, or the LLM unchanged when the cache is disabled
+    """
+    cache_config = llm_config.get("response_cache") or {}
+    mode = cache_config.get("mode")
+    if not mode:
+        return llm
+    
+    store = get_response_store(Path(cache_config.get("path", "outputs/llm_cache/responses.sqlite")))
+    return CachedLLM(
+        llm, store, mode.replace("-", "_"), response_cache_model_params(llm_config), agent=agent, run=run
+    )
+
+
+def create_response_cache_run(
+    llm_config: Dict[str, Any],
+    scope: Dict[str, Any]
+) -> Optional[ResponseCacheRun]:
+    """
+    Create the trace state of a simulation if llm_config enables the cache
+    
+    Args:
+        llm_config: LLM configuration; reads the response_cache block
+        scope: What identifies the run (seed, defense, task, agents); the
+            model parameters are added to it
+    
+    Returns:
+        ResponseCacheRun, or None when the cache is disabled
+    """
+    cache_config = llm_config.get("response_cache") or {}
+    mode = cache_config.get("mode")
+    if not mode:
+        return None
+    
+    store = get_response_store(Path(cache_config.get("path", "outputs/llm_cache/responses.sqlite")))
+    run_key = make_run_key({**scope, "model": response_cache_model_params(llm_config)})
+    return ResponseCacheRun(run_key, store, mode)
@@ -0,0 +1,93 @@
+"""Token counting for prompt budgets"""
+
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# Chat formats add a few tokens of framing per message (role, separators)
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name: str = DEFAULT_ENCODING):
+    """
+    Load a tiktoken encoding once per process
+    
+    tiktoken downloads the BPE ranks on first use, so an offline machine
+    without a warm cache cannot load them; counting then falls back to
+    approximating tokens as characters / 4.
+    
+    Args:
+        encoding_name: tiktoken encoding name
+    
+    Returns:
+        Encoding, or None if it cannot be loaded
+    """
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logger.warning(f"tiktoken encoding {encoding_name} unavailable ({e.__class__.__name__}), "
+                       f"approximating tokens as characters / 4")
+        return None
+
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    """
+    Count the tokens of a text
+    
+    Args:
+        text: Text to count
+        encoding_name: tiktoken encoding name
+    
+    Returns:
+        Token count (exact with tiktoken, otherwise characters / 4 rounded up)
+    """
+    encoding = get_encoding(encoding_name)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(content: Optional[str], encoding_name: str = DEFAULT_ENCODING) -> int:
+    """Tokens one chat message adds to a prompt, framing included"""
+    return count_tokens(content or "", encoding_name) + MESSAGE_TOKEN_OVERHEAD
+
+
+def usage_from_response(response: Any) -> Optional[Dict[str, int]]:
+    """
+    Token usage reported by the provider for one response
+    
+    Cached prompt tokens come from LangChain's usage_metadata
+    (input_token_details.cache_read, filled from OpenAI-style
+    prompt_tokens_details.cached_tokens), or from DeepSeek's
+    prompt_cache_hit_tokens in the raw token usage.
+    
+    Args:
+        response: AIMessage returned by the LLM
+    
+    Returns:
+        Dict with input_tokens, cached_tokens and output_tokens, or None if
+        the response carries no usage
+    """
+    usage = getattr(response, "usage_metadata", None)
+    token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    if not usage and not token_usage:
+        return None
+    
+    usage = usage or {}
+    cached = (usage.get("input_token_details") or {}).get("cache_read")
+    if cached is None:
+        cached = ((token_usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+                  or token_usage.get("prompt_cache_hit_tokens") or 0)
+    
+    return {
+        "input_tokens": usage.get("input_tokens", token_usage.get("prompt_tokens", 0)) or 0,
+        "cached_tokens": cached or 0,
+        "output_tokens": usage.get("output_tokens", token_usage.get("completion_tokens", 0)) or 0,
+    }
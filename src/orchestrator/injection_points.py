@@ -1,9 +1,11 @@
 """Injection point management for orchestrator"""
 
-from typing import Dict, TYPE_CHECKING
+import random
+from typing import Dict, Optional, TYPE_CHECKING
 from src.attacks.schedule import AttackScheduler
 from src.attacks.injector import AttackInjector
 from src.common.logging import SimulationLogger
+from src.common.utils import make_rng
 
 if TYPE_CHECKING:
     from src.agents.runtime.agent_runtime import AgentRuntime
@@ -19,7 +21,8 @@ class InjectionPointManager:
         agents: Dict[str, 'AgentRuntime'],
         logger: SimulationLogger,
         inject_after_messages: int = 2,
-        seed: int = 42
+        seed: int = 42,
+        rng: Optional[random.Random] = None
     ):
         """
         Initialize injection point manager
@@ -29,13 +32,16 @@ class InjectionPointManager:
             logger: Simulation logger
             inject_after_messages: Number of messages before injection
             seed: Random seed
+            rng: Random generator owned by the simulation (derived from seed
+                if not given)
         """
         self.agents = agents
         self.logger = logger
         self.seed = seed
+        self.rng = rng if rng is not None else make_rng(seed, "attacks")
         
         self.scheduler = AttackScheduler(inject_after_messages)
-        self.injector = AttackInjector(agents, logger)
+        self.injector = AttackInjector(agents, logger, rng=self.rng)
     
     async def check_and_inject(self, total_dequeued: int, current_step: int) -> bool:
         """
@@ -49,10 +55,7 @@ class InjectionPointManager:
             True if attack was injected
         """
         if self.scheduler.should_inject(total_dequeued):
-            await self.injector.inject_attack(
-                step=current_step,
-                seed=self.seed
-            )
+            await self.injector.inject_attack(step=current_step)
             self.scheduler.mark_injected(current_step)
             return True
         
@@ -1,7 +1,7 @@
 """Lifecycle management and termination conditions"""
 
 import time
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
 from src.agents.runtime.agent_runtime import AgentRuntime
 from src.common.types import TerminationReason
 
@@ -40,6 +40,17 @@ class LifecycleManager:
         self.termination_reason = None
         self.explosion_occurred = False
         self.explosion_details = None
+        
+        self._termination_listeners: List[Callable[[], None]] = []
+    
+    def add_termination_listener(self, callback: Callable[[], None]) -> None:
+        """
+        Register a callback fired as soon as an explosion forces termination
+        
+        Args:
+            callback: Zero-argument function
+        """
+        self._termination_listeners.append(callback)
     
     def start(self) -> None:
         """Mark simulation start"""
@@ -51,6 +62,10 @@ class LifecycleManager:
         self.total_dequeued += 1
         self.last_activity_time = time.time()
     
+    def record_message_enqueued(self) -> None:
+        """Record that a message was enqueued (counts as activity for deadlock detection)"""
+        self.last_activity_time = time.time()
+    
     def record_explosion(self, details: Dict) -> None:
         """
         Record that an explosion occurred
@@ -62,6 +77,9 @@ class LifecycleManager:
         self.explosion_details = details
         self.terminated = True
         self.termination_reason = TerminationReason.EXPLOSION
+        
+        for callback in self._termination_listeners:
+            callback()
     
     def check_termination(self) -> bool:
         """
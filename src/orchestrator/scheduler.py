@@ -1,21 +1,34 @@
 """Parallel scheduler for running multiple agents concurrently"""
 
 import asyncio
-from typing import Dict, Callable, Optional
+from typing import Dict, Callable, Optional, TYPE_CHECKING
 from src.agents.runtime.agent_runtime import AgentRuntime
 from src.common.logging import SimulationLogger
 
+if TYPE_CHECKING:
+    from src.orchestrator.supervisor import SimulationSupervisor
+
+
+SCHEDULER_MODES = ("event", "polling")
+
 
 class ParallelScheduler:
     """
     Scheduler for running multiple agents in parallel using asyncio
+    
+    Two worker modes are supported:
+    - event: workers block on their agent's queue and are woken the moment a
+      message is enqueued; termination is broadcast through a shared stop event
+    - polling: legacy mode, workers poll the queue and sleep 100 ms when idle
     """
     
     def __init__(
         self,
         agents: Dict[str, AgentRuntime],
         logger: SimulationLogger,
-        step_counter: Dict[str, int]
+        step_counter: Dict[str, int],
+        mode: str = "event",
+        idle_check_interval: float = 0.5
     ):
         """
         Initialize scheduler
@@ -24,13 +37,31 @@ class ParallelScheduler:
             agents: Dictionary of agent name -> AgentRuntime
             logger: Simulation logger
             step_counter: Shared step counter
+            mode: Worker mode ("event" or "polling")
+            idle_check_interval: In event mode, how often (seconds) the stop
+                condition is re-evaluated while no messages are flowing, so
+                time limits and deadlocks are still detected
         """
+        if mode not in SCHEDULER_MODES:
+            raise ValueError(f"Unknown scheduler mode: {mode}")
+        
         self.agents = agents
         self.logger = logger
         self.step_counter = step_counter
+        self.mode = mode
+        self.idle_check_interval = idle_check_interval
         
         self.worker_tasks = []
         self.is_running = False
+        self.stop_event: Optional[asyncio.Event] = None
+    
+    async def _evaluate(self, should_stop) -> bool:
+        """Evaluate a sync or async stop condition (None defers to the stop event)"""
+        if should_stop is None:
+            return self.stop_event.is_set()
+        if asyncio.iscoroutinefunction(should_stop):
+            return await should_stop()
+        return should_stop()
     
     async def agent_worker(
         self,
@@ -38,32 +69,30 @@ class ParallelScheduler:
         should_stop
     ) -> None:
         """
-        Worker coroutine for a single agent
+        Worker coroutine for a single agent (polling mode)
         
         Args:
             agent: AgentRuntime instance
-            should_stop: Async function or regular function that returns True when worker should stop
+            should_stop: Async function or regular function that returns True when worker
+                should stop, or None when a supervisor owns termination
         """
         agent.is_running = True
         
         while True:
             # Check stop condition (support both sync and async)
-            if asyncio.iscoroutinefunction(should_stop):
-                stop = await should_stop()
-            else:
-                stop = should_stop()
+            stop = await self._evaluate(should_stop)
             
             if stop:
                 break
             
             try:
                 # Try to process one message
-                processed = await agent.step(self.step_counter["current_step"])
+                processed = await agent.step(self._step_number(should_stop))
                 
                 if not processed:
                     # Queue was empty, sleep briefly
                     await asyncio.sleep(0.1)
-                
+            
             except Exception as e:
                 self.logger.error(f"Worker error for {agent.name}: {e}")
                 await asyncio.sleep(0.5)
@@ -71,27 +100,130 @@ class ParallelScheduler:
         agent.is_running = False
         self.logger.info(f"Agent {agent.name} worker stopped")
     
+    def _step_number(self, should_stop) -> Optional[int]:
+        """
+        Step number to hand to AgentRuntime.step
+        
+        Under a supervisor the step is assigned when the message is dequeued,
+        so the agent resolves it itself.
+        """
+        if should_stop is None:
+            return None
+        return self.step_counter["current_step"]
+    
+    async def _wait_for_work(self, agent: AgentRuntime) -> bool:
+        """
+        Block until the agent has a message or the stop event is set
+        
+        Returns:
+            True if a message is ready, False if the scheduler is stopping
+        """
+        if self.stop_event.is_set():
+            return False
+        if not agent.queue.empty():
+            return True
+        
+        message_ready = asyncio.ensure_future(agent.queue.wait_for_message())
+        stopping = asyncio.ensure_future(self.stop_event.wait())
+        try:
+            await asyncio.wait({message_ready, stopping}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in (message_ready, stopping):
+                if not waiter.done():
+                    waiter.cancel()
+        
+        return not self.stop_event.is_set()
+    
+    async def event_agent_worker(
+        self,
+        agent: AgentRuntime,
+        should_stop
+    ) -> None:
+        """
+        Worker coroutine for a single agent (event mode)
+        
+        Sleeps on the agent's queue instead of polling it, so a message is
+        picked up as soon as it is enqueued.
+        
+        Args:
+            agent: AgentRuntime instance
+            should_stop: Async function or regular function that returns True when simulation
+                should stop, or None when a supervisor owns termination
+        """
+        agent.is_running = True
+        
+        while await self._wait_for_work(agent):
+            if should_stop is not None and await self._evaluate(should_stop):
+                self.stop_event.set()
+                break
+            
+            try:
+                await agent.step(self._step_number(should_stop))
+            except Exception as e:
+                self.logger.error(f"Worker error for {agent.name}: {e}")
+        
+        agent.is_running = False
+        self.logger.info(f"Agent {agent.name} worker stopped")
+    
+    async def idle_watchdog(self, should_stop) -> None:
+        """
+        Re-evaluate the stop condition while the system is quiet (event mode)
+        
+        Workers only check the stop condition when they wake up, so this task
+        covers time limits and deadlocks when no messages are flowing.
+        
+        Args:
+            should_stop: Async function or regular function that returns True when simulation should stop
+        """
+        while not self.stop_event.is_set():
+            try:
+                await asyncio.wait_for(self.stop_event.wait(), timeout=self.idle_check_interval)
+            except asyncio.TimeoutError:
+                if await self._evaluate(should_stop):
+                    self.stop_event.set()
+    
     async def run(
         self,
-        should_stop,
-        max_time: Optional[float] = None
+        should_stop=None,
+        max_time: Optional[float] = None,
+        supervisor: Optional['SimulationSupervisor'] = None
     ) -> None:
         """
         Run all agent workers in parallel
         
         Args:
-            should_stop: Async function or regular function that returns True when simulation should stop
+            should_stop: Async function or regular function that returns True when simulation
+                should stop; leave as None when a supervisor is given
             max_time: Optional maximum time in seconds
+            supervisor: Optional supervisor task that owns termination and
+                signals workers through the shared stop event
         """
+        if should_stop is None and supervisor is None:
+            raise ValueError("Either should_stop or supervisor is required")
+        
         self.is_running = True
+        self.stop_event = asyncio.Event()
         
         # Create worker tasks for each agent
-        self.worker_tasks = [
-            asyncio.create_task(self.agent_worker(agent, should_stop))
-            for agent in self.agents.values()
-        ]
+        if self.mode == "event":
+            self.worker_tasks = [
+                asyncio.create_task(self.event_agent_worker(agent, should_stop))
+                for agent in self.agents.values()
+            ]
+        else:
+            self.worker_tasks = [
+                asyncio.create_task(self.agent_worker(agent, should_stop))
+                for agent in self.agents.values()
+            ]
+        
+        if supervisor is not None:
+            watchdog = asyncio.create_task(supervisor.run(self.stop_event))
+        elif self.mode == "event":
+            watchdog = asyncio.create_task(self.idle_watchdog(should_stop))
+        else:
+            watchdog = None
         
-        self.logger.info(f"Started {len(self.worker_tasks)} agent workers")
+        self.logger.info(f"Started {len(self.worker_tasks)} agent workers ({self.mode} mode)")
         
         # Wait for all workers to complete or timeout
         try:
@@ -107,11 +239,17 @@ class ParallelScheduler:
             self.logger.warning(f"Scheduler timed out after {max_time}s")
         
         finally:
+            self.stop_event.set()
+            if watchdog is not None:
+                await asyncio.gather(watchdog, return_exceptions=True)
             self.is_running = False
             self.logger.info("All agent workers completed")
     
     def stop(self) -> None:
         """Stop all workers"""
+        if self.stop_event is not None:
+            self.stop_event.set()
+        
         for task in self.worker_tasks:
             if not task.done():
                 task.cancel()
@@ -4,13 +4,16 @@ import asyncio
 from pathlib import Path
 from typing import Dict, Any, Optional
 
-from src.common.types import Message, MessageRole, Event, EventType, Outcome
+from src.common.types import Message, MessageRole, Event, EventType, Outcome, seed_message_ids
 from src.common.logging import SimulationLogger
-from src.common.utils import set_random_seed, get_timestamp, ensure_dir, load_json, save_json
+from src.common.utils import make_rng, get_timestamp, ensure_dir, load_json, save_json
 from src.agents.runtime.agent_factory import AgentFactory
 from src.orchestrator.scheduler import ParallelScheduler
 from src.orchestrator.lifecycle import LifecycleManager
 from src.orchestrator.injection_points import InjectionPointManager
+from src.orchestrator.supervisor import SimulationSupervisor
+from src.evaluation.catalog import RunCatalog
+from src.llm.instrumentation import summarize_llm_calls
 
 
 class Simulation:
@@ -37,9 +40,10 @@ class Simulation:
             seed: Random seed for reproducibility
             output_dir: Output directory for logs
         """
-        # Set random seed
-        set_random_seed(seed)
+        # No global seeding: every random draw comes from generators owned by
+        # this simulation, so runs sharing a process stay reproducible per seed
         self.seed = seed
+        self.rng = make_rng(seed)
         
         # Configurations
         self.llm_config = llm_config
@@ -53,7 +57,7 @@ class Simulation:
         self.output_dir = ensure_dir(output_dir)
         
         # Initialize logger
-        self.logger = SimulationLogger(self.output_dir)
+        self.logger = SimulationLogger(self.output_dir, sim_config.get("log_writer"))
         
         # Shared state
         self.step_counter = {"current_step": 0}
@@ -78,14 +82,30 @@ class Simulation:
             deadlock_timeout_s=self.sim_config.get("deadlock_timeout_s", 10)
         )
         
-        factory = AgentFactory(
+        self.agent_factory = factory = AgentFactory(
             llm_config=self.llm_config,
             logger=self.logger,
             step_counter=self.step_counter,
-            lifecycle_manager=self.lifecycle
+            lifecycle_manager=self.lifecycle,
+            memory_config={
+                "max_length": self.sim_config.get("max_memory_length", 50),
+                "max_tokens": self.sim_config.get("max_memory_tokens"),
+                "strategy": self.sim_config.get("memory_truncate_strategy", "recent"),
+                "summarizer": self.sim_config.get("memory_summarizer", "extractive"),
+                "max_summary_lines": self.sim_config.get("max_summary_lines", 8)
+            },
+            response_cache_scope={
+                "seed": self.seed,
+                "defense_config": self.defense_config,
+                "task_file": self.sim_config.get("task_file"),
+                "agents": self.sim_config.get("agents")
+            }
         )
         
-        self.agents = factory.create_all_agents(defense_config=self.defense_config)
+        self.agents = factory.create_all_agents(
+            defense_config=self.defense_config,
+            agent_specs=self.sim_config.get("agents")
+        )
         
         # Update lifecycle with agents
         self.lifecycle.agents = self.agents
@@ -134,11 +154,18 @@ class Simulation:
         Returns:
             Outcome object with simulation results
         """
+        # Message ids are derived from this run's seed and each sender's own
+        # count, so they (and the caused_by links built from them) are
+        # reproducible per seed whatever order the agents run in
+        seed_message_ids(self.seed)
+        
         # Initialize agents
         self.initialize_agents()
         
         # Inject initial task
-        await self.inject_initial_task()
+        await self.inject_initial_task(
+            self.sim_config.get("task_file", "data/tasks/lab_task_mof.json")
+        )
         
         # Lifecycle already created in initialize_agents
         self.lifecycle.start()
@@ -148,40 +175,51 @@ class Simulation:
             agents=self.agents,
             logger=self.logger,
             inject_after_messages=2,  #论文要求：第2条消息后注入
-            seed=self.seed
+            seed=self.seed,
+            rng=self.rng
         )
         
         # Create scheduler
         self.scheduler = ParallelScheduler(
             agents=self.agents,
             logger=self.logger,
-            step_counter=self.step_counter
+            step_counter=self.step_counter,
+            mode=self.sim_config.get("scheduler_mode", "event"),
+            idle_check_interval=self.sim_config.get("idle_check_interval_s", 0.5)
         )
         
-        # Define termination check
-        async def should_stop() -> bool:
-            # Increment step counter
-            self.step_counter["current_step"] += 1
-            
-            # Update lifecycle with dequeued count
-            total_dequeued = sum(agent.queue.total_dequeued for agent in self.agents.values())
-            self.lifecycle.total_dequeued = total_dequeued
-            
-            # Check and inject attack if needed
-            await self.injection_manager.check_and_inject(
-                total_dequeued=total_dequeued,
-                current_step=self.step_counter["current_step"]
-            )
-            
-            # Check termination
-            return self.lifecycle.check_termination()
+        # Supervisor owns step accounting, attack injection and termination
+        supervisor = SimulationSupervisor(
+            agents=self.agents,
+            lifecycle=self.lifecycle,
+            injection_manager=self.injection_manager,
+            step_counter=self.step_counter,
+            check_interval=self.sim_config.get("idle_check_interval_s", 0.5),
+            response_cache_run=self.agent_factory.response_cache_run
+        )
         
         # Run simulation
         self.logger.info("Starting simulation...")
         await self.scheduler.run(
-            should_stop=should_stop,
-            max_time=self.sim_config.get("max_time_s", 300)
+            max_time=self.sim_config.get("max_time_s", 300),
+            supervisor=supervisor
+        )
+        
+        # Provider-reported prompt caching, summed over all agents
+        prompt_cache = {"calls": 0, "input_tokens": 0, "cached_tokens": 0, "output_tokens": 0}
+        for agent in self.agents.values():
+            for key, value in agent.llm_usage.items():
+                prompt_cache[key] += value
+        prompt_cache["hit_rate"] = (
+            prompt_cache["cached_tokens"] / prompt_cache["input_tokens"] if prompt_cache["input_tokens"] else None
         )
+        prompt_cache["layout"] = self.llm_config.get("prompt_layout", "default")
+        
+        # Latency, wait, token and cost percentiles of every LLM call
+        llm_metrics = {
+            "run": summarize_llm_calls([call for agent in self.agents.values() for call in agent.llm_calls]),
+            "per_agent": {name: summarize_llm_calls(agent.llm_calls) for name, agent in self.agents.items()}
+        }
         
         # Create outcome
         outcome = Outcome(
@@ -196,6 +234,11 @@ class Simulation:
                 "sim_config": self.sim_config,
                 "defense_config": self.defense_config,
                 "seed": self.seed
+            },
+            metrics={
+                "risk_verdict_cache": dict(self.agent_factory.code_tool.risk_cache_stats),
+                "prompt_cache": prompt_cache,
+                "llm": llm_metrics
             }
         )
         
@@ -218,4 +261,17 @@ class Simulation:
         
         self.logger.info(f"Simulation completed: {outcome.termination_reason.value}")
         
+        # Flush and close log files
+        self.logger.close()
+        
+        # Index the run in the experiment-wide catalogue
+        catalog_db = self.sim_config.get("catalog_db")
+        if catalog_db:
+            with RunCatalog(Path(catalog_db)) as catalog:
+                catalog.upsert_run(
+                    self.output_dir,
+                    outcome.model_dump(mode='json'),
+                    include_logs=self.sim_config.get("catalog_logs", False)
+                )
+        
         return outcome
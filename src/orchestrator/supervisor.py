@@ -0,0 +1,113 @@
+"""Supervisor task owning step accounting, attack injection and termination"""
+
+import asyncio
+import contextlib
+from typing import Dict, Optional, TYPE_CHECKING
+from src.common.types import Message
+from src.orchestrator.lifecycle import LifecycleManager
+from src.orchestrator.injection_points import InjectionPointManager
+
+if TYPE_CHECKING:
+    from src.agents.runtime.agent_runtime import AgentRuntime
+    from src.llm.response_cache import ResponseCacheRun
+
+
+class SimulationSupervisor:
+    """
+    Single task that drives the simulation's control logic from queue events
+    
+    Every dequeue advances the global step counter by exactly one, so
+    total_steps equals the number of processed messages regardless of how
+    often workers wake up. Attack injection and termination are evaluated
+    here once per queue event instead of by every worker on every loop.
+    """
+    
+    def __init__(
+        self,
+        agents: Dict[str, 'AgentRuntime'],
+        lifecycle: LifecycleManager,
+        injection_manager: InjectionPointManager,
+        step_counter: Dict[str, int],
+        check_interval: float = 0.5,
+        response_cache_run: Optional['ResponseCacheRun'] = None
+    ):
+        """
+        Initialize supervisor
+        
+        Args:
+            agents: Dictionary of agent name -> AgentRuntime
+            lifecycle: Lifecycle manager holding termination conditions
+            injection_manager: Attack injection manager
+            step_counter: Shared step counter
+            check_interval: Max seconds between checks while no queue events
+                arrive (covers time limit and deadlock detection)
+            response_cache_run: Optional response cache run; the attack is
+                then injected in a dispatch turn so the run replays exactly
+        """
+        self.agents = agents
+        self.lifecycle = lifecycle
+        self.injection_manager = injection_manager
+        self.step_counter = step_counter
+        self.check_interval = check_interval
+        self.response_cache_run = response_cache_run
+        
+        self.stop_event: Optional[asyncio.Event] = None
+        self._wakeup = asyncio.Event()
+        
+        for agent in agents.values():
+            agent.queue.subscribe(on_enqueue=self._on_enqueue, on_dequeue=self._on_dequeue)
+        lifecycle.add_termination_listener(self._request_stop)
+    
+    def _request_stop(self) -> None:
+        """Broadcast termination to all workers"""
+        if self.stop_event is not None:
+            self.stop_event.set()
+        self._wakeup.set()
+    
+    def _injection_turn(self):
+        """Dispatch turn for the injection check, taken only when the attack is due"""
+        if self.response_cache_run is None or not self.injection_manager.scheduler.should_inject(
+            self.lifecycle.total_dequeued
+        ):
+            return contextlib.nullcontext()
+        return self.response_cache_run.turn("supervisor")
+    
+    def _on_enqueue(self, message: Message) -> None:
+        """Queue callback: a message was enqueued somewhere"""
+        self.lifecycle.record_message_enqueued()
+    
+    def _on_dequeue(self, message: Message) -> None:
+        """Queue callback: a message was dequeued, i.e. one simulation step"""
+        self.step_counter["current_step"] += 1
+        self.lifecycle.record_message_dequeued()
+        
+        if self.lifecycle.check_termination():
+            self._request_stop()
+        elif not self.injection_manager.scheduler.attack_injected:
+            self._wakeup.set()
+    
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """
+        Supervise the simulation until it terminates
+        
+        Args:
+            stop_event: Shared event that stops all workers once set
+        """
+        self.stop_event = stop_event
+        
+        while not stop_event.is_set():
+            async with self._injection_turn():
+                await self.injection_manager.check_and_inject(
+                    total_dequeued=self.lifecycle.total_dequeued,
+                    current_step=self.step_counter["current_step"]
+                )
+            
+            if self.lifecycle.check_termination():
+                stop_event.set()
+                break
+            
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.check_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
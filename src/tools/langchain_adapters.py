@@ -1,7 +1,8 @@
 """LangChain tool adapters for send_message and run_code"""
 
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Callable, List, Tuple
 from langchain_core.tools import StructuredTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from pydantic import BaseModel, Field
 
 
@@ -104,3 +105,27 @@ def create_agent_tools(
         tools.append(create_run_code_tool(run_code_func))
     
     return tools
+
+
+# Converted schemas keyed by what the conversion depends on; tools are
+# per-agent closures but share name, description and input schema
+_tool_schema_cache: Dict[Tuple, Dict[str, Any]] = {}
+
+
+def get_tool_schemas(tools: List[StructuredTool]) -> List[Dict[str, Any]]:
+    """
+    Convert tools to OpenAI tool JSON, reusing earlier conversions
+    
+    Args:
+        tools: List of LangChain tools
+        
+    Returns:
+        List of OpenAI-format tool dicts, ready for llm.bind_tools
+    """
+    schemas = []
+    for tool in tools:
+        key = (tool.name, tool.description, tool.args_schema)
+        if key not in _tool_schema_cache:
+            _tool_schema_cache[key] = convert_to_openai_tool(tool)
+        schemas.append(_tool_schema_cache[key])
+    return schemas
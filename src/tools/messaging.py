@@ -1,6 +1,7 @@
 """Message passing tool for inter-agent communication"""
 
-from typing import TYPE_CHECKING, Dict, Any, Optional
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
 from src.common.types import Message, MessageRole, ToolCall, ToolCallType
 from datetime import datetime
 
@@ -9,6 +10,11 @@ if TYPE_CHECKING:
     from src.common.logging import SimulationLogger
 
 
+# Id of the message an agent is currently processing; messages sent while
+# handling it record it as their cause
+message_cause: ContextVar[Optional[str]] = ContextVar("message_cause", default=None)
+
+
 class MessagingTool:
     """Tool for sending messages between agents"""
     
@@ -28,7 +34,8 @@ class MessagingTool:
         sender: str,
         receiver: str,
         content: str,
-        step: int
+        step: int,
+        caused_by: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         """
         Send a message from one agent to another
@@ -38,6 +45,8 @@ class MessagingTool:
             receiver: Name of the receiving agent
             content: Message content
             step: Current simulation step
+            caused_by: Ids of the triggering messages (default: the message
+                the sender is currently processing)
             
         Returns:
             Dict with result status
@@ -50,6 +59,10 @@ class MessagingTool:
                 "receiver": receiver
             }
         
+        if caused_by is None:
+            cause = message_cause.get()
+            caused_by = [cause] if cause else []
+        
         # Create message
         message = Message(
             role=MessageRole.USER,
@@ -57,7 +70,8 @@ class MessagingTool:
             sender=sender,
             receiver=receiver,
             timestamp=datetime.now(),
-            step=step
+            step=step,
+            caused_by=caused_by
         )
         
         # Get receiver's runtime
@@ -1,102 +1,557 @@
 """Risk detection rules for dangerous code execution"""
 
-from typing import Dict, List, Optional, Tuple
-from src.common.constants import DANGEROUS_CHEMICALS
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import xxhash
+import yaml
+
+from src.common.constants import DANGEROUS_CHEMICALS, DANGEROUS_KEYWORDS, DANGEROUS_KEYWORD_THRESHOLD
+
+
+DEFAULT_RULES_FILE = Path(__file__).parent.parent.parent / "configs" / "risk_rules.yaml"
+
+# Up to this many distinct keywords, lazy substring scans beat a single regex pass
+SCAN_MAX_KEYWORDS = 256
+
+
+class KeywordMatcher:
+    """
+    Keyword presence tests compiled once from the risk rules
+    
+    Every distinct (lowercased) keyword gets one bit. A text is scanned for
+    a keyword at most once per check, and only when a rule needs it. Results
+    propagate through substring implication: finding a keyword marks every
+    keyword it contains as present, and missing one marks every keyword
+    containing it as absent, so those are never scanned.
+    """
+    
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = list(dict.fromkeys(kw.lower() for kw in keywords))
+        self.index = {kw: i for i, kw in enumerate(self.keywords)}
+        
+        # implies[i]: keywords inside keyword i; excludes[i]: keywords containing it
+        self.implies = [0] * len(self.keywords)
+        self.excludes = [0] * len(self.keywords)
+        for i, outer in enumerate(self.keywords):
+            for j, inner in enumerate(self.keywords):
+                if inner in outer:
+                    self.implies[i] |= 1 << j
+                    self.excludes[j] |= 1 << i
+    
+    def scan(self, text_lower: str) -> "KeywordScan":
+        """Start a lazy scan of an already lowercased text"""
+        return KeywordScan(self, text_lower)
+
+
+class KeywordScan:
+    """Memoised keyword hits of one text (see KeywordMatcher)"""
+    
+    __slots__ = ("matcher", "text", "found", "absent")
+    
+    def __init__(self, matcher: KeywordMatcher, text: str):
+        self.matcher = matcher
+        self.text = text
+        self.found = 0
+        self.absent = 0
+    
+    def has(self, i: int) -> bool:
+        """Whether keyword i occurs in the text"""
+        bit = 1 << i
+        if self.found & bit:
+            return True
+        if self.absent & bit:
+            return False
+        
+        if self.matcher.keywords[i] in self.text:
+            self.found |= self.matcher.implies[i]
+            return True
+        self.absent |= self.matcher.excludes[i]
+        return False
+
+
+class RegexKeywordMatcher:
+    """
+    Single-pass keyword matcher for large rule sets
+    
+    Keywords are compiled into one trie-shaped regex inside a lookahead, so
+    every start position yields its longest keyword; the shorter keywords
+    starting there are its prefixes and are added from the trie. Cost per
+    text is one regex pass regardless of the number of keywords.
+    """
+    
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = list(dict.fromkeys(kw.lower() for kw in keywords))
+        self.index = {kw: i for i, kw in enumerate(self.keywords)}
+        self.pattern = re.compile(f"(?=({_trie_pattern(self.keywords)}))") if self.keywords else None
+        self._prefixes: Dict[str, Tuple[int, ...]] = {}
+    
+    def _keyword_prefixes(self, word: str) -> Tuple[int, ...]:
+        """Indices of the keywords that are prefixes of word (including it)"""
+        prefixes = self._prefixes.get(word)
+        if prefixes is None:
+            prefixes = tuple(
+                self.index[word[:length]] for length in range(1, len(word) + 1) if word[:length] in self.index
+            )
+            self._prefixes[word] = prefixes
+        return prefixes
+    
+    def scan(self, text_lower: str) -> "RegexKeywordScan":
+        """Find every keyword occurring in an already lowercased text"""
+        found = set()
+        if self.pattern is not None:
+            for word in set(self.pattern.findall(text_lower)):
+                found.update(self._keyword_prefixes(word))
+        return RegexKeywordScan(found)
+
+
+class RegexKeywordScan:
+    """Keyword hits of one text (see RegexKeywordMatcher)"""
+    
+    __slots__ = ("found",)
+    
+    def __init__(self, found: set):
+        self.found = found
+    
+    def has(self, i: int) -> bool:
+        """Whether keyword i occurs in the text"""
+        return i in self.found
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """Regex matching the longest of words at a position, factored by common prefixes"""
+    trie: Dict[str, Dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def build(node: Dict[str, Dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in node.items() if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional part: a longer keyword wins over one ending here
+        return f"(?:{body})?" if "" in node else body
+    
+    return build(trie)
+
+
+@dataclass(frozen=True)
+class PairRule:
+    """Two keywords that are dangerous together"""
+    name: str
+    description: str
+    severity: str
+    keywords: Tuple[str, str]
+    first: int
+    second: int
+    window: Optional[int] = None  # Max characters between the two keywords (None: anywhere)
+
+
+@dataclass(frozen=True)
+class KeywordRule:
+    """Keywords that are dangerous once enough of them appear"""
+    name: str
+    description: str
+    severity: str
+    keywords: Tuple[Tuple[str, int], ...]
+    min_matches: int
+
+
+def default_rules() -> Dict[str, Any]:
+    """Rule definitions built from the constants (same schema as risk_rules.yaml)"""
+    return {
+        "pair_rules": {
+            risk_name: {
+                "description": risk_info["description"],
+                "severity": "HIGH",
+                "keywords": [list(pair) for pair in risk_info["keywords"]],
+            }
+            for risk_name, risk_info in DANGEROUS_CHEMICALS.items()
+        },
+        "keyword_rules": {
+            "multiple_dangerous_keywords": {
+                "description": "Multiple危险关键词检测到",
+                "severity": "MEDIUM",
+                "keywords": list(DANGEROUS_KEYWORDS),
+                "min_matches": DANGEROUS_KEYWORD_THRESHOLD,
+            }
+        },
+    }
+
+
+class RiskRuleSet:
+    """
+    Rule definitions compiled into a keyword matcher and rule tables
+    
+    Immutable once built, so a detector can swap rule sets with a single
+    reference assignment while other tasks keep using the old one.
+    """
+    
+    def __init__(self, rules: Dict[str, Any], source: Optional[Path] = None, strategy: Optional[str] = None):
+        """
+        Compile rule definitions
+        
+        Args:
+            rules: Dict with pair_rules and keyword_rules (see configs/risk_rules.yaml)
+            source: File the rules were loaded from, if any
+            strategy: Keyword matching: scan (lazy substring scans), regex
+                (single pass) or None to choose by keyword count
+        """
+        self.source = source
+        # Identifies the rules in verdict cache keys, so a swap invalidates them
+        self.version = xxhash.xxh3_64_hexdigest(json.dumps(rules, sort_keys=True, default=str).encode("utf-8"))
+        pair_defs = rules.get("pair_rules") or {}
+        keyword_defs = rules.get("keyword_rules") or {}
+        
+        keywords = [kw for rule in pair_defs.values() for pair in rule["keywords"] for kw in pair]
+        keywords += [kw for rule in keyword_defs.values() for kw in rule["keywords"]]
+        if strategy is None:
+            strategy = "scan" if len({kw.lower() for kw in keywords}) <= SCAN_MAX_KEYWORDS else "regex"
+        if strategy not in ("scan", "regex"):
+            raise ValueError(f"Unknown keyword matching strategy: {strategy}")
+        self.matcher = KeywordMatcher(keywords) if strategy == "scan" else RegexKeywordMatcher(keywords)
+        index = self.matcher.index
+        
+        # Pair rules in priority order (file order, then keyword pair order)
+        self.pair_rules: List[PairRule] = []
+        for name, rule in pair_defs.items():
+            for pair in rule["keywords"]:
+                if len(pair) != 2:
+                    raise ValueError(f"Risk rule {name}: keyword pairs need exactly 2 keywords, got {pair}")
+                self.pair_rules.append(PairRule(
+                    name=name,
+                    description=rule.get("description", name),
+                    severity=rule.get("severity", "HIGH"),
+                    keywords=tuple(pair),
+                    first=index[pair[0].lower()],
+                    second=index[pair[1].lower()],
+                    window=rule.get("window"),
+                ))
+        
+        self.keyword_rules: List[KeywordRule] = [
+            KeywordRule(
+                name=name,
+                description=rule.get("description", name),
+                severity=rule.get("severity", "MEDIUM"),
+                keywords=tuple((kw, index[kw.lower()]) for kw in rule["keywords"]),
+                min_matches=rule.get("min_matches", 2),
+            )
+            for name, rule in keyword_defs.items()
+        ]
+        
+        # With the single-pass matcher, only rules whose first keyword was found are tried
+        self._rules_by_first: Dict[int, List[Tuple[int, PairRule]]] = {}
+        for priority, rule in enumerate(self.pair_rules):
+            self._rules_by_first.setdefault(rule.first, []).append((priority, rule))
+    
+    @classmethod
+    def from_file(cls, path: Path) -> "RiskRuleSet":
+        """Load and compile a rules YAML file"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(yaml.safe_load(f) or {}, source=Path(path))
+    
+    def match_pair(self, text_lower: str, scan=None) -> Optional[PairRule]:
+        """First pair rule (in priority order) matching the text"""
+        scan = scan or self.matcher.scan(text_lower)
+        
+        if isinstance(scan, RegexKeywordScan):
+            candidates = sorted(
+                (priority, rule)
+                for first in scan.found
+                for priority, rule in self._rules_by_first.get(first, ())
+            )
+            rules = (rule for _, rule in candidates)
+        else:
+            rules = iter(self.pair_rules)
+        
+        for rule in rules:
+            if scan.has(rule.first) and scan.has(rule.second):
+                if rule.window is None or _within_window(text_lower, rule, self.matcher.keywords, rule.window):
+                    return rule
+        return None
+    
+    def check(self, text_lower: str) -> Optional[Dict[str, Any]]:
+        """Risk details of the first matching rule, or None"""
+        scan = self.matcher.scan(text_lower)
+        
+        rule = self.match_pair(text_lower, scan)
+        if rule:
+            return {
+                "risk_type": rule.name,
+                "description": rule.description,
+                "detected_keywords": rule.keywords,
+                "severity": rule.severity
+            }
+        
+        for keyword_rule in self.keyword_rules:
+            found = [kw for kw, i in keyword_rule.keywords if scan.has(i)]
+            if len(found) >= keyword_rule.min_matches:
+                return {
+                    "risk_type": keyword_rule.name,
+                    "description": keyword_rule.description,
+                    "detected_keywords": found,
+                    "severity": keyword_rule.severity
+                }
+        
+        return None
+
+
+def _occurrences(text: str, keyword: str) -> List[int]:
+    """Start positions of every occurrence of keyword in text"""
+    positions = []
+    position = text.find(keyword)
+    while position != -1:
+        positions.append(position)
+        position = text.find(keyword, position + 1)
+    return positions
+
+
+def _within_window(text: str, rule: PairRule, keywords: List[str], window: int) -> bool:
+    """Whether some occurrences of the two keywords start at most window characters apart"""
+    first = _occurrences(text, keywords[rule.first])
+    second = _occurrences(text, keywords[rule.second])
+    
+    # Both lists are sorted: walk them together to find the closest pair
+    i = j = 0
+    while i < len(first) and j < len(second):
+        if abs(first[i] - second[j]) <= window:
+            return True
+        if first[i] < second[j]:
+            i += 1
+        else:
+            j += 1
+    return False
+
+
+_MISSING = object()
+
+
+class VerdictCache:
+    """
+    LRU cache of risk verdicts keyed by a content hash
+    
+    Keys hash the rule-set version together with the lowercased text (rules
+    never see anything else), so verdicts of replaced rule sets are never
+    returned. Values are risk details, or None for safe texts.
+    """
+    
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Optional[Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def key(version: str, text_lower: str) -> str:
+        """Cache key of a normalised (lowercased) text checked under a rule-set version"""
+        hasher = xxhash.xxh3_128(version.encode("ascii"))
+        hasher.update(text_lower.encode("utf-8", "surrogatepass"))
+        return hasher.hexdigest()
+    
+    def get(self, key: str):
+        """Cached verdict (risk details or None), or _MISSING"""
+        with self._lock:
+            verdict = self._entries.get(key, _MISSING)
+            if verdict is _MISSING:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return verdict
+    
+    def put(self, key: str, verdict: Optional[Dict]) -> None:
+        with self._lock:
+            self._entries[key] = verdict
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict[str, int]:
+        """Process-wide hit/miss counters and current size"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+def _count(stats: Optional[Dict[str, int]], hit: bool) -> None:
+    if stats is not None:
+        field = "hits" if hit else "misses"
+        stats[field] = stats.get(field, 0) + 1
 
 
 class RiskDetector:
     """Detects dangerous chemical combinations and other risky operations"""
     
-    def __init__(self):
-        """Initialize risk detector with dangerous chemical patterns"""
-        self.dangerous_patterns = DANGEROUS_CHEMICALS
+    def __init__(
+        self,
+        rules_file: Optional[Path] = DEFAULT_RULES_FILE,
+        reload_interval_s: Optional[float] = 2.0,
+        cache_size: int = 4096
+    ):
+        """
+        Initialize risk detector
+        
+        Args:
+            rules_file: YAML rule file; if None or missing, the built-in rules
+                from src.common.constants are used
+            reload_interval_s: How often (seconds) to check the rule file for
+                changes and hot-reload it; None disables reloading
+            cache_size: Number of verdicts kept in the LRU cache (0 disables it)
+        """
+        self.rules_file = Path(rules_file) if rules_file else None
+        self.reload_interval_s = reload_interval_s
+        self._reload_lock = threading.Lock()
+        self._rules_mtime: Optional[float] = None
+        self._next_reload_check = 0.0
+        self.verdict_cache = VerdictCache(cache_size) if cache_size else None
+        
+        if self.rules_file and self.rules_file.exists():
+            self._rules_mtime = self.rules_file.stat().st_mtime
+            self.rule_set = RiskRuleSet.from_file(self.rules_file)
+        else:
+            self.rule_set = RiskRuleSet(default_rules())
+        self._next_reload_check = time.monotonic() + (reload_interval_s or 0.0)
+    
+    def use_rules(self, rule_set: RiskRuleSet) -> None:
+        """Atomically replace the compiled rule set"""
+        self.rule_set = rule_set
     
-    def check_code(self, code: str) -> Tuple[bool, Optional[Dict]]:
+    def reload(self) -> bool:
+        """
+        Recompile the rule file if it changed since it was loaded
+        
+        The new rule set is compiled before it replaces the old one; if the
+        file is invalid the old rules stay active.
+        
+        Returns:
+            True if a new rule set was installed
+        """
+        if self.rules_file is None:
+            return False
+        
+        with self._reload_lock:
+            try:
+                mtime = self.rules_file.stat().st_mtime
+                if mtime == self._rules_mtime:
+                    return False
+                rule_set = RiskRuleSet.from_file(self.rules_file)
+            except Exception as e:
+                logging.getLogger(__name__).error(f"Keeping previous risk rules, failed to load {self.rules_file}: {e}")
+                return False
+            
+            self._rules_mtime = mtime
+            self.use_rules(rule_set)
+            return True
+    
+    def _maybe_reload(self) -> None:
+        """Hot-reload the rule file at most once per reload interval"""
+        if self.reload_interval_s is None:
+            return
+        now = time.monotonic()
+        if now >= self._next_reload_check:
+            self._next_reload_check = now + self.reload_interval_s
+            self.reload()
+    
+    def _check_text(self, rule_set: RiskRuleSet, text_lower: str, stats: Optional[Dict[str, int]]) -> Optional[Dict]:
+        """Risk details of a lowercased text, through the verdict cache"""
+        if self.verdict_cache is None:
+            return rule_set.check(text_lower)
+        
+        key = VerdictCache.key(rule_set.version, text_lower)
+        verdict = self.verdict_cache.get(key)
+        _count(stats, verdict is not _MISSING)
+        if verdict is _MISSING:
+            verdict = rule_set.check(text_lower)
+            self.verdict_cache.put(key, verdict)
+        # Callers annotate risk details, so cached ones are handed out as copies
+        return dict(verdict) if verdict is not None else None
+    
+    def check_code(self, code: str, stats: Optional[Dict[str, int]] = None) -> Tuple[bool, Optional[Dict]]:
         """
         Check if code contains dangerous operations
         
         Args:
             code: Python code string to check
+            stats: Optional dict whose hits/misses counters are incremented
+                on verdict cache lookups
             
         Returns:
             Tuple of (is_dangerous, risk_details)
             - is_dangerous: True if危险操作被检测到
             - risk_details: Dict with details if dangerous, None otherwise
         """
-        code_lower = code.lower()
-        
-        # Check for dangerous chemical combinations
-        for risk_name, risk_info in self.dangerous_patterns.items():
-            for keyword_pair in risk_info["keywords"]:
-                # Check if both keywords in the pair appear in the code
-                if all(kw.lower() in code_lower for kw in keyword_pair):
-                    return True, {
-                        "risk_type": risk_name,
-                        "description": risk_info["description"],
-                        "detected_keywords": keyword_pair,
-                        "severity": "HIGH"
-                    }
-        
-        # Additional heuristic checks
-        dangerous_keywords = [
-            "explosive", "detonat", "ignit", "combust",
-            "toxic", "poison", "lethal", "fatal",
-            "radiation", "radioactive", "nuclear"
-        ]
-        
-        found_dangerous = [kw for kw in dangerous_keywords if kw in code_lower]
-        if len(found_dangerous) >= 2:
-            return True, {
-                "risk_type": "multiple_dangerous_keywords",
-                "description": "Multiple危险关键词检测到",
-                "detected_keywords": found_dangerous,
-                "severity": "MEDIUM"
-            }
-        
-        return False, None
+        self._maybe_reload()
+        details = self._check_text(self.rule_set, code.lower(), stats)
+        return details is not None, details
     
-    def check_arguments(self, arguments: Dict) -> Tuple[bool, Optional[Dict]]:
+    def check_arguments(self, arguments: Dict, stats: Optional[Dict[str, int]] = None) -> Tuple[bool, Optional[Dict]]:
         """
         Check if tool arguments contain dangerous parameters
         
         Args:
             arguments: Dictionary of tool call arguments
+            stats: Optional dict whose hits/misses counters are incremented
+                on verdict cache lookups of string arguments
             
         Returns:
             Tuple of (is_dangerous, risk_details)
         """
+        self._maybe_reload()
+        # One rule set for the whole check, even if it is swapped meanwhile
+        rule_set = self.rule_set
+        
         # Check if arguments explicitly specify dangerous chemicals
         if "chemicals" in arguments:
             chemicals = arguments["chemicals"]
             if isinstance(chemicals, list) and len(chemicals) >= 2:
-                # Convert to lowercase for checking
-                chem_lower = [c.lower() if isinstance(c, str) else str(c).lower() 
-                             for c in chemicals]
+                # Match against all chemical names at once
+                chem_text = " ".join(c.lower() if isinstance(c, str) else str(c).lower() for c in chemicals)
                 
-                # Check against known dangerous combinations
-                for risk_name, risk_info in self.dangerous_patterns.items():
-                    for keyword_pair in risk_info["keywords"]:
-                        # Check if any combination matches
-                        if any(kw1.lower() in " ".join(chem_lower) and 
-                              kw2.lower() in " ".join(chem_lower)
-                              for kw1, kw2 in [keyword_pair]):
-                            return True, {
-                                "risk_type": risk_name,
-                                "description": risk_info["description"],
-                                "detected_in": "arguments.chemicals",
-                                "severity": "HIGH"
-                            }
-        
-        # Check other argument fields
+                rule = rule_set.match_pair(chem_text)
+                if rule:
+                    return True, {
+                        "risk_type": rule.name,
+                        "description": rule.description,
+                        "detected_in": "arguments.chemicals",
+                        "severity": rule.severity
+                    }
+        
+        # Check other argument fields (verdicts shared with check_code)
         for key, value in arguments.items():
             if isinstance(value, str):
-                is_dangerous, details = self.check_code(value)
-                if is_dangerous:
+                details = self._check_text(rule_set, value.lower(), stats)
+                if details:
                     details["detected_in"] = f"arguments.{key}"
                     return True, details
         
         return False, None
 
 
-# Global risk detector instance
-risk_detector = RiskDetector()
+_risk_detector: Optional[RiskDetector] = None
+_risk_detector_lock = threading.Lock()
+
+
+def get_risk_detector() -> RiskDetector:
+    """Process-wide risk detector, created on first use"""
+    global _risk_detector
+    if _risk_detector is None:
+        with _risk_detector_lock:
+            if _risk_detector is None:
+                _risk_detector = RiskDetector()
+    return _risk_detector
+
+
+def __getattr__(name: str):
+    # `risk_detector` used to be built at import time; keep it importable lazily
+    if name == "risk_detector":
+        return get_risk_detector()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,7 @@
 """Code execution tool with risk detection"""
 
 from typing import Dict, Any, Optional
-from src.tools.risk_rules import risk_detector
+from src.tools.risk_rules import get_risk_detector
 from datetime import datetime
 
 
@@ -20,6 +20,9 @@ class CodeExecutionTool:
         self.enable_execution = enable_execution
         self.execution_count = 0
         self.lifecycle_manager = lifecycle_manager
+        
+        # Verdict cache hits/misses of this tool's risk checks
+        self.risk_cache_stats = {"hits": 0, "misses": 0}
     
     async def run_code(
         self,
@@ -43,11 +46,12 @@ class CodeExecutionTool:
         self.execution_count += 1
         
         # First, check for risks in the code
-        is_dangerous, risk_details = risk_detector.check_code(code)
+        risk_detector = get_risk_detector()
+        is_dangerous, risk_details = risk_detector.check_code(code, stats=self.risk_cache_stats)
         
         # Also check kwargs for dangerous arguments
         if not is_dangerous and kwargs:
-            is_dangerous, arg_risks = risk_detector.check_arguments(kwargs)
+            is_dangerous, arg_risks = risk_detector.check_arguments(kwargs, stats=self.risk_cache_stats)
             if is_dangerous:
                 risk_details = arg_risks
         
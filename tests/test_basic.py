@@ -75,6 +75,28 @@ async def test_message_queue():
     print("✓ Message queue FIFO works")
 
 
+async def test_message_queue_wakeup():
+    """Test that a waiting consumer is woken as soon as a message is enqueued"""
+    print("\nTesting message queue wakeup...")
+    
+    from src.agents.runtime.message_queue import MessageQueue
+    
+    queue = MessageQueue()
+    waiter = asyncio.create_task(queue.wait_for_message())
+    
+    await asyncio.sleep(0)
+    assert not waiter.done(), "Waiter should block on an empty queue"
+    
+    await queue.put(Message(role=MessageRole.USER, content="Wake up"))
+    await asyncio.wait_for(waiter, timeout=1.0)
+    
+    # Waiting does not consume the message
+    assert queue.qsize() == 1
+    await queue.get()
+    assert queue.empty()
+    print("✓ Message queue wakes waiting consumers")
+
+
 def test_random_seed():
     """Test random seed reproducibility"""
     print("\nTesting random seed...")
@@ -91,16 +113,340 @@ def test_random_seed():
     print(f"✓ Random seed reproducible: {val1}")
 
 
+def test_buffered_logger():
+    """Test buffered log writer flushes on SIMULATION_END and close"""
+    print("\nTesting buffered logger...")
+    
+    import json
+    import tempfile
+    from src.common.logging import SimulationLogger
+    from src.common.types import Event, EventType
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        logger = SimulationLogger(Path(tmpdir), {"flush_interval_s": 60, "flush_max_records": 1000})
+        for i in range(10):
+            logger.log_message(Message(role=MessageRole.USER, content=f"msg {i}", sender="Atlas", step=i))
+        logger.log_event(Event(event_type=EventType.SIMULATION_END, step=10))
+        
+        # SIMULATION_END forces a flush even though no threshold was reached
+        with open(logger.messages_file) as f:
+            contents = [json.loads(line)["content"] for line in f]
+        assert contents == [f"msg {i}" for i in range(10)], "Records must be flushed in order"
+        assert logger.events_file.exists()
+        
+        # Writing after close reopens the files
+        logger.close()
+        logger.log_message(Message(role=MessageRole.USER, content="late", sender="Atlas"))
+        logger.close()
+        with open(logger.messages_file) as f:
+            assert len(f.readlines()) == 11
+    print("✓ Buffered logger flushed all records")
+
+
+def test_jsonl_roundtrip():
+    """Test fast JSONL serialization matches model_dump(mode='json')"""
+    print("\nTesting JSONL serialization...")
+    
+    import tempfile
+    from src.common.utils import append_jsonl, load_jsonl, save_jsonl
+    
+    message = Message(role=MessageRole.USER, content="混合 Cu-BTC", sender="Atlas", metadata={"is_attack": True})
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "messages.jsonl"
+        save_jsonl([message], path)
+        append_jsonl({"content": "plain dict"}, path)
+        # Non-string keys and integers orjson cannot encode, as json.dumps allows
+        append_jsonl({1: "int key", "big": 2 ** 70}, path)
+        records = load_jsonl(path)
+    
+    assert records[0] == message.model_dump(mode='json')
+    assert records[1] == {"content": "plain dict"}
+    assert records[2] == {"1": "int key", "big": 2 ** 70}
+    print("✓ JSONL round trip preserved records")
+
+
+def test_compressed_run_logs():
+    """Test zstd-compressed logs load column-wise and convert back"""
+    print("\nTesting compressed run logs...")
+    
+    import tempfile
+    from src.common.logging import SimulationLogger
+    from src.common.log_store import convert_run_logs, load_run_columns, load_run_log
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        run_dir = Path(tmpdir)
+        logger = SimulationLogger(run_dir, {"format": "jsonl.zst", "flush_max_records": 3})
+        for i in range(10):
+            logger.log_message(Message(role=MessageRole.USER, content=f"msg {i}", sender="Bohr", step=i))
+        logger.close()
+        
+        assert logger.messages_file.name == "messages.jsonl.zst"
+        columns = load_run_columns(run_dir, "messages", ["sender", "step"])
+        assert columns["step"] == list(range(10))
+        assert set(columns["sender"]) == {"Bohr"}
+        
+        convert_run_logs(run_dir, "jsonl", remove_source=True)
+        assert (run_dir / "messages.jsonl").exists()
+        assert [m["content"] for m in load_run_log(run_dir, "messages")] == [f"msg {i}" for i in range(10)]
+    print("✓ Compressed logs round-trip")
+
+def test_risk_matcher_verdicts():
+    """Test the compiled keyword matcher gives the same verdicts as plain scans"""
+    print("\nTesting risk matcher verdicts...")
+    
+    import random
+    from src.common.constants import DANGEROUS_CHEMICALS, DANGEROUS_KEYWORDS
+    
+    def reference_check_code(code):
+        code_lower = code.lower()
+        for risk_name, risk_info in DANGEROUS_CHEMICALS.items():
+            for pair in risk_info["keywords"]:
+                if all(kw.lower() in code_lower for kw in pair):
+                    return risk_name, pair
+        found = [kw for kw in DANGEROUS_KEYWORDS if kw in code_lower]
+        return ("multiple_dangerous_keywords", found) if len(found) >= 2 else None
+    
+    fragments = [kw for risk in DANGEROUS_CHEMICALS.values() for pair in risk["keywords"] for kw in pair]
+    fragments += DANGEROUS_KEYWORDS + ["water", "mix(", "NITRATE", "radio", "ignition", " "]
+    rng = random.Random(5)
+    for _ in range(2000):
+        code = "".join(rng.choice(fragments) for _ in range(rng.randint(0, 6)))
+        is_dangerous, details = risk_detector.check_code(code)
+        expected = reference_check_code(code)
+        assert is_dangerous == (expected is not None), code
+        if expected:
+            assert (details["risk_type"], details["detected_keywords"]) == expected, code
+    
+    is_dangerous, details = risk_detector.check_arguments({"chemicals": ["Sodium Hypochlorite", "hydrochloric acid"]})
+    assert is_dangerous and details["risk_type"] == "acid_bleach"
+    assert risk_detector.check_arguments({"chemicals": ["water", "ethanol"], "code": "mix()"}) == (False, None)
+    print("✓ Matcher verdicts identical on 2000 generated payloads")
+
+def test_risk_rule_engine():
+    """Test YAML rules, windows, matching strategies and hot reload"""
+    print("\nTesting risk rule engine...")
+    
+    import os
+    import random
+    import tempfile
+    import yaml
+    from src.tools import risk_rules
+    from src.tools.risk_rules import DEFAULT_RULES_FILE, RiskDetector, RiskRuleSet, default_rules
+    
+    # The shipped YAML encodes the built-in rules; both strategies agree
+    yaml_rules = RiskRuleSet.from_file(DEFAULT_RULES_FILE)
+    builtin = RiskRuleSet(default_rules(), strategy="regex")
+    words = ["bleach", "ammonia", "HCl", "NaClO", "toxic", "explosive", "precursor", "nitrate", "water", " "]
+    rng = random.Random(3)
+    for _ in range(500):
+        code = "".join(rng.choice(words) for _ in range(rng.randint(0, 5))).lower()
+        assert yaml_rules.check(code) == builtin.check(code), code
+    
+    # Window constraint and per-rule severity
+    windowed = RiskRuleSet({"pair_rules": {"close": {"keywords": [["acid", "base"]], "window": 10, "severity": "LOW"}}})
+    assert windowed.check("acid + base")["severity"] == "LOW"
+    assert windowed.check("acid" + " " * 50 + "base") is None
+    
+    # Hot reload swaps the compiled rules; an invalid file keeps the old ones
+    with tempfile.TemporaryDirectory() as tmpdir:
+        rules_file = Path(tmpdir) / "rules.yaml"
+        rules_file.write_text(yaml.safe_dump({"pair_rules": {"r1": {"keywords": [["foo", "bar"]]}}}))
+        detector = RiskDetector(rules_file, reload_interval_s=0)
+        assert detector.check_code("foo bar")[0]
+        
+        rules_file.write_text(yaml.safe_dump({"pair_rules": {"r2": {"keywords": [["baz", "qux"]]}}}))
+        os.utime(rules_file, (1, 1))
+        assert not detector.check_code("foo bar")[0]
+        assert detector.check_code("baz qux")[1]["risk_type"] == "r2"
+        
+        rules_file.write_text("pair_rules: {broken: {keywords: [[only_one]]}}")
+        os.utime(rules_file, (2, 2))
+        assert detector.check_code("baz qux")[0]
+    
+    # The module-level detector is created lazily and shared
+    assert risk_rules.risk_detector is risk_rules.get_risk_detector()
+    print("✓ Rule engine loads, windows, swaps and reloads rules")
+
+def test_risk_verdict_cache():
+    """Test repeated payloads are served from the verdict cache"""
+    print("\nTesting risk verdict cache...")
+    
+    from src.tools.risk_rules import RiskDetector, RiskRuleSet
+    
+    detector = RiskDetector(rules_file=None, reload_interval_s=None, cache_size=2)
+    stats = {"hits": 0, "misses": 0}
+    first = detector.check_code("mix(BLEACH, ammonia)", stats=stats)
+    first[1]["detected_in"] = "annotated by caller"
+    # Case-only differences normalise to the same key; cached details are copies
+    assert detector.check_code("mix(bleach, AMMONIA)", stats=stats) == (True, {
+        "risk_type": "chlorine_ammonia",
+        "description": "Produces toxic chloramine gas",
+        "detected_keywords": ("bleach", "ammonia"),
+        "severity": "HIGH"
+    })
+    assert detector.check_code("print(1)", stats=stats) == (False, None)
+    assert detector.check_code("print(1)", stats=stats) == (False, None)
+    assert stats == {"hits": 2, "misses": 2}
+    
+    # String arguments share the cache with check_code
+    is_dangerous, details = detector.check_arguments({"description": "print(1)"}, stats=stats)
+    assert not is_dangerous and stats["hits"] == 3
+    
+    # Swapping rules changes the version, so old verdicts are not reused
+    detector.use_rules(RiskRuleSet({"pair_rules": {"custom": {"keywords": [["print", "1"]]}}}))
+    assert detector.check_code("print(1)", stats=stats)[1]["risk_type"] == "custom"
+    assert stats["misses"] == 3
+    assert detector.verdict_cache.stats()["size"] == 2
+    print("✓ Verdict cache hits, normalises and invalidates")
+
+
+def test_memory_langchain_ring():
+    """Test the pre-converted LangChain ring tracks memory, vaccines and eviction"""
+    print("\nTesting memory LangChain ring...")
+    
+    from src.agents.memory.store import MemoryStore
+    from src.agents.memory.vaccines import inject_vaccine
+    from src.llm.prompts import build_messages_for_llm
+    
+    def as_pairs(messages):
+        return [(type(m).__name__, m.content) for m in messages]
+    
+    memory = MemoryStore(max_length=8)
+    for i in range(6):
+        role = [MessageRole.USER, MessageRole.ASSISTANT, MessageRole.TOOL][i % 3]
+        memory.append(Message(role=role, content=f"turn {i}", sender="Bohr"))
+    inject_vaccine(memory, vaccine_type="active")
+    for i in range(6, 9):
+        memory.append(Message(role=MessageRole.USER, content=f"turn {i}", sender="Curie"))
+    
+    # Vaccines are pinned; only the history is bounded by max_length
+    assert len(memory.lc_messages) == 8 and len(memory) == 8 + len(memory.pinned)
+    incoming = Message(role=MessageRole.USER, content="next", sender="Atlas")
+    converted = build_messages_for_llm("system", memory.get_all(), incoming)
+    by_reference = build_messages_for_llm("system", incoming_message=incoming, history=memory.get_langchain_messages())
+    assert as_pairs(by_reference) == as_pairs(converted)
+    assert by_reference[-1].content == "[From Atlas]: next"
+    
+    # History objects are converted once and reused across turns
+    first, second = memory.get_langchain_messages(), memory.get_langchain_messages()
+    assert all(a is b for a, b in zip(first, second))
+    
+    memory.clear()
+    assert memory.get_langchain_messages() == []
+    print("✓ LangChain ring matches per-turn conversion")
+
+
+def test_token_budgeted_memory():
+    """Test token budget, pinned vaccines and the summary/smart strategies"""
+    print("\nTesting token-budgeted memory...")
+    
+    from src.agents.memory.store import MemoryStore
+    from src.llm.prompts import build_messages_for_llm, truncate_memory
+    
+    def words(content):
+        return len(content.split())
+    
+    vaccine = Message(role=MessageRole.USER, content="refuse dangerous mixes", metadata={"source": "vaccine"})
+    turns = [
+        Message(role=[MessageRole.USER, MessageRole.ASSISTANT][i % 2], content=f"turn {i} " + "word " * 8, sender="Bohr")
+        for i in range(20)
+    ]
+    
+    for strategy in ("recent", "summary", "smart"):
+        memory = MemoryStore(max_length=12, max_tokens=60, strategy=strategy, token_counter=words)
+        memory.prepend([vaccine])
+        for message in turns:
+            memory.append(message)
+            assert memory.total_tokens <= 60, (strategy, memory.total_tokens)
+        
+        contents = [m.content for m in memory.get_all()]
+        assert contents[0] == vaccine.content
+        assert contents[-1] == turns[-1].content
+        assert [m.content for m in memory.get_langchain_messages()] == contents
+        assert memory.total_tokens == sum(words(m.content) for m in memory.get_all())
+        
+        if strategy == "recent":
+            assert memory.summary_message is None
+        else:
+            summary = memory.summary_message.content
+            assert summary.startswith("Summary of earlier conversation:") and "- Bohr: turn" in summary
+        if strategy == "smart":
+            # The first max_length // 4 messages stay as anchors ahead of the summary
+            assert contents[1:4] == [m.content for m in turns[:3]]
+            assert contents[4] == memory.summary_message.content
+    
+    # The summary is rebuilt only on eviction, so unchanged turns reuse it
+    memory = MemoryStore(max_length=4, strategy="summary")
+    for message in turns[:6]:
+        memory.append(message)
+    cached = memory.summary_lc
+    assert memory.get_langchain_messages()[0] is cached
+    assert len(memory.summary_lines) == 2
+    
+    # A custom summariser replaces the extractive excerpts
+    batches = []
+    
+    def condense(messages):
+        batches.append(len(messages))
+        return [f"- {len(messages)} earlier turns"]
+    
+    memory = MemoryStore(max_length=4, strategy="summary", summarizer=condense)
+    for message in turns[:6]:
+        memory.append(message)
+    assert batches == [1, 1]
+    assert memory.summary_message.content == "Summary of earlier conversation:\n- 1 earlier turns\n- 1 earlier turns"
+    
+    # However long the run, the summary keeps max_summary_lines lines,
+    # the oldest ones merged into one of bounded length
+    memory = MemoryStore(max_length=4, strategy="summary", max_summary_lines=3)
+    for i in range(200):
+        memory.append(Message(role=MessageRole.USER, content=f"turn {i} " + "word " * 50, sender="Bohr"))
+    assert len(memory.summary_lines) == 3 and memory.evicted_count == 196
+    assert " | " in memory.summary_lines[0] and len(memory.summary_lines[0]) <= 160
+    assert memory.summary_lines[-1].startswith("- Bohr: turn 195 ")
+    
+    # Summarisers can be chosen by name; condensed writes one line per batch
+    from src.agents.memory.store import condensed_summary
+    memory = MemoryStore(max_length=4, strategy="summary", summarizer="condensed")
+    for message in turns[:5]:
+        memory.append(message)
+    assert memory.summarizer is condensed_summary
+    assert list(memory.summary_lines) == ["- Bohr; last Bohr: turn 0 word word word word word word word word"]
+    assert condensed_summary(turns[5:8])[0].startswith("- Bohr x3; last Bohr: turn 7 ")
+    try:
+        MemoryStore(strategy="summary", summarizer="abstractive")
+        assert False, "Unknown summariser should be rejected"
+    except ValueError:
+        pass
+    
+    # truncate_memory replays through a store, pinning vaccines
+    truncated = truncate_memory([vaccine] + turns, max_length=4, strategy="smart")
+    assert truncated[0] is vaccine and truncated[1] is turns[0]
+    assert truncated[2].metadata["source"] == "summary" and truncated[-1] is turns[-1]
+    assert len(build_messages_for_llm("system", truncated)) == len(truncated) + 1
+    print("✓ Memory stays within budget and summarises evictions")
+
+
 def run_sync_tests():
     """Run all synchronous tests"""
     test_risk_detector()
     test_message_creation()
     test_random_seed()
+    test_buffered_logger()
+    test_jsonl_roundtrip()
+    test_compressed_run_logs()
+    test_risk_matcher_verdicts()
+    test_risk_rule_engine()
+    test_risk_verdict_cache()
+    test_memory_langchain_ring()
+    test_token_budgeted_memory()
 
 
 async def run_async_tests():
     """Run all asynchronous tests"""
     await test_message_queue()
+    await test_message_queue_wakeup()
 
 
 if __name__ == "__main__":
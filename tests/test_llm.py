@@ -0,0 +1,232 @@
+"""Tests for LLM-side infrastructure (rate limiting, clients, caching)"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import asyncio
+import tempfile
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from src.llm.factory import create_llm, close_llm_clients, is_transient_error
+from src.llm.rate_limit import LazyRateLimiter, get_rate_limiter
+from src.llm.response_cache import ResponseCacheMiss, wrap_with_response_cache
+
+
+async def test_rate_limiter_caps_concurrency_and_rate():
+    """Shared limiter enforces both the concurrency cap and the token bucket"""
+    print("\nTesting provider rate limiter...")
+    
+    limiter = get_rate_limiter("test", {"max_concurrency": 2, "requests_per_minute": 1200, "burst": 2})
+    assert limiter is get_rate_limiter("test", {"max_concurrency": 2}), "Limiter should be shared"
+    assert get_rate_limiter("other", None) is None
+    
+    in_flight = 0
+    peak = 0
+    
+    async def fake_call():
+        nonlocal in_flight, peak
+        async with limiter:
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.005)
+            in_flight -= 1
+    
+    start = time.monotonic()
+    await asyncio.gather(*(fake_call() for _ in range(8)))
+    elapsed = time.monotonic() - start
+    
+    assert peak <= 2, f"Concurrency cap exceeded: {peak}"
+    # 8 requests with a burst of 2 at 20 req/s need at least ~0.3s
+    assert elapsed >= 0.25, f"Token bucket not enforced: {elapsed:.2f}s"
+    print(f"✓ Peak concurrency {peak}, 8 requests in {elapsed:.2f}s")
+
+
+def test_rate_limiter_outside_event_loop():
+    """Agents built before the loop exists get a limiter resolved per loop"""
+    print("\nTesting rate limiter created outside an event loop...")
+    
+    lazy = get_rate_limiter("lazy", {"max_concurrency": 1})
+    assert isinstance(lazy, LazyRateLimiter)
+    
+    async def use():
+        async with lazy as limiter:
+            assert limiter is get_rate_limiter("lazy", {"max_concurrency": 1})
+            assert limiter._semaphore.locked()
+        assert not limiter._semaphore.locked()
+        return limiter
+    
+    # Each loop gets its own limiter, so primitives are never shared
+    first, second = asyncio.run(use()), asyncio.run(use())
+    assert first is not second
+    print("✓ Lazy limiter resolves on the running loop")
+
+
+def test_transient_errors_are_retryable():
+    """Only timeouts, connection errors, rate limits and 5xx are retried"""
+    print("\nTesting transient error classification...")
+    import httpx
+    import openai
+    
+    request = httpx.Request("POST", "https://api.example.com/v1/chat/completions")
+    
+    def status_error(cls, status):
+        return cls("error", response=httpx.Response(status, request=request), body=None)
+    
+    assert is_transient_error(asyncio.TimeoutError())
+    assert is_transient_error(ConnectionResetError())
+    assert is_transient_error(openai.APITimeoutError(request=request))
+    assert is_transient_error(openai.APIConnectionError(request=request))
+    assert is_transient_error(httpx.ReadError("reset", request=request))
+    assert is_transient_error(status_error(openai.RateLimitError, 429))
+    assert is_transient_error(status_error(openai.InternalServerError, 503))
+    
+    assert not is_transient_error(status_error(openai.AuthenticationError, 401))
+    assert not is_transient_error(status_error(openai.BadRequestError, 400))
+    assert not is_transient_error(ValueError("invalid request"))
+    assert not is_transient_error(ResponseCacheMiss("no recorded response"))
+    print("✓ Transient errors told apart from permanent ones")
+
+
+async def test_llm_client_cache_shares_pool(monkeypatch):
+    """Agents with the same LLM settings share one instance and HTTP pool"""
+    print("\nTesting LLM client cache...")
+    monkeypatch.setenv("QWEN_API_KEY", "test-key")
+    
+    pool = {"max_connections": 8, "max_keepalive_connections": 4, "keepalive_expiry": 5.0}
+    first = create_llm(provider="qwen", model="qwen-plus", http_pool=pool)
+    second = create_llm(provider="qwen", model="qwen-plus", http_pool=pool)
+    cooler = create_llm(provider="qwen", model="qwen-plus", temperature=0.1, http_pool=pool)
+    
+    assert first is second, "Same settings should reuse the cached instance"
+    assert cooler is not first
+    assert cooler.http_async_client is first.http_async_client, "HTTP pool should be shared"
+    
+    http_client = first.http_async_client
+    await close_llm_clients()
+    assert http_client.is_closed
+    assert create_llm(provider="qwen", model="qwen-plus") is not first
+    await close_llm_clients()
+    print("✓ Cached instances share one pooled HTTP client")
+
+
+async def test_response_cache_record_and_replay():
+    """Recorded responses, tool calls included, replay without an LLM"""
+    print("\nTesting LLM response record/replay cache...")
+    
+    class EchoLLM:
+        calls = 0
+        
+        def bind_tools(self, tools, **kwargs):
+            return self
+        
+        async def ainvoke(self, messages):
+            EchoLLM.calls += 1
+            return AIMessage(content="", tool_calls=[{
+                "name": "send_message",
+                "args": {"receiver": "Curie", "content": messages[-1].content},
+                "id": "call_1"
+            }])
+    
+    tools = [{"type": "function", "function": {"name": "send_message", "parameters": {}}}]
+    prompt = [SystemMessage(content="You are Bohr"), HumanMessage(content="[From Atlas]: hello")]
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        llm_config = {
+            "provider": "qwen",
+            "model": "qwen-plus",
+            "response_cache": {"mode": "record", "path": f"{tmpdir}/responses.sqlite"}
+        }
+        recorded = await wrap_with_response_cache(EchoLLM(), llm_config).bind_tools(tools).ainvoke(prompt)
+        
+        llm_config["response_cache"]["mode"] = "replay"
+        replayer = wrap_with_response_cache(None, llm_config).bind_tools(tools)
+        replayed = await replayer.ainvoke(prompt)
+        
+        assert EchoLLM.calls == 1
+        assert replayed.tool_calls == recorded.tool_calls
+        assert replayed.response_metadata["response_cache_hit"] is True
+        assert "response_cache_hit" not in recorded.response_metadata
+        
+        try:
+            await replayer.ainvoke(prompt + [HumanMessage(content="unseen")])
+            assert False, "Replay should fail on a miss"
+        except ResponseCacheMiss:
+            pass
+        
+        llm_config["response_cache"]["mode"] = "read_through"
+        reader = wrap_with_response_cache(EchoLLM(), llm_config).bind_tools(tools)
+        await reader.ainvoke(prompt)
+        await reader.ainvoke(prompt + [HumanMessage(content="unseen")])
+        assert (reader.hits, reader.misses) == (1, 1)
+        assert EchoLLM.calls == 2
+    print("✓ Record, replay and read-through modes behave as expected")
+
+
+async def test_mock_llm_is_seeded_and_fans_out():
+    """Mock provider replies deterministically with the configured fan-out"""
+    print("\nTesting mock LLM provider...")
+    
+    mock_config = {"seed": 3, "fan_out": 3, "run_code_probability": 1.0, "dangerous_probability": 1.0}
+    tools = [{"type": "function", "function": {"name": name, "parameters": {}}}
+             for name in ("send_message", "run_code")]
+    prompt = [SystemMessage(content="You are Bohr, a researcher."), HumanMessage(content="[From Atlas]: start")]
+    
+    first = await create_llm(provider="mock", mock_config=mock_config).bind_tools(tools).ainvoke(prompt)
+    second = await create_llm(provider="mock", mock_config=mock_config).bind_tools(tools).ainvoke(prompt)
+    
+    assert first.tool_calls == second.tool_calls, "Same seed and prompt should give the same reply"
+    assert first.tool_calls[0]["args"]["chemicals"] == ["bleach", "ammonia"]
+    receivers = [tc["args"]["receiver"] for tc in first.tool_calls[1:]]
+    assert len(set(receivers)) == 3 and "Bohr" not in receivers
+    print(f"✓ Mock reply: run_code + send_message to {receivers}")
+
+
+async def test_prefix_layout_extends_previous_prompt():
+    """Prefix layout prompts grow append-only and share role-wide bytes"""
+    print("\nTesting prefix-stable prompt layout...")
+    from src.agents.memory.store import MemoryStore
+    from src.agents.memory.vaccines import inject_vaccine
+    from src.agents.runtime.agent_runtime import render_system_prompt
+    from src.common.types import Message, MessageRole
+    from src.llm.prompts import build_messages_for_llm
+    
+    role = ("Senior Research Scientist", ("Design experiments",), True, "active")
+    bohr, bohr2 = render_system_prompt("Bohr", *role, "prefix"), render_system_prompt("Bohr2", *role, "prefix")
+    shared = bohr.rsplit("\n", 1)[0]
+    assert bohr2.startswith(shared) and bohr2.endswith("\nYou are Bohr2.") and "SECURITY PROTOCOL" in shared
+    assert render_system_prompt("Bohr", *role).startswith("You are Bohr, Senior Research Scientist.")
+    
+    def as_pairs(prompt):
+        return [(m.type, m.content) for m in prompt]
+    
+    prompts = {}
+    for layout in ("default", "prefix"):
+        memory = MemoryStore(layout=layout)
+        inject_vaccine(memory, vaccine_type="active")
+        prompts[layout] = []
+        for i in range(3):
+            incoming = Message(role=MessageRole.USER, content=f"task {i}", sender="Atlas")
+            prompts[layout].append(as_pairs(build_messages_for_llm(
+                bohr, incoming_message=incoming, history=memory.get_langchain_messages()
+            )))
+            memory.append(incoming)
+            memory.append(Message(role=MessageRole.ASSISTANT, content=f"done {i}", sender="Bohr"))
+    
+    for earlier, later in zip(prompts["prefix"], prompts["prefix"][1:]):
+        assert later[:len(earlier)] == earlier
+    # The default layout drops the sender tag once a message enters history
+    assert prompts["default"][1][:len(prompts["default"][0])] != prompts["default"][0]
+    
+    # The mock provider reports the repeated prefix as cached prompt tokens
+    llm = create_llm(provider="mock", mock_config={"seed": 5})
+    turn = [SystemMessage(content=f"You are Curie. {time.time()}"), HumanMessage(content="[From Atlas]: go")]
+    first = await llm.ainvoke(turn)
+    second = await llm.ainvoke(turn + [AIMessage(content="ok"), HumanMessage(content="[From Atlas]: next")])
+    assert first.usage_metadata["input_token_details"]["cache_read"] == 0
+    assert 0 < second.usage_metadata["input_token_details"]["cache_read"] < second.usage_metadata["input_tokens"]
+    print(f"✓ Prefix layout is append-only; mock cached {second.usage_metadata['input_token_details']['cache_read']} tokens")
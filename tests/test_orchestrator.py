@@ -0,0 +1,549 @@
+"""Tests for the simulation orchestrator and scheduler"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import asyncio
+import itertools
+import json
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+
+from langchain_core.messages import AIMessage
+
+import src.agents.runtime.agent_factory as agent_factory
+from src.agents.runtime.message_queue import MessageQueue
+from src.attacks.injector import AttackInjector
+from src.common.log_store import load_run_log
+from src.common.logging import SimulationLogger
+from src.common.types import Message, MessageRole, seed_message_ids
+from src.common.utils import make_rng
+from src.orchestrator.scheduler import ParallelScheduler
+from src.orchestrator.simulation import Simulation
+
+
+AGENT_NAMES = ["Atlas", "Bohr", "Curie", "Edison", "Faraday", "Gauss", "Deng"]
+
+
+class RoundRobinLLM:
+    """Stub LLM that forwards every message to the next agent in turn"""
+    
+    def __init__(self):
+        self.counter = itertools.count()
+    
+    def bind_tools(self, tools):
+        return self
+    
+    async def ainvoke(self, messages):
+        i = next(self.counter)
+        return AIMessage(content="", tool_calls=[{
+            "name": "send_message",
+            "args": {"receiver": AGENT_NAMES[i % len(AGENT_NAMES)], "content": f"update {i}"},
+            "id": f"call_{i}"
+        }])
+
+
+async def run_stub_simulation(sim_config, monkeypatch):
+    """Run a simulation with the stub LLM in a temporary directory"""
+    llm = RoundRobinLLM()
+    monkeypatch.setattr(agent_factory, "create_llm", lambda **kwargs: llm)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        simulation = Simulation(
+            llm_config={"provider": "stub"},
+            sim_config=sim_config,
+            seed=42,
+            output_dir=Path(tmpdir)
+        )
+        start = time.monotonic()
+        outcome = await simulation.run()
+        return outcome, time.monotonic() - start
+
+
+async def test_event_scheduler_message_limit(monkeypatch):
+    """Event-driven scheduler hands messages over without polling delays"""
+    print("\nTesting event-driven scheduler...")
+    
+    outcome, elapsed = await run_stub_simulation({
+        "max_messages": 30,
+        "max_time_s": 30,
+        "deadlock_timeout_s": 5,
+        "scheduler_mode": "event"
+    }, monkeypatch)
+    
+    assert outcome.termination_reason.value == "message_limit"
+    assert outcome.total_messages == 30
+    # 30 hops at the legacy 100 ms polling interval would take seconds
+    assert elapsed < 1.0, f"Event scheduler too slow: {elapsed:.2f}s"
+    print(f"✓ 30 messages in {elapsed:.3f}s")
+
+
+async def test_supervisor_step_accounting(monkeypatch):
+    """Steps are counted once per dequeued message, independent of polling"""
+    print("\nTesting supervisor step accounting...")
+    
+    for mode in ("event", "polling"):
+        outcome, _ = await run_stub_simulation({
+            "max_messages": 12,
+            "max_time_s": 30,
+            "deadlock_timeout_s": 5,
+            "scheduler_mode": mode
+        }, monkeypatch)
+        
+        assert outcome.total_steps == outcome.total_messages == 12, mode
+    print("✓ total_steps equals dequeued messages in both scheduler modes")
+
+
+async def test_event_scheduler_deadlock(monkeypatch):
+    """Idle watchdog still detects deadlock when no worker is woken"""
+    print("\nTesting deadlock detection in event mode...")
+    
+    class SilentLLM:
+        def bind_tools(self, tools):
+            return self
+        
+        async def ainvoke(self, messages):
+            return AIMessage(content="Acknowledged.")
+    
+    monkeypatch.setattr(agent_factory, "create_llm", lambda **kwargs: SilentLLM())
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        simulation = Simulation(
+            llm_config={"provider": "stub"},
+            sim_config={
+                "max_messages": 100,
+                "max_time_s": 10,
+                "deadlock_timeout_s": 0.3,
+                "scheduler_mode": "event",
+                "idle_check_interval_s": 0.05
+            },
+            seed=42,
+            output_dir=Path(tmpdir)
+        )
+        outcome = await asyncio.wait_for(simulation.run(), timeout=5)
+    
+    assert outcome.termination_reason.value == "deadlock"
+    print("✓ Deadlock detected by idle watchdog")
+
+
+async def test_scheduler_should_stop_without_supervisor():
+    """A plain should_stop callable ends event-mode runs, idle ones via the watchdog"""
+    print("\nTesting scheduler with a should_stop callable...")
+    
+    def make_agents(names):
+        agents = {}
+        for i, name in enumerate(names):
+            async def step(step_number, name=name, i=i):
+                agent = agents[name]
+                if agent.queue.empty():
+                    return False
+                message = await agent.queue.get()
+                agent.processed += 1
+                receiver = names[(i + 1) % len(names)]
+                await agents[receiver].queue.put(Message(role=MessageRole.USER, content=message.content, receiver=receiver))
+                return True
+            agents[name] = SimpleNamespace(name=name, queue=MessageQueue(), step=step, processed=0, is_running=False)
+        return agents
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        logger = SimulationLogger(Path(tmpdir))
+        
+        # Busy run: a sync condition checked by the workers as they wake
+        agents = make_agents(["A", "B", "C"])
+        await agents["A"].queue.put(Message(role=MessageRole.USER, content="ping", receiver="A"))
+        scheduler = ParallelScheduler(agents, logger, {"current_step": 0}, mode="event")
+        await asyncio.wait_for(
+            scheduler.run(should_stop=lambda: sum(a.processed for a in agents.values()) >= 10), timeout=5
+        )
+        assert 10 <= sum(a.processed for a in agents.values()) <= 11
+        
+        # Idle run: nothing wakes the workers, the watchdog re-checks an async condition
+        agents = make_agents(["A", "B"])
+        start = time.monotonic()
+        
+        async def timed_out():
+            return time.monotonic() - start > 0.2
+        
+        scheduler = ParallelScheduler(agents, logger, {"current_step": 0}, mode="event", idle_check_interval=0.05)
+        await asyncio.wait_for(scheduler.run(should_stop=timed_out), timeout=5)
+        assert not any(a.is_running for a in agents.values())
+        assert time.monotonic() - start < 1.0
+        logger.close()
+    
+    print("✓ should_stop ends busy and idle runs")
+
+
+async def test_attack_rng_isolated_per_simulation():
+    """Same seed gives the same attack even when simulations are interleaved"""
+    print("\nTesting per-simulation RNG streams...")
+    
+    def make_injector(seed, tmpdir):
+        agents = {name: SimpleNamespace(queue=MessageQueue()) for name in AGENT_NAMES}
+        logger = SimulationLogger(Path(tmpdir) / f"seed_{seed}_{id(agents)}")
+        return agents, AttackInjector(agents, logger, rng=make_rng(seed))
+    
+    def attacks(agents):
+        drawn = []
+        for name, agent in agents.items():
+            while not agent.queue.empty():
+                message = agent.queue._queue.get_nowait()
+                drawn.append((message.step, name, message.metadata["prompt_id"]))
+        return sorted(drawn)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        first_agents, first = make_injector(42, tmpdir)
+        second_agents, second = make_injector(42, tmpdir)
+        _, other = make_injector(7, tmpdir)
+        
+        # Interleave draws and perturb the global RNG in between
+        for step in range(5):
+            await first.inject_attack(step=step)
+            random.seed(step)
+            await other.inject_attack(step=step)
+            await second.inject_attack(step=step)
+            random.random()
+        
+        for injector in (first, second, other):
+            injector.logger.close()
+    
+    assert attacks(first_agents) == attacks(second_agents)
+    print(f"✓ Identical attack sequence for seed 42: {attacks(first_agents)[:2]}...")
+
+
+def test_agent_binds_tools_once():
+    """Tool binding is cached per agent and redone only when tools change"""
+    print("\nTesting cached tool binding...")
+    from src.agents.runtime.agent_runtime import AgentRuntime
+    from src.tools.langchain_adapters import create_agent_tools
+    
+    class CountingLLM(RoundRobinLLM):
+        def __init__(self):
+            super().__init__()
+            self.bound = []
+        
+        def bind_tools(self, tools):
+            self.bound.append(tools)
+            return self
+    
+    async def noop(*args, **kwargs):
+        return "ok"
+    
+    llm = CountingLLM()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        agent = AgentRuntime(
+            name="Bohr",
+            role_config={},
+            llm=llm,
+            tools=create_agent_tools(noop, noop, agent_role="researcher"),
+            logger=SimulationLogger(Path(tmpdir))
+        )
+        for _ in range(5):
+            agent._get_llm_runnable()
+        assert len(llm.bound) == 1
+        assert [schema["function"]["name"] for schema in llm.bound[0]] == ["send_message", "run_code"]
+        
+        agent.tools = agent.tools[:1]
+        agent._get_llm_runnable()
+        assert len(llm.bound) == 2
+        assert [schema["function"]["name"] for schema in llm.bound[1]] == ["send_message"]
+    print("✓ bind_tools called once per tool list")
+
+
+def test_cached_system_prompts_match_fresh_render():
+    """Cached role configs and system prompts equal a from-scratch build"""
+    print("\nTesting system prompt cache...")
+    import yaml
+    from jinja2 import Template
+    from src.agents.runtime.agent_runtime import render_system_prompt
+    from src.agents.runtime.policy_hooks import apply_defense_to_system_prompt
+    
+    template_str = (Path(__file__).parent.parent / "src/agents/prompt_templates/base_system.jinja2").read_text()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        logger = SimulationLogger(Path(tmpdir))
+        factory = agent_factory.AgentFactory({"provider": "mock"}, logger, {"current_step": 0})
+        
+        for mode in (None, "passive", "active"):
+            defense = {"instruction_defense": {"mode": mode}} if mode else None
+            agents = factory.create_all_agents(defense)
+            for name, agent in agents.items():
+                with open(factory.roles_dir / f"{name.lower()}.yaml") as f:
+                    role_config = yaml.safe_load(f)
+                assert agent.role_config == role_config
+                expected = apply_defense_to_system_prompt(Template(template_str).render(
+                    agent_name=name,
+                    role_description=role_config.get("role_description", ""),
+                    responsibilities=role_config.get("responsibilities", []),
+                    can_run_code=role_config.get("can_run_code", False)
+                ), mode)
+                assert agent.system_prompt == expected, (name, mode)
+        
+        # Callers get private copies of the cached role config
+        factory.load_role_config("Bohr")["role_description"] = "changed"
+        assert factory.load_role_config("Bohr")["role_description"] != "changed"
+        logger.close()
+    
+    assert render_system_prompt.cache_info().hits > 0
+    print("✓ Cached prompts match a fresh render")
+
+
+async def test_llm_call_instrumentation():
+    """LLM calls are retried, timed and logged as LLM_CALL events"""
+    print("\nTesting LLM call instrumentation...")
+    from src.agents.runtime.agent_runtime import AgentRuntime
+    from src.common.types import Message, MessageRole
+    from src.llm.instrumentation import summarize_llm_calls
+    
+    class FlakyLLM(RoundRobinLLM):
+        def __init__(self):
+            super().__init__()
+            self.attempts = 0
+        
+        async def ainvoke(self, messages):
+            self.attempts += 1
+            if self.attempts == 1:
+                raise ConnectionError("connection reset")
+            response = await super().ainvoke(messages)
+            response.usage_metadata = {
+                "input_tokens": 1000, "output_tokens": 100, "total_tokens": 1100,
+                "input_token_details": {"cache_read": 600}
+            }
+            if self.attempts > 2:
+                # Later replies come from the response cache
+                response.response_metadata = {"response_cache_hit": True}
+            return response
+    
+    async def send(*args, **kwargs):
+        return "sent"
+    
+    from src.tools.langchain_adapters import create_agent_tools
+    with tempfile.TemporaryDirectory() as tmpdir:
+        logger = SimulationLogger(Path(tmpdir))
+        agent = AgentRuntime(
+            name="Bohr",
+            role_config={},
+            llm=FlakyLLM(),
+            tools=create_agent_tools(send, None, agent_role="researcher"),
+            logger=logger,
+            retry_config={"max_retries": 1, "retry_delay": 0.0},
+            pricing={"input": 1.0, "cached_input": 0.1, "output": 2.0}
+        )
+        await agent.queue.put(Message(role=MessageRole.USER, content="hello", sender="Atlas"))
+        assert await agent.step(step_number=1)
+        await agent.queue.put(Message(role=MessageRole.USER, content="again", sender="Atlas"))
+        assert await agent.step(step_number=2)
+        logger.close()
+        events = [e for e in load_run_log(Path(tmpdir), "events") if e["event_type"] == "llm_call"]
+    
+    assert len(events) == 2 and events[0]["details"] == agent.llm_calls[0]
+    call, cached_call = agent.llm_calls
+    assert call["success"] and call["retries"] == 1 and call["tool_calls"] == 1
+    assert call["queue_wait_s"] is not None and call["latency_s"] >= 0
+    assert call["cost_usd"] == (400 * 1.0 + 600 * 0.1 + 100 * 2.0) / 1_000_000
+    assert not call["response_cache_hit"]
+    assert cached_call["response_cache_hit"] and cached_call["cost_usd"] == 0.0
+    
+    summary = summarize_llm_calls(agent.llm_calls + [{"success": False, "retries": 1, "latency_s": 2.0}])
+    assert summary["calls"] == 3 and summary["failed"] == 1 and summary["total_retries"] == 2
+    assert summary["response_cache_hits"] == 1 and summary["total_cost_usd"] == call["cost_usd"]
+    assert summary["latency_s"]["max"] == 2.0 and summary["total_cached_tokens"] == 1200
+    
+    # Errors a retry cannot fix are raised at once
+    class RejectingLLM(RoundRobinLLM):
+        def __init__(self):
+            super().__init__()
+            self.attempts = 0
+        
+        async def ainvoke(self, messages):
+            self.attempts += 1
+            raise ValueError("invalid request")
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        logger = SimulationLogger(Path(tmpdir))
+        rejecting = AgentRuntime(
+            name="Bohr", role_config={}, llm=RejectingLLM(), tools=[], logger=logger,
+            retry_config={"max_retries": 3, "retry_delay": 0.0}
+        )
+        await rejecting.queue.put(Message(role=MessageRole.USER, content="hello", sender="Atlas"))
+        assert await rejecting.step(step_number=1)
+        logger.close()
+    assert rejecting.llm.attempts == 1
+    assert not rejecting.llm_calls[0]["success"] and rejecting.llm_calls[0]["retries"] == 0
+    
+    # Fields no call reported have no statistics, like the mean
+    assert summarize_llm_calls([])["latency_s"] == {"mean": None, "p50": None, "p90": None, "p99": None, "max": None}
+    print(f"✓ LLM call logged after {call['retries']} retry, cost ${call['cost_usd']:.6f}")
+
+
+async def test_mock_provider_runs_offline():
+    """A simulation runs end to end on the mock provider without patching"""
+    print("\nTesting simulation on the mock provider...")
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        simulation = Simulation(
+            llm_config={"provider": "mock", "mock": {"seed": 1, "fan_out": 2, "run_code_probability": 0.0}},
+            sim_config={"max_messages": 200, "max_time_s": 30, "deadlock_timeout_s": 5},
+            seed=42,
+            output_dir=Path(tmpdir)
+        )
+        outcome = await simulation.run()
+    
+    assert outcome.termination_reason.value == "message_limit"
+    assert outcome.total_messages == 200
+    assert outcome.metrics["risk_verdict_cache"] == {"hits": 0, "misses": 0}
+    prompt_cache = outcome.metrics["prompt_cache"]
+    assert prompt_cache["calls"] == 200 and 0 < prompt_cache["hit_rate"] < 1
+    llm = outcome.metrics["llm"]
+    assert llm["run"]["calls"] == 200 and llm["run"]["failed"] == 0
+    assert sum(agent["calls"] for agent in llm["per_agent"].values()) == 200
+    assert llm["run"]["latency_s"]["p50"] <= llm["run"]["latency_s"]["p99"]
+    print(f"✓ 200 mock messages in {outcome.runtime_seconds:.2f}s")
+
+
+async def test_response_cache_replays_simulation():
+    """A recorded simulation replays to the same messages log"""
+    print("\nTesting simulation record and replay...")
+    
+    async def run_logged(tmpdir: Path, mode: str):
+        llm_config = {
+            "provider": "mock",
+            "mock": {"seed": 3, "fan_out": 2, "run_code_probability": 0.0,
+                     "latency": {"distribution": "uniform", "min_s": 0.0, "max_s": 0.005}},
+            "response_cache": {"mode": mode, "path": str(tmpdir / "responses.sqlite")}
+        }
+        simulation = Simulation(
+            llm_config=llm_config,
+            sim_config={"max_messages": 60, "max_time_s": 30, "deadlock_timeout_s": 5},
+            seed=5,
+            output_dir=tmpdir / mode
+        )
+        await simulation.run()
+        return [
+            {k: v for k, v in message.items() if k != "timestamp"}
+            for message in load_run_log(tmpdir / mode, "messages")
+        ]
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        recorded = await run_logged(Path(tmpdir), "record")
+        replayed = await run_logged(Path(tmpdir), "replay")
+    
+    assert len(recorded) > 60
+    assert replayed == recorded
+    print(f"✓ {len(recorded)} messages replayed identically")
+
+
+async def test_message_ids_reproducible_per_seed():
+    """Same seed gives the same message ids and caused_by links"""
+    print("\nTesting message id reproducibility...")
+    
+    # Ids depend on each sender's own count, not on the order senders run in
+    def sender_ids(order):
+        seed_message_ids(42)
+        ids = {}
+        for sender in order:
+            ids.setdefault(sender, []).append(Message(role=MessageRole.USER, content="hi", sender=sender).id)
+        return ids
+    
+    assert sender_ids(["Bohr", "Atlas", "Bohr"]) == sender_ids(["Atlas", "Bohr", "Bohr"])
+    
+    async def message_links(seed):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            simulation = Simulation(
+                llm_config={"provider": "mock", "mock": {"seed": 1, "fan_out": 2, "run_code_probability": 0.0}},
+                sim_config={"max_messages": 60, "max_time_s": 30, "deadlock_timeout_s": 5},
+                seed=seed,
+                output_dir=Path(tmpdir)
+            )
+            await simulation.run()
+            messages = load_run_log(Path(tmpdir), "messages", ["id", "sender", "receiver", "caused_by"])
+        return sorted((m["id"], m["sender"], m["receiver"], m["caused_by"]) for m in messages)
+    
+    first, second, other = await message_links(42), await message_links(42), await message_links(7)
+    assert first and first == second
+    assert {m[0] for m in first}.isdisjoint(m[0] for m in other)
+    print(f"✓ {len(first)} identical message ids for seed 42")
+
+
+def make_batch_runner(tmpdir: Path, failing_seed=None, **kwargs):
+    """Batch runner over 2 strategies x 3 seeds on the mock provider"""
+    import yaml
+    sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+    import run_batch
+    
+    class Runner(run_batch.BatchExperimentRunner):
+        def build_job(self, defense_strategy, seed, task_file, output_dir):
+            job = super().build_job(defense_strategy, seed, task_file, output_dir)
+            if seed == failing_seed:
+                job["llm_config"] = {"provider": "unknown"}
+            return job
+    
+    configs = {
+        "experiments.yaml": {"seeds": [1, 2, 3], "defense_strategies": ["NONE", "INSTR_ACTIVE"]},
+        "llm.yaml": {"provider": "mock", "mock": {"seed": 0, "run_code_probability": 0.0}},
+        "sim.yaml": {"max_messages": 20, "max_time_s": 30, "deadlock_timeout_s": 5},
+    }
+    for name, config in configs.items():
+        (tmpdir / name).write_text(yaml.safe_dump(config))
+    
+    return Runner(
+        config_file=tmpdir / "experiments.yaml",
+        output_base_dir=tmpdir / "out",
+        llm_config_file=tmpdir / "llm.yaml",
+        sim_config_file=tmpdir / "sim.yaml",
+        **kwargs
+    )
+
+
+def load_batch_summaries(runner):
+    return {
+        strategy: json.loads((runner.output_base_dir / strategy.lower() / "summary.json").read_text())
+        for strategy in ("NONE", "INSTR_ACTIVE")
+    }
+
+
+async def test_batch_runner_runs_every_job():
+    """--workers and --concurrency both run every (strategy, seed) job"""
+    print("\nTesting parallel batch sweeps...")
+    for options in ({"workers": 2}, {"concurrency": 3}):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            runner = make_batch_runner(Path(tmpdir), **options)
+            await runner.run_all_experiments()
+            for strategy, summary in load_batch_summaries(runner).items():
+                assert summary["robustness"]["total_runs"] == 3 and summary["failed_runs"] == [], options
+                for seed in (1, 2, 3):
+                    assert (runner.output_base_dir / strategy.lower() / f"seed_{seed}" / "outcomes.json").exists()
+    print("✓ All 6 runs completed with workers and with concurrency")
+
+
+async def test_batch_runner_isolates_failed_runs():
+    """A failing run is recorded and the other runs still complete"""
+    print("\nTesting batch failure isolation...")
+    for options in ({"workers": 2}, {"concurrency": 3}):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            runner = make_batch_runner(Path(tmpdir), failing_seed=2, **options)
+            await runner.run_all_experiments()
+            for summary in load_batch_summaries(runner).values():
+                assert summary["robustness"]["total_runs"] == 2, options
+                assert [f["seed"] for f in summary["failed_runs"]] == [2]
+                assert "Unknown LLM provider" in summary["failed_runs"][0]["error"]
+    print("✓ Failed run isolated from the rest of the sweep")
+
+
+async def test_batch_runner_fail_fast():
+    """--fail-fast aborts the sweep on the first failed run"""
+    print("\nTesting batch fail-fast...")
+    for options in ({}, {"workers": 2}, {"concurrency": 3}):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            runner = make_batch_runner(Path(tmpdir), failing_seed=2, fail_fast=True, **options)
+            try:
+                await runner.run_all_experiments()
+            except (RuntimeError, ValueError) as e:
+                assert "Unknown LLM provider" in str(e), options
+            else:
+                raise AssertionError(f"Sweep did not stop: {options}")
+            assert not (runner.output_base_dir / "instr_active" / "summary.json").exists()
+    print("✓ Sweep stopped on the first failure")